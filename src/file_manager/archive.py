@@ -0,0 +1,203 @@
+# Append-only pack files that hold many small cache entries, e.g. the features or timings of all instances of a domain,
+# in one file instead of one file per entry.
+# A pack "<name>.pack" is a sequence of records (header, key, data). The index "<name>.index" has a json line with the
+# key, offset, length and compression of each record, such that an entry is read with one seek without unpacking the
+# rest of the pack. Entries are never changed in place: writing a key again appends a record that replaces the old one.
+# The pack is the source of truth: if the index is lost or misses records, the records are scanned, and the index is
+# rebuilt from the pack before the next record is appended.
+
+import fcntl
+import json
+import lzma
+import os
+import struct
+from typing import Iterator, Optional
+
+HEADER = struct.Struct("<IQB")      # the length of the key, the length of the data and the compression of a record
+COMPRESSIONS = [None, "lzma", "zstd"]
+
+
+def compress(data: bytes, compression: Optional[str]) -> bytes:
+    match compression:
+        case None: return data
+        case "lzma": return lzma.compress(data)
+        case "zstd":
+            import zstandard    # optional dependency, only needed for packs written with zstd compression
+            return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(f"unknown compression {compression}")
+
+
+def decompress(data: bytes, compression: Optional[str]) -> bytes:
+    match compression:
+        case None: return data
+        case "lzma": return lzma.decompress(data)
+        case "zstd":
+            import zstandard
+            return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"unknown compression {compression}")
+
+
+class PackArchive:
+    """
+    An append-only pack file with an index of its entries. Several processes can write to the same pack, appending is
+    done under an exclusive lock on the pack file.
+    """
+    path: str
+    index: dict[str, tuple[int, int, Optional[str]]]
+
+    def __init__(self, path: str):
+        """
+        :param path: The path of the pack without extension, the pack and index files are made when the first entry is
+                     written
+        """
+        self.path = path
+        self.index = dict()
+        self._index_read = 0    # the number of bytes of the index file that were read
+        self._index_inode = None    # the inode of the index file that was read, which changes when it is rewritten
+        self._index_end = 0     # the end of the last record in the index file
+        self._end = 0           # the end of the last record in the pack that is known
+        self._file = None
+        self._refresh()
+
+    @property
+    def pack_file(self) -> str:
+        return self.path + ".pack"
+
+    @property
+    def index_file(self) -> str:
+        return self.path + ".index"
+
+    def _refresh(self) -> None:
+        """ Read the lines that were added to the index since it was last read, e.g. by other processes. An index that
+        was rewritten (see _rebuild) or removed is read again from the start."""
+        try:
+            file = open(self.index_file, "rb")
+        except FileNotFoundError:
+            file = None
+        stat = None if file is None else os.fstat(file.fileno())
+        if stat is None or stat.st_ino != self._index_inode or stat.st_size < self._index_read:
+            self._index_inode = None if stat is None else stat.st_ino
+            self._index_read = 0
+            self._index_end = 0
+        if file is not None:
+            with file:
+                file.seek(self._index_read)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break       # a line that is still being written
+                    key, offset, length, compression = json.loads(line)
+                    self.index[key] = (offset, length, compression)
+                    self._index_end = max(self._index_end, offset + length)
+                    self._index_read += len(line)
+        self._end = max(self._end, self._index_end)
+        if os.path.isfile(self.pack_file) and os.path.getsize(self.pack_file) > self._end:
+            self._scan()
+
+    def _scan(self) -> None:
+        """ Add the records of the pack after the last indexed record to the index, e.g. after an interrupted write."""
+        with open(self.pack_file, "rb") as file:
+            file.seek(self._end)
+            while len(header := file.read(HEADER.size)) == HEADER.size:
+                key_length, length, compression = HEADER.unpack(header)
+                key = file.read(key_length)
+                offset = file.tell()
+                if len(key) != key_length or len(file.read(length)) != length:
+                    break       # a record that is still being written
+                self.index[key.decode()] = (offset, length, COMPRESSIONS[compression])
+                self._end = offset + length
+
+    def _rebuild(self) -> None:
+        """ Index all records of the pack again from the start and replace the index file, e.g. after the index file was
+        removed or a write was interrupted between the record and its index line. Only called under the lock of the
+        pack, before a record is appended: otherwise the index would end after the records it lost, and they could not
+        be found anymore."""
+        self.index = dict()
+        self._end = 0
+        self._scan()
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w") as index:
+            index.writelines(json.dumps([key, offset, length, compression]) + "\n"
+                             for key, (offset, length, compression) in self.index.items())
+        os.replace(tmp, self.index_file)
+        self._refresh()
+
+    def __contains__(self, key: str) -> bool:
+        if key not in self.index:
+            self._refresh()
+        return key in self.index
+
+    def keys(self) -> Iterator[str]:
+        self._refresh()
+        return iter(list(self.index))
+
+    def get(self, key: str) -> bytes:
+        """
+        :param key: The key of an entry
+        :return: The data of the entry, a KeyError is raised if the pack has no entry with the key
+        """
+        if key not in self:
+            raise KeyError(key)
+        offset, length, compression = self.index[key]
+        if self._file is None:
+            self._file = open(self.pack_file, "rb")
+        # pread does not use the position of the file, which forked worker processes share with their parent
+        return decompress(os.pread(self._file.fileno(), length, offset), compression)
+
+    def locate(self, key: str) -> tuple[int, int]:
+        """
+        :param key: The key of an entry that was written without compression
+        :return: The offset and the length of the data of the entry in the pack file, e.g. to memory-map it. A KeyError
+                 is raised if the pack has no entry with the key, a ValueError if the entry is compressed.
+        """
+        if key not in self:
+            raise KeyError(key)
+        offset, length, compression = self.index[key]
+        if compression is not None:
+            raise ValueError(f"{key} is compressed with {compression}")
+        return offset, length
+
+    def put(self, key: str, data: bytes, compression: Optional[str] = None) -> None:
+        """
+        Append an entry to the pack, replacing an entry with the same key
+        :param key: The key of the entry
+        :param data: The data of the entry
+        :param compression: The compression of the entry: None, "lzma" or "zstd". Entries are read with the compression
+                            they were written with.
+        """
+        assert(compression in COMPRESSIONS)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = compress(data, compression)
+        key_bytes = key.encode()
+        with open(self.pack_file, "ab") as pack:
+            fcntl.flock(pack, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if os.fstat(pack.fileno()).st_size > self._index_end:
+                    self._rebuild()
+                pack.seek(0, os.SEEK_END)
+                offset = pack.tell() + HEADER.size + len(key_bytes)
+                pack.write(HEADER.pack(len(key_bytes), len(data), COMPRESSIONS.index(compression)) + key_bytes + data)
+                pack.flush()
+                with open(self.index_file, "a") as index:
+                    index.write(json.dumps([key, offset, len(data), compression]) + "\n")
+            finally:
+                fcntl.flock(pack, fcntl.LOCK_UN)
+        self._refresh()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_archives = dict[str, PackArchive]()    # the packs that were opened by this process
+
+
+def open_archive(path: str) -> PackArchive:
+    """
+    :param path: The path of a pack without extension
+    :return: The pack, which is only opened once per process
+    """
+    if path not in _archives:
+        _archives[path] = PackArchive(path)
+    return _archives[path]
@@ -2,8 +2,12 @@
 
 import json
 import os
+import shutil
+import tempfile
 from os import path
 
+from .archive import open_archive
+
 
 def cache_to_file(filepath: str, serializer, deserializer, namer):
     """
@@ -35,3 +39,122 @@ def cache_to_file(filepath: str, serializer, deserializer, namer):
                     return deserializer(json.load(file))
         return cached_f
     return wrapper
+
+
+def save_to_directory(directory: str, save, res) -> None:
+    """
+    Save an output to a directory through a temporary directory that is renamed when it is complete, such that an
+    interrupted save does not leave a directory behind that looks like a cached output. Each save has its own temporary
+    directory, such that processes can save the same output at the same time. If the directory already exists, e.g.
+    because another process saved the output first, it is kept.
+    :param directory: The directory in which the output will be saved
+    :param save: Function (O, directory) -> None that writes the output O to files in the directory
+    :param res: The output O
+    """
+    directory = directory.rstrip("/")
+    parent, name = path.split(directory)
+    os.makedirs(parent or ".", exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=name + ".", suffix=".tmp", dir=parent or ".")
+    try:
+        save(res, tmp)
+        try:
+            os.replace(tmp, directory)
+        except OSError:
+            if not path.isdir(directory):
+                raise
+    finally:
+        if path.exists(tmp):
+            shutil.rmtree(tmp)
+
+
+def directory_cached(directory: str) -> bool:
+    """
+    :param directory: A cache directory as made by save_to_directory
+    :return: True if the directory exists, or if it was moved into the pack of its parent directory by
+             migrate.pack_array_directories
+    """
+    directory = directory.rstrip("/")
+    if path.isdir(directory):
+        return True
+    parent = path.dirname(directory)
+    return path.isfile(parent + ".pack") and path.basename(directory) + "/" in open_archive(parent)
+
+
+def cache_to_directory(filepath: str, save, load, namer, fallback=None):
+    """
+    Caches a slow function F like cache_to_file, but saves its output to a directory of files instead of a json file,
+    e.g. binary arrays that can be memory-mapped when they are loaded.
+    :param filepath: Path to the directory in which the cache directory will be saved
+    :param save: Function (O, directory) -> None that writes the output O of F to files in the directory
+    :param load: Function directory -> O that is the inverse of save. It also has to read a directory that was moved into
+                 the pack of its parent directory, see migrate.pack_array_directories
+    :param namer: Injective function that takes as input the arguments of F and outputs a unique directory name that
+                  will be used to write or retrieve F's output.
+    :param fallback: Optional pair (namer, deserializer) of an older json cache of F as made by cache_to_file or
+                     cache_to_archive, which is read and saved to the cache directory if the cache directory does not
+                     exist
+    :return: ???
+    """
+    def wrapper(f):
+        def cached_f(*args, **kwargs):
+            directory = filepath + namer(*args, **kwargs)
+            if directory_cached(directory):
+                return load(directory)
+            found = False
+            if fallback is not None:
+                json_namer, deserializer = fallback
+                try:
+                    res = deserializer(read_cached(filepath + json_namer(*args, **kwargs)))
+                    found = True
+                except FileNotFoundError:
+                    pass
+            if not found:
+                res = f(*args, **kwargs)
+            save_to_directory(directory, save, res)
+            # the output is read back from the directory, such that it is the same as an output that is read from the
+            # cache later, e.g. with memory-mapped arrays instead of the arrays that were computed
+            return load(directory)
+        return cached_f
+    return wrapper
+
+
+def read_cached(filename: str):
+    """
+    Read a cached output, from its own file or from the pack of its directory (see cache_to_archive)
+    :param filename: The name of the cache file
+    :return: The json object that was saved, a FileNotFoundError is raised if the output was not cached
+    """
+    if path.isfile(filename):
+        with open(filename, "r") as file:
+            return json.load(file)
+    pack = open_archive(path.dirname(filename))
+    if path.basename(filename) in pack:
+        return json.loads(pack.get(path.basename(filename)))
+    raise FileNotFoundError(filename)
+
+
+def cache_to_archive(filepath: str, serializer, deserializer, namer, compression=None):
+    """
+    Caches a slow function F like cache_to_file, but saves all outputs that would be saved in the same directory as
+    entries of one pack file "<directory>.pack" (see archive.PackArchive), instead of one file per output. Outputs that
+    were cached in a file by cache_to_file are still read from that file.
+    :param filepath: Path to the directory in which the cache will be saved
+    :param serializer: Function O -> J that converts the output O of F to a json writable object J
+    :param deserializer: Function J -> O that is the inverse of the serializer function
+    :param namer: Injective function that takes as input the arguments of F and outputs a unique filename, the name of
+                  its directory is the name of the pack and the rest is the key of the entry in the pack
+    :param compression: The compression of the entries: None, "lzma" or "zstd"
+    :return: ???
+    """
+    def wrapper(f):
+        def cached_f(*args, **kwargs):
+            filename = filepath + namer(*args, **kwargs)
+            try:
+                return deserializer(read_cached(filename))
+            except FileNotFoundError:
+                res = f(*args, **kwargs)
+                open_archive(path.dirname(filename)).put(path.basename(filename), json.dumps(serializer(res)).encode(),
+                                                         compression)
+                return res
+        return cached_f
+    return wrapper
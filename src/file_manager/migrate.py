@@ -0,0 +1,113 @@
+# Convert the transition systems that were cached as json files to the binary format of TransitionSystem.save, which
+# is much faster to load, and move directories of small cache files into packs (see archive.py). The binary caches of
+# transition systems, shared graphs and feature values are directories of a few .npy files each, these are packed too.
+# Run this file once on a cache directory, e.g. python -m src.file_manager.migrate cache/
+
+import json
+import os
+import shutil
+import sys
+from glob import glob
+from typing import Optional
+
+from tqdm import tqdm
+
+from src.file_manager.archive import open_archive
+from src.file_manager.cashing import directory_cached, save_to_directory
+from src.transition_system.transition_system import TransitionSystem
+
+
+def migrate_transition_systems(cache_directory: str, remove: bool = False) -> list[str]:
+    """
+    Convert every cached transition system <domain>/transition_systems/<name>.json of a cache directory to the binary
+    cache directory <domain>/transition_systems/<name>/. Transition systems that already have a binary cache are skipped.
+    :param cache_directory: The directory in which the caches of all domains are saved
+    :param remove: If true, the json file is removed after it is converted
+    :return: The json files that were converted
+    """
+    converted = list[str]()
+    for json_file in tqdm(sorted(glob(os.path.join(cache_directory, "*", "transition_systems", "*.json")))):
+        directory = json_file.removesuffix(".json")
+        if not directory_cached(directory):
+            with open(json_file, "r") as file:
+                system = TransitionSystem.deserialize(json.load(file))
+            save_to_directory(directory, TransitionSystem.save, system)
+            converted.append(json_file)
+        if remove:
+            os.remove(json_file)
+    return converted
+
+
+def pack_directory(directory: str, compression: Optional[str] = None, remove: bool = False) -> int:
+    """
+    Add the files of a directory of small cache files, e.g. <domain>/groundings/, as entries to the pack of the
+    directory, as if they were cached with cache_to_archive. Files that already have an entry are skipped.
+    :param directory: The directory
+    :param compression: The compression of the entries: None, "lzma" or "zstd"
+    :param remove: If true, the files are removed after they are added to the pack
+    :return: The number of files that were added to the pack
+    """
+    pack = open_archive(directory.rstrip("/"))
+    added = 0
+    for name in sorted(os.listdir(directory)):
+        file_name = os.path.join(directory, name)
+        if not os.path.isfile(file_name):
+            continue
+        if name not in pack:
+            with open(file_name, "rb") as file:
+                pack.put(name, file.read(), compression)
+            added += 1
+        if remove:
+            os.remove(file_name)
+    return added
+
+
+def pack_array_directories(directory: str, remove: bool = False) -> int:
+    """
+    Add the files of each directory <directory>/<name>/ that was saved with save_to_directory, e.g. the arrays of a
+    TransitionSystem, as entries "<name>/<file>" to the pack of the directory, followed by an empty entry "<name>/" that
+    marks the directory as complete (see cashing.directory_cached). The entries are not compressed, such that the .npy
+    files can still be memory-mapped from the pack (see load_arrays). Directories that are already packed are skipped.
+    :param directory: The directory, e.g. <domain>/transition_systems/
+    :param remove: If true, the directories are removed after they are added to the pack
+    :return: The number of directories that were added to the pack
+    """
+    pack = open_archive(directory.rstrip("/"))
+    added = 0
+    for name in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, name)
+        if not os.path.isdir(folder) or name.endswith(".tmp"):
+            continue        # not a cache directory, or one that save_to_directory is still writing
+        if name + "/" not in pack:
+            for file_name in sorted(os.listdir(folder)):
+                with open(os.path.join(folder, file_name), "rb") as file:
+                    pack.put(f"{name}/{file_name}", file.read())
+            pack.put(name + "/", b"")
+            added += 1
+        if remove:
+            shutil.rmtree(folder)
+    return added
+
+
+def pack_cache(cache_directory: str, compression: Optional[str] = None, remove: bool = False) -> int:
+    """
+    Move the groundings, features and timings of all domains of a cache directory into packs, see pack_directory, and
+    the binary caches of transition systems, shared graphs and feature values, see pack_array_directories
+    :return: The number of files and directories that were added to packs
+    """
+    directories = [d for pattern in ("groundings", os.path.join("timers", "transition_systems"), os.path.join("features", "*"),
+                                     os.path.join("timers", "features", "*"))
+                   for d in glob(os.path.join(cache_directory, "*", pattern)) if os.path.isdir(d)]
+    array_directories = [d for pattern in (os.path.join("*", "transition_systems"), "graphs",
+                                           os.path.join("*", "features", "*"))
+                         for d in glob(os.path.join(cache_directory, pattern)) if os.path.isdir(d)]
+    return sum(pack_directory(d, compression, remove) for d in tqdm(sorted(directories))) + \
+        sum(pack_array_directories(d, remove) for d in tqdm(sorted(array_directories)))
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if a != "--remove"]
+    cache = args[0] if args else "../../cache/"
+    remove = "--remove" in sys.argv
+    print(f"Converted {len(migrate_transition_systems(cache, remove))} transition systems")
+    print(f"Packed {pack_cache(cache, remove=remove)} cache files")
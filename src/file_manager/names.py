@@ -1,17 +1,63 @@
 # Define all namer functions for cashing.
 
+import hashlib
+
 import tarski
 import dlplan
 
 
-def transition_system(i: tarski.fstrips.Problem) -> str:
+def symmetric_suffix(args: tuple, symmetry: bool) -> str:
+    """ The suffix of symmetry-reduced transition systems, given the arguments of tarski_to_transition_system."""
+    return "_symmetric" if symmetry or (len(args) > 3 and args[3]) else ""
+
+
+def transition_system(i: tarski.fstrips.Problem, *args, symmetry=False, **__) -> str:
     return f"{i.domain_name}/transition_systems/" \
-           f"{i.name}.json"
+           f"{i.name}{symmetric_suffix(args, symmetry)}.json"
+
+
+def transition_system_arrays(i: tarski.fstrips.Problem, *args, symmetry=False, **__) -> str:
+    return f"{i.domain_name}/transition_systems/" \
+           f"{i.name}{symmetric_suffix(args, symmetry)}/"
+
+
+def instance_digest(i: tarski.fstrips.Problem) -> str:
+    """ Short hash of the objects and initial state of an instance, for instances that share the same name."""
+    content = sorted(c.name for c in i.language.constants()) + sorted(str(a) for a in i.init.as_atoms())
+    return hashlib.sha1(" ".join(content).encode()).hexdigest()[:12]
+
+
+def grounding(i: tarski.fstrips.Problem) -> str:
+    return f"{i.domain_name}/groundings/" \
+           f"{i.name}_{instance_digest(i)}.json"
+
+
+def file_digest(*files: str) -> str:
+    """ Hash of the content of files, e.g. the PDDL files of an instance."""
+    digest = hashlib.sha256()
+    for f in files:
+        with open(f, "rb") as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+def parsed_instance(domain_file: str, instance_file: str) -> str:
+    return f"parsed/{file_digest(domain_file, instance_file)}.json"
+
+
+def checkpoint(i: tarski.fstrips.Problem, symmetry=False) -> str:
+    return f"{i.domain_name}/checkpoints/" \
+           f"{i.name}_{instance_digest(i)}{symmetric_suffix((), symmetry)}.pickle"
+
+
+def shared_graph(digest: str) -> str:
+    """ The goal-free reachable graph of all instances whose grounded dynamics have the given digest."""
+    return f"graphs/{digest}/"
 
 
-def transition_system_timer(i: tarski.fstrips.Problem) -> str:
+def transition_system_timer(i: tarski.fstrips.Problem, *args, symmetry=False, **__) -> str:
     return f"{i.domain_name}/timers/transition_systems/" \
-           f"{i.name}.json"
+           f"{i.name}{symmetric_suffix(args, symmetry)}.json"
 
 
 def feature_vals(dlstates: list[dlplan.core.State], string_features, factory) -> str:
@@ -7,7 +7,9 @@ import json
 import matplotlib.pyplot as plt
 import numpy as np
 
+from src.file_manager.cashing import directory_cached, read_cached
 from src.logics.rules import Sketch
+from src.sketch_verification.feature_matrix import FeatureMatrix
 
 
 def works(l: list[tuple[int, int]]) -> bool:
@@ -255,10 +257,9 @@ def add_to_plot_rule_size_time(domain_name, complexity, num_f, num_rules, instan
         timings = info["timings"]
         instance_idx: int = info["instance_files"].index(instance)
 
-        with open(
-                f"../../cache_final/{domain_name}/features/{'_'.join([str(complexity)] * 5)}_180_10000/{instance.removesuffix('.pddl')}.json") as f:
-            feature_vals = json.load(f)
-            bounds = get_bounds(feature_vals)
+        features = f"../../cache_final/{domain_name}/features/{'_'.join([str(complexity)] * 5)}_180_10000/{instance.removesuffix('.pddl')}"
+        feature_vals = FeatureMatrix.load(features) if directory_cached(features) else read_cached(features + ".json")
+        bounds = get_bounds(feature_vals)
 
         working_times = [sketch_timings[instance_idx][0] / 1000000000 for sketch_timings in timings if
                          works(sketch_timings)]
@@ -1,7 +1,9 @@
+import json
 import os
 import resource
 import re
 import time
+from functools import partial
 from multiprocessing import Pool, TimeoutError
 
 from tqdm import tqdm
@@ -13,8 +15,10 @@ import src.transition_system as ts
 import src.file_manager.names as names
 from src.logics.rules import Sketch
 from src.sketch_generation.generation import construct_feature_generator
-from src.file_manager.cashing import cache_to_file
+from src.file_manager.cashing import cache_to_file, cache_to_directory
 from src.sketch_verification.feature_instance import FeatureInstance
+from src.sketch_verification.feature_matrix import FeatureMatrix, equivalence_classes
+from src.sketch_verification.registry import InstanceRegistry, verify_registered
 from src.sketch_verification.verify import verify_sketch
 from src.sketch_verification.laws import law1, law2, impl_law
 
@@ -37,28 +41,136 @@ def sort_files(fs: list[str]):
     return sorted(fs, key=alphanum_key)
 
 
-def cache_all_transition_systems(domain_file: str, instance_files: list[str]) -> None:
+def cache_transition_system(directory: str, domain_file: str, instance_file: str, max_states: int = None,
+                            memory_budget: int = None, checkpoint_interval: float = None) -> tuple[str, bool]:
+    """
+    Build the transition system of an instance and save it to a file, since 'tarski_to_transition_system' is cached
+    :param directory: The directory in which the instance file can be found
+    :param domain_file: PDDL file that contains a planning domain description
+    :param instance_file: The name of the PDDL file that contains an instance of the planning domain
+    :param max_states: The maximum number of states of a transition system, larger instances are skipped
+    :param memory_budget: If given, the state space is explored on disk using about this many bytes of memory
+    :param checkpoint_interval: If given, the exploration is checkpointed every this many seconds, and an interrupted
+                                exploration of the instance is resumed
+    :return: The name of the instance file, and False if the instance was too large
+    """
+    instance: ts.parsed.ParsedInstance = ts.parsed.parse_instance(domain_file, directory + instance_file)
+    instance.name = instance_file.removesuffix(".pddl")
+    try:
+        ts.tarski.tarski_to_transition_system(instance, max_states=max_states, memory_budget=memory_budget,
+                                              checkpoint_interval=checkpoint_interval)
+    except ts.exploration.StateSpaceTooLarge:
+        return instance_file, False
+    return instance_file, True
+
+
+def cache_all_transition_systems(directory: str, domain_file: str, instance_files: list[str], processes: int = 1,
+                                 max_states: int = None, memory_budget: int = None,
+                                 checkpoint_interval: float = None) -> list[str]:
     """
     Build and save all transition systems from a list of instances from the same domain to files
     Transition systems are saved because the 'tarski_to_transition_system' method is cached
+    :param directory: The directory in which all instance files can be found
     :param domain_file: PDDL file that contains a planning domain description
     :param instance_files: PDDL files that contain instances of the planning domain
-    :return:
+    :param processes: The number of instances that are built at the same time, each in its own process
+    :param max_states: The maximum number of states of a transition system, larger instances are skipped
+    :param memory_budget: If given, state spaces are explored on disk using about this many bytes of memory each
+    :param checkpoint_interval: If given, explorations are checkpointed every this many seconds, such that running this
+                                function again after an interruption resumes them
+    :return: The instance files whose transition system has more than max_states states
     """
     print("Building transition systems and reading states")
-    for inst_f in tqdm(instance_files):
-        instance: tarski.fstrips.Problem = ts.tarski.load_instance(domain_file, directory + inst_f)
-        instance.name = inst_f.removesuffix(".pddl")
-        ts.tarski.tarski_to_transition_system(instance)
+    build = partial(cache_transition_system, directory, domain_file, max_states=max_states, memory_budget=memory_budget,
+                    checkpoint_interval=checkpoint_interval)
+    too_large = list[str]()
+    if processes > 1:
+        with Pool(processes=processes) as p:
+            for inst_f, built in tqdm(p.imap_unordered(build, instance_files), total=len(instance_files)):
+                if not built:
+                    too_large.append(inst_f)
+    else:
+        for inst_f in tqdm(instance_files):
+            if not build(inst_f)[1]:
+                too_large.append(inst_f)
+    if too_large:
+        print(f"Skipped {len(too_large)} instances with more than {max_states} states:", ", ".join(too_large))
     print("Done with transition systems")
+    return sort_files(too_large)
+
+
+def calculate_feature_vals(sts: list[dlplan.core.State], fs: list[str], filename) -> FeatureMatrix:
+    """
+    Calculate the values of features in states
+    :param sts: The states of an instance
+    :param fs: The features as strings
+    :param filename: The name of the instance in the feature cache, see cached_feature_vals
+    :return: The values of the features in the states
+    """
+    # We need to recreate the element factory using one of the states of an instance. We don't know why but using
+    # the factory defined previously results in errors.
+    fact = dlplan.core.SyntacticElementFactory(sts[0].get_instance_info().get_vocabulary_info())
+    boolean_features = [fact.parse_boolean(f) for f in fs if f.startswith("b_")]
+    numerical_features = [fact.parse_numerical(f) for f in fs if f.startswith("n_")]
+
+    # the features share sub-elements, their denotations are computed once per state
+    features = numerical_features + boolean_features
+    values = ts.dlplan.eval_features_cached(features, sts)
+    return FeatureMatrix.from_valuations({f.compute_repr(): v for f, v in zip(features, values)}, len(sts))
+
+
+def cached_feature_vals(domain_name: str, params: list[int]):
+    """
+    :param domain_name: The name of the domain
+    :param params: The parameters of the feature generator
+    :return: calculate_feature_vals, of which the results and timings are cached per instance in the cache directory of
+             the domain and the parameters
+    """
+    # older caches of the feature values are json entries in the pack of the directory, they are still read
+    return cache_to_directory(f"../../cache/{domain_name}/features/{'_'.join(map(str, params))}/", FeatureMatrix.save,
+                              FeatureMatrix.load, lambda x, y, z: f"{z}/",
+                              fallback=(lambda x, y, z: f"{z}.json", FeatureMatrix.from_valuations))(
+        timer(f"../../cache/{domain_name}/timers/features/{'_'.join(map(str, params))}/", lambda x, y, z: f"{z}.json",
+              archive=True)(calculate_feature_vals))
+
+
+def feature_vals_name(instance_file: str, symmetry: bool) -> str:
+    """ The name of an instance in the feature cache."""
+    return instance_file.removesuffix(".pddl") + ("_symmetric" if symmetry else "")
+
+
+def evaluate_instance(directory: str, domain_file: str, domain_name: str, params: list[int], features: list[str],
+                      instance_file: str, symmetry: bool = False) -> tuple[str, float]:
+    """
+    Evaluate features on the states of an instance and write the result to the feature cache, as the task of a worker
+    process. dlplan states cannot be sent to other processes, so the worker reads the instance and its transition system
+    from their caches and makes the dlplan states itself.
+    :param directory: The directory in which the instance file can be found
+    :param domain_file: PDDL file that contains a planning domain description
+    :param domain_name: The name of the domain
+    :param params: The parameters of the feature generator
+    :param features: The features as strings
+    :param instance_file: The name of the PDDL file that contains an instance of the planning domain
+    :param symmetry: If true, the features are evaluated on the symmetry-reduced transition system
+    :return: The name of the instance file, and the number of seconds it took
+    """
+    start = time.monotonic()
+    instance = ts.parsed.parse_instance(domain_file, directory + instance_file)
+    instance.name = instance_file.removesuffix(".pddl")
+    system = ts.tarski.tarski_to_transition_system(instance, symmetry=symmetry)
+    dlstates = ts.dlplan.dlstates_from_store(system.states, ts.conversions.dlinstance_from_parsed(instance))
+    cached_feature_vals(domain_name, params)(dlstates, features, feature_vals_name(instance_file, symmetry))
+    return instance_file, time.monotonic() - start
 
 
 def run_on_multiple_instances(directory: str, domain_file: str, instance_files: list[str], generator_params: list[int],
-                              max_features, max_rules, time_limit=None) -> None:
+                              max_features, max_rules, time_limit=None, symmetry=False, processes: int = 1) -> None:
     """
     Generate and verify sketches for a planning domain given domain instances. All working sketches are cached to a
     file. The sketches can be found in:
     "generated/'domain_name'/'generator_params'_'max_features'/rules_'max_rules'.json"
+    Sketches only use one feature of each class of features with the same values in all states, the classes are saved in
+    "generated/'domain_name'/'generator_params'_'max_features'/equivalent_features.json"
     Note: to model-check a sketch over one instance, a time-limit of 5 minutes is used. If the time limit is passed,
     the sketch is labeled as "timed-out" and the algorithm moves on to the next candidate sketch.
     :param directory: The directory in which all domain and instance files can be found
@@ -77,25 +189,33 @@ def run_on_multiple_instances(directory: str, domain_file: str, instance_files:
     :param max_rules: The number of rules a sketch can use
     :param time_limit: Time limit in seconds for generating and verifying sketches. The time to built transition systems
                         is not taken into account here. The timer starts after all systems are built.
+    :param symmetry: If true, sketches are verified on symmetry-reduced transition systems. Only features that are
+                     invariant under the permutations of interchangeable objects are used then.
+    :param processes: The number of processes that evaluate the features on the instances before the sketches are
+                      verified
     :return: Nothing, good sketches are saved to a file
     """
     assert (len(generator_params) == 7)
-    domain = ts.tarski.load_domain(domain_file)
-    dl_vocab = ts.conversions.dlvocab_from_tarski(domain.language)
-    domain_name = domain.domain_name
+    # the vocabulary and the name of the domain are taken from the parsed instances
+    assert (len(instance_files) > 0)
     all_states = []
     systems = []
+    dlinstances = []
 
     print("Building transition systems and reading states")
+    # the PDDL files are only parsed the first time, afterwards the parsed instances and transition systems are cached
     for inst_f in tqdm(instance_files):
-        instance: tarski.fstrips.Problem = ts.tarski.load_instance(domain_file, directory + inst_f)
+        instance: ts.parsed.ParsedInstance = ts.parsed.parse_instance(domain_file, directory + inst_f)
         instance.name = inst_f.removesuffix(".pddl")
-        transition_system = ts.tarski.tarski_to_transition_system(instance)
-        dlinstance = ts.conversions.dlinstance_from_tarski(domain, instance)
-        dlstates = [ts.dlplan.dlstate_from_state(s, dlinstance) for s in transition_system.states]
+        transition_system = ts.tarski.tarski_to_transition_system(instance, symmetry=symmetry)
+        dlinstance = ts.conversions.dlinstance_from_parsed(instance)
+        dlstates = ts.dlplan.dlstates_from_store(transition_system.states, dlinstance)
         systems.append(transition_system)
         all_states.append(dlstates)
+        dlinstances.append(dlinstance)
     print("Done with transition systems")
+    dl_vocab = ts.conversions.dlvocab_from_parsed(instance)
+    domain_name = instance.domain_name
 
     factory = dlplan.core.SyntacticElementFactory(dl_vocab)
     generator = construct_feature_generator()
@@ -114,23 +234,60 @@ def run_on_multiple_instances(directory: str, domain_file: str, instance_files:
                                                                  "b_empty(c_bot)",
                                                                  "n_count(c_top)",
                                                                  "n_count(c_bot)"]]
+    if symmetry:
+        # a state of a symmetry-reduced system stands for all its permutations, features need to have the same value
+        # in each of them, which is checked for the transpositions that generate the permutations
+        parsed = {f: factory.parse_boolean(f) if f.startswith("b_") else factory.parse_numerical(f)
+                  for f in filtered_features}
+        variant = set()
+        for system, dlinstance in zip(systems, dlinstances):
+            variant.update(f.compute_repr() for f in ts.dlplan.non_invariant_features(
+                [parsed[f] for f in filtered_features if parsed[f].compute_repr() not in variant], system.states,
+                dlinstance, ts.symmetry.class_transpositions(system.object_classes)))
+        print(f"Removed {len(variant)} features that are not invariant under object symmetries")
+        filtered_features = [f for f in filtered_features if parsed[f].compute_repr() not in variant]
+
+    # the states were only needed to compute the features, verifying sketches only needs the graphs
+    for system in systems:
+        system.release_states()
+
+    # evaluate the features on all instances before verifying sketches, each result is cached as soon as it is done
+    calculate_feature_vals = cached_feature_vals(domain_name, params)
+    print("Evaluating features")
+    if processes > 1:
+        evaluate = partial(evaluate_instance, directory, domain_file, domain_name, params, filtered_features,
+                           symmetry=symmetry)
+        with Pool(processes=processes) as p:
+            for inst_f, seconds in tqdm(p.imap_unordered(evaluate, instance_files), total=len(instance_files)):
+                tqdm.write(f"{inst_f}: {seconds:.2f}s")
+    else:
+        for e, inst_f in enumerate(tqdm(instance_files)):
+            start = time.monotonic()
+            calculate_feature_vals(all_states[e], filtered_features, feature_vals_name(inst_f, symmetry))
+            tqdm.write(f"{inst_f}: {time.monotonic() - start:.2f}s")
+    print("Done with features")
+
+    # features with the same values in all states of all instances are interchangeable in a sketch, sketches are only
+    # generated with the least complex feature of each class. The classes are saved such that the working sketches can
+    # be mapped back to the equivalent features.
+    matrices = [calculate_feature_vals(states, filtered_features, feature_vals_name(inst_f, symmetry))
+                for inst_f, states in zip(instance_files, all_states)]
+    classes = equivalence_classes(matrices, filtered_features, lambda f: (
+        factory.parse_boolean(f) if f.startswith("b_") else factory.parse_numerical(f)).compute_complexity())
+    print(f"Removed {len(filtered_features) - len(classes)} features that are equivalent to another feature")
+    # the dlplan states were only needed to generate and evaluate the features, they are freed before the sketches are
+    # verified, like the states of the transition systems
+    del all_states, dlstates, dlinstances
+    classes_file = f"../../generated/{domain_name}/{'_'.join(map(str, generator_params))}_{max_features}/" \
+                   f"equivalent_features.json"
+    os.makedirs(os.path.dirname(classes_file), exist_ok=True)
+    with open(classes_file, "w") as file:
+        json.dump(classes, file)
+    filtered_features = list(classes)
 
     bools = [f for f in filtered_features if f.startswith("b_")]
     nums = [f for f in filtered_features if f.startswith("n_")]
 
-    @cache_to_file(f"../../cache/{domain_name}/features/{'_'.join(map(str, params))}/", lambda x: x, lambda x: x,
-                   lambda x, y, z: f"{z}.json")
-    @timer(f"../../cache/{domain_name}/timers/features/{'_'.join(map(str, params))}/", lambda x, y, z: f"{z}.json")
-    def calculate_feature_vals(sts: list[dlplan.core.State], fs: list[str], filename) -> dict:
-        """Calculate the values of features in states"""
-        # We need to recreate the element factory using one of the states of an instance. We don't know why but using
-        # the factory defined previously results in errors.
-        fact = dlplan.core.SyntacticElementFactory(sts[0].get_instance_info().get_vocabulary_info())
-        boolean_features = [fact.parse_boolean(f) for f in fs if f.startswith("b_")]
-        numerical_features = [fact.parse_numerical(f) for f in fs if f.startswith("n_")]
-
-        return {f.compute_repr(): [f.evaluate(s) for s in sts] for f in numerical_features + boolean_features}
-
     @cache_to_file(f"../../generated/{domain_name}/{'_'.join(map(str, generator_params))}_{max_features}/",
                    serializer=lambda ws_n: dict(working=[ws.serialize() for ws in ws_n[0]],
                                                 timed_out=[(s.serialize(), n, i) for s, n, i in ws_n[1]],
@@ -169,10 +326,13 @@ def run_on_multiple_instances(directory: str, domain_file: str, instance_files:
             timings_sketch = list[(float, int)]()
 
             for e, i in enumerate(instance_files):
-                feature_vals = calculate_feature_vals(all_states[e], filtered_features, i.removesuffix(".pddl"))
-                feature_instance = FeatureInstance(systems[e].graph, systems[e].init, systems[e].goals, feature_vals)
+                if e not in registry:
+                    # the instance is sent to the worker processes once, the tasks only refer to it
+                    registry.publish(e, FeatureInstance(systems[e].graph, systems[e].init, systems[e].goals,
+                                                        matrices[e], systems[e].alive_states()))
 
-                aresult = p.apply_async(func=verify_sketch, args=(sketch, feature_instance, [law1, law2, impl_law]))
+                aresult = p.apply_async(func=verify_registered,
+                                        args=(sketch, registry.directory, e, [law1, law2, impl_law]))
 
                 starttime = time.monotonic_ns()
                 try:
@@ -198,7 +358,7 @@ def run_on_multiple_instances(directory: str, domain_file: str, instance_files:
                 break
         return working_sketches, timed_out_sketches, sketch_number, list(changes), instance_files, timings
 
-    with Pool(processes=1) as p:
+    with Pool(processes=1) as p, InstanceRegistry() as registry:
         past_sketches = []
         # for n_rules in range(1, max_rules + 1):
         working_sketches, *_ = with_n_rules(max_rules, past_sketches, time_limit)
@@ -1,7 +1,9 @@
 # Definition of the FeatureInstance class
 
-from typing import Union
+from typing import Optional, Union
 from ..transition_system.graph import DirectedGraph
+from .feature_matrix import FeatureMatrix
+from ..transition_system.reachability import goal_distances, alive_states
 
 
 class FeatureInstance:
@@ -12,26 +14,36 @@ class FeatureInstance:
     Attributes:
         graph           The transition system graph
         init            The index of the initial state (i.e. the number of the node in the graph)
-        goal_states     The indices of the goal states
+        goal_states     The indices of the goal states. Like alive_states, this can also be an array, e.g. when the
+                        instance is attached from a registry.
         feature_valuations  Dict with for each feature a list of its value in each state.
                             E.g. {'f1': [3, 2, 1], 'f2': [True, True, False]} means that for the state represented by
                             node 0 in the graph, feature 'f1'=3 and 'f2'=True. For node 1 we have resp. 2 and True etc.
+                            A FeatureMatrix can be given instead of a dict.
+        alive_states    The indices of the states from which a goal state can be reached. If they are not given, e.g.
+                        by TransitionSystem.alive_states, they are computed from the graph.
     """
     graph: DirectedGraph
     init: int
     goal_states: list[int]
-    feature_valuations: dict[str, list[Union[bool, int]]]
+    feature_valuations: dict[str, list[Union[bool, int]]] | FeatureMatrix
+    alive_states: list[int]
 
-    def __init__(self, graph: DirectedGraph, init: int, goal_states: list[int], feature_valuations: dict[str, list[Union[bool, int]]]):
+    def __init__(self, graph: DirectedGraph, init: int, goal_states: list[int],
+                 feature_valuations: dict[str, list[Union[bool, int]]] | FeatureMatrix,
+                 alive: Optional[list[int]] = None):
         self.graph = graph
         self.init = init
         self.goal_states = goal_states
         self.feature_valuations = feature_valuations
+        self.alive_states = alive if alive is not None else alive_states(goal_distances(graph, goal_states))
 
     def get_bounds(self) -> dict[str, (int, int)]:
         """
         For each numerical feature, calculate the highest and lowest value it can be.
         :return: A dict with for each feature a tuple (lowest value, highest value)
         """
+        if isinstance(self.feature_valuations, FeatureMatrix):
+            return {f: b for f, b in self.feature_valuations.bounds().items() if f.startswith('n_')}
         return {f_name: (min(self.feature_valuations[f_name]), max(self.feature_valuations[f_name]))
                 for f_name in self.feature_valuations.keys() if f_name.startswith('n_')}
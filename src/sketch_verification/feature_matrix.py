@@ -0,0 +1,144 @@
+# A dense binary representation of the valuations of features over the states of an instance, which replaces the dict of
+# lists that is written to json. The values of the numerical features are kept in an int32 matrix and the values of the
+# boolean features in a bool matrix, both with a row per state and a column per feature, and saved such that they can
+# be memory-mapped.
+
+import hashlib
+from collections.abc import Mapping
+from typing import Callable, Iterator, Union
+
+import numpy as np
+
+from ..transition_system.transition_system import save_arrays, load_arrays
+
+
+class FeatureMatrix(Mapping):
+    """
+    The valuations of features over the states of an instance. It can be used as the dict {feature: [value per state]}
+    of FeatureInstance.feature_valuations. Features whose name starts with "b_" are boolean, the others numerical.
+    The matrices are stored column by column (Fortran order), such that the values of one feature are contiguous.
+    """
+    numerical: np.ndarray       # int32 matrix of states by numerical features
+    boolean: np.ndarray         # bool matrix of states by boolean features
+
+    def __init__(self, numerical: np.ndarray, boolean: np.ndarray, numerical_features: list[str],
+                 boolean_features: list[str], lists: bool = True):
+        """
+        :param lists: If true, the values of a feature are given as a list (see __getitem__), otherwise as the column
+                      of the matrix itself, e.g. to use memory-mapped matrices without copying them
+        """
+        assert(numerical.shape[1] == len(numerical_features) and boolean.shape[1] == len(boolean_features))
+        assert(numerical.shape[0] == boolean.shape[0])
+        self.numerical = numerical
+        self.boolean = boolean
+        self.numerical_features = numerical_features
+        self.boolean_features = boolean_features
+        self.index = {f: (self.numerical, i) for i, f in enumerate(numerical_features)} | \
+                     {f: (self.boolean, i) for i, f in enumerate(boolean_features)}
+        self.lists = lists
+        self._lists = dict[str, list[Union[bool, int]]]()
+
+    @classmethod
+    def from_valuations(cls, valuations: dict[str, list[Union[bool, int]]], size: int = 0) -> 'Self':
+        """
+        :param valuations: For each feature its value in each state
+        :param size: The number of states, only needed if there are no features
+        :return: The FeatureMatrix of the valuations
+        """
+        numerical_features = [f for f in valuations if not f.startswith("b_")]
+        boolean_features = [f for f in valuations if f.startswith("b_")]
+        size = len(next(iter(valuations.values()))) if valuations else size
+        numerical = np.zeros((size, len(numerical_features)), dtype=np.int32, order='F')
+        boolean = np.zeros((size, len(boolean_features)), dtype=bool, order='F')
+        for i, f in enumerate(numerical_features):
+            numerical[:, i] = valuations[f]
+        for i, f in enumerate(boolean_features):
+            boolean[:, i] = valuations[f]
+        return cls(numerical, boolean, numerical_features, boolean_features)
+
+    def size(self) -> int:
+        """ The number of states."""
+        return self.numerical.shape[0]
+
+    def column(self, feature: str) -> np.ndarray:
+        """
+        :param feature: The name of a feature
+        :return: The values of the feature in each state as an array, without copying them
+        """
+        matrix, i = self.index[feature]
+        return matrix[:, i]
+
+    def __getitem__(self, feature: str) -> list[Union[bool, int]] | np.ndarray:
+        """ The values of a feature in each state as a list, as in a dict of valuations. The list is made once. If the
+        FeatureMatrix was made with lists=False, the column is returned without copying it."""
+        if not self.lists:
+            return self.column(feature)
+        if feature not in self._lists:
+            self._lists[feature] = self.column(feature).tolist()
+        return self._lists[feature]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.numerical_features + self.boolean_features)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, feature) -> bool:
+        return feature in self.index
+
+    def bounds(self) -> dict[str, tuple[int, int]]:
+        """
+        :return: For each numerical feature the lowest and highest value it has in a state
+        """
+        if self.size() == 0:
+            return dict()
+        lows, highs = self.numerical.min(axis=0).tolist(), self.numerical.max(axis=0).tolist()
+        return {f: (low, high) for f, low, high in zip(self.numerical_features, lows, highs)}
+
+    def to_dict(self) -> dict[str, list[Union[bool, int]]]:
+        return {f: self.column(f).tolist() for f in self}
+
+    def save(self, directory: str) -> None:
+        """
+        Write the matrices to a directory as .npy files, such that they can be memory-mapped by load
+        :param directory: The directory, which is made if it does not exist
+        """
+        save_arrays(directory,
+                    {"numerical": np.asfortranarray(self.numerical), "boolean": np.asfortranarray(self.boolean)},
+                    {"numerical_features": self.numerical_features, "boolean_features": self.boolean_features})
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True, lists: bool = True) -> 'Self':
+        """
+        Read a FeatureMatrix that was written with save
+        :param directory: The directory to which the FeatureMatrix was written
+        :param mmap: If true, the matrices are memory-mapped instead of read, the values of a feature are only read
+                     from disk when the feature is used
+        :param lists: If false, the values of a feature are given as its column of the matrix, see __init__
+        :return: The FeatureMatrix
+        """
+        arrays, meta = load_arrays(directory, ["numerical", "boolean"], mmap)
+        return cls(arrays["numerical"], arrays["boolean"], meta["numerical_features"], meta["boolean_features"], lists)
+
+
+def equivalence_classes(matrices: list[FeatureMatrix], features: list[str],
+                        complexity: Callable[[str], int]) -> dict[str, list[str]]:
+    """
+    Group features that have the same value in every state of every instance. Such features are interchangeable in a
+    sketch, so only one feature of each class has to be used to generate sketches. Boolean and numerical features are
+    never in the same class. The classes are found by hashing the values of each feature over all instances.
+    :param matrices: The valuations of the features on each instance
+    :param features: The features, each of them has to be in every matrix
+    :param complexity: Function that gives the complexity of a feature
+    :return: For each class its representative, the feature with the lowest complexity (the first in features if there
+             are several), with all features of the class in the order of features. The representatives are in the
+             order of features.
+    """
+    classes = dict[bytes, list[str]]()
+    for f in features:
+        digest = hashlib.sha256(b"b" if f.startswith("b_") else b"n")
+        for matrix in matrices:
+            digest.update(np.ascontiguousarray(matrix.column(f)).tobytes())
+        classes.setdefault(digest.digest(), []).append(f)
+    representatives = {min(c, key=complexity): c for c in classes.values()}
+    return {f: representatives[f] for f in features if f in representatives}
@@ -15,6 +15,7 @@ ctl_effects = lambda n: [ctl.Var(f'e{i}') for i in range(n)]        # A list of
 ctl_rules = lambda n: list(zip(ctl_conditions(n), ctl_effects(n)))  # [(c0, e0), ... (c(n-1), e(n-1)] as CTL vars
 ltl_goal = ltl.Var('goal')
 ctl_goal = ctl.Var('goal')
+ctl_alive = ctl.Var('alive')     # EF(goal), precomputed once per instance (see valuations_to_smv)
 
 
 def ctl_rule_cannot_lead_into_dead(n) -> ctl.CTLFormula:
@@ -23,7 +24,7 @@ def ctl_rule_cannot_lead_into_dead(n) -> ctl.CTLFormula:
     :param n: number of (expanded) sktech rules
     :return:
     """
-    one_rule = [ctl.AG(ctl.Then(c, ctl.Not(ctl.EX(ctl.EF(ctl.And(e, ctl.Not(ctl.EF(ctl_goal)))))))) for c, e in
+    one_rule = [ctl.AG(ctl.Then(c, ctl.Not(ctl.EX(ctl.EF(ctl.And(e, ctl.Not(ctl_alive))))))) for c, e in
                 ctl_rules(n)]
     if one_rule:
         return reduce(ctl.And, one_rule)
@@ -38,10 +39,10 @@ def ctl_rule_can_be_followed(n) -> ctl.CTLFormula:
     :param n: number of (expanded) sketch rules
     :return:
     """
-    follow_in_future = [ctl.And(c, ctl.EX(ctl.EF(ctl.And(e, ctl.EF(ctl_goal))))) for c, e in ctl_rules(n)]
+    follow_in_future = [ctl.And(c, ctl.EX(ctl.EF(ctl.And(e, ctl_alive)))) for c, e in ctl_rules(n)]
     follow_one_of_rules = reduce(ctl.Or, follow_in_future, ctl.Bottom())
 
-    return ctl.AG(ctl.Or(ctl.Or(follow_one_of_rules, ctl_goal), ctl.Not(ctl.EF(ctl_goal))))
+    return ctl.AG(ctl.Or(ctl.Or(follow_one_of_rules, ctl_goal), ctl.Not(ctl_alive)))
 
 
 def impl_func(n) -> ltl.LTLFormula:
@@ -0,0 +1,108 @@
+# Share feature instances with worker processes without sending them along with every task.
+# The graph and the feature valuations of an instance are written once to memory-mapped files, and a task only carries
+# the directory of the registry and the key of the instance. Workers map the files the first time they need an instance
+# and keep it for later tasks. Nothing is copied when an instance is attached: the graph, the goal and alive states and
+# the values of the features are used as the memory-mapped arrays.
+
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+
+import numpy as np
+
+from ..logics.laws import AbstractLaw
+from ..logics.rules import Sketch
+from ..transition_system.analytics import as_csr
+from ..transition_system.graph import CSRGraph
+from .feature_instance import FeatureInstance
+from .feature_matrix import FeatureMatrix
+from .verify import verify_sketch
+
+_attached = dict[tuple[str, str], FeatureInstance]()     # the instances a worker process already mapped
+
+
+class InstanceRegistry:
+    """
+    A temporary directory with the published feature instances, removed when the registry is closed. Use it as a context
+    manager around the pool of worker processes.
+    """
+    directory: str
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        :param directory: The directory in which the temporary directory of the registry is made
+        """
+        self.directory = tempfile.mkdtemp(dir=directory)
+        self.keys = set[str]()
+
+    def publish(self, key: Union[int, str], instance: FeatureInstance) -> None:
+        """
+        Write the graph and the feature valuations of an instance to the registry
+        :param key: A key that identifies the instance in the registry
+        :param instance: The instance
+        """
+        key = str(key)
+        folder = os.path.join(self.directory, key)
+        os.makedirs(folder)
+        graph = as_csr(instance.graph)
+        valuations = instance.feature_valuations
+        if not isinstance(valuations, FeatureMatrix):
+            valuations = FeatureMatrix.from_valuations(valuations, graph.size())
+        valuations.save(os.path.join(folder, "valuations"))
+        arrays = {"indptr": graph.indptr, "indices": graph.indices, "labels": graph.labels,
+                  "goals": np.array(instance.goal_states, dtype=np.int64),
+                  "alive": np.array(instance.alive_states, dtype=np.int64)}
+        for name, array in arrays.items():
+            np.save(os.path.join(folder, f"{name}.npy"), array)
+        with open(os.path.join(folder, "meta.json"), "w") as file:
+            json.dump({"init": instance.init, "label_names": graph.label_names}, file)
+        self.keys.add(key)
+
+    def __contains__(self, key: Union[int, str]) -> bool:
+        return str(key) in self.keys
+
+    def close(self) -> None:
+        """ Remove the files of the registry."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> 'InstanceRegistry':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def attach(directory: str, key: Union[int, str]) -> FeatureInstance:
+    """
+    :param directory: The directory of a registry
+    :param key: The key of a published instance
+    :return: The instance, of which the graph, the goal and alive states and the FeatureMatrix are memory-mapped from
+             the files of the registry. The goal and alive states are arrays instead of lists, and the values of a
+             feature are its column of the FeatureMatrix (see FeatureMatrix.load with lists=False).
+    """
+    key = str(key)
+    if (directory, key) not in _attached:
+        folder = os.path.join(directory, key)
+        with open(os.path.join(folder, "meta.json"), "r") as file:
+            meta = json.load(file)
+        arrays = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode='r')
+                  for name in ("indptr", "indices", "labels", "goals", "alive")}
+        graph = CSRGraph(arrays["indptr"], arrays["indices"], arrays["labels"], meta["label_names"])
+        _attached[(directory, key)] = FeatureInstance(
+            graph, meta["init"], arrays["goals"], FeatureMatrix.load(os.path.join(folder, "valuations"), lists=False),
+            arrays["alive"])
+    return _attached[(directory, key)]
+
+
+def verify_registered(sketch: Sketch, directory: str, key: Union[int, str], abstract_laws: list[AbstractLaw]) -> bool:
+    """
+    Run verify_sketch on a published instance, e.g. as the task of a worker process
+    :param sketch: The sketch to check
+    :param directory: The directory of the registry
+    :param key: The key of the instance in the registry
+    :param abstract_laws: The laws that need to hold (or not hold) over the sketches on the instance
+    :return: The result of verify_sketch
+    """
+    return verify_sketch(sketch, attach(directory, key), abstract_laws)
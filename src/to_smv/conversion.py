@@ -1,5 +1,7 @@
 # Write graphs, features and sketches in SMV syntax
 
+from typing import Optional
+
 from src.logics.rules import ExpandedSketch
 from ltl import *
 from src.logics.feature_vars import *
@@ -25,19 +27,23 @@ def graph_to_smv(graph: DirectedGraph, init_index: int) -> str:
         f"                 esac;"
 
 
-def valuations_to_smv(vals: dict[str, list[Union[bool, int]]], goals: list[int], features: set[str]) -> str:
+def valuations_to_smv(vals: dict[str, list[Union[bool, int]]], goals: list[int], features: set[str],
+                      alive: Optional[list[int]] = None) -> str:
     """
     Write the values of features in each state in SMV format, and define the goal states
     :param vals: For each feature its value per state
     :param goals: The indices of the goal states
     :param features: The features that one wants to define in SMV format
+    :param alive: Optional the indices of the states from which a goal state can be reached, such that laws can use the
+                  variable "alive" instead of letting the model checker compute EF(goal)
     :return: An SMV definition of the features and their values in each state, and a definition of the goal states
     """
     tab = '\t'
     nl = '\n'
+    alive_def = f"\n{tab}alive := state in {{{', '.join(f's{i}' for i in alive)}}};" if alive is not None else ""
     return f"DEFINE \n " \
            f"{nl.join(f''' {tab}{repr_feature_str(fn)} := case {nl + tab + tab}{(nl + tab + tab).join(f'state = s{e}: {str(s).upper()};' for e, s in enumerate(vals[fn]))} {nl + tab}esac;''' for fn in features)}\n" \
-           f"{tab}goal := state in {{{', '.join(f's{i}' for i in goals)}}};"
+           f"{tab}goal := state in {{{', '.join(f's{i}' for i in goals)}}};" + alive_def
 
 
 def rules_to_smv(exp_sketch: ExpandedSketch) -> str:
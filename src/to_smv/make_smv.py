@@ -34,16 +34,18 @@ def to_smv_format(instance: FeatureInstance, exp_sketch: ExpandedSketch) -> str:
               ...
          esac;
          goal := {s1, s2};
+         alive := {s0, s1, s2};
          c0 := n_countc_equalr_primitiveat01r_primitiveat_g01=0;
          e0 := n_countc_equalr_primitiveat01r_primitiveat_g01 > 0;
          c1 := b_foo = True;
          e1 := b_foo = False;
     :param instance: A FeatureInstance object
     :param exp_sketch: An expanded sketch
-    :return:  The SMV specification of the transition system of the instance, initial state, goal states, feature values
-              in each state and conditions and effects of the expanded sketch.
+    :return:  The SMV specification of the transition system of the instance, initial state, goal and alive states,
+              feature values in each state and conditions and effects of the expanded sketch.
     """
     return "MODULE main\n" \
         + graph_to_smv(instance.graph, instance.init) + '\n' \
-        + valuations_to_smv(instance.feature_valuations, instance.goal_states, exp_sketch.get_features()) + '\n' \
+        + valuations_to_smv(instance.feature_valuations, instance.goal_states, exp_sketch.get_features(),
+                            instance.alive_states) + '\n' \
         + rules_to_smv(exp_sketch) + '\n'
@@ -1,4 +1,5 @@
 from .tarski import load_instance, load_domain
+from .parsed import parse_instance, ParsedInstance
 from .dlplan import DLFeature
 from .conversions import dlinstance_from_tarski # , tarski_to_dl_system
 from .types import *
@@ -0,0 +1,155 @@
+# Questions about the structure of a transition graph that can be answered without model checking: which nodes can
+# reach or be reached from a set of nodes, the strongly connected components and the graph between them.
+# Sets of nodes are represented as numpy boolean masks over the nodes, such that they can be combined with &, | and ~.
+
+import numpy as np
+
+from .graph import CSRGraph, DirectedGraph
+
+
+def as_csr(graph: DirectedGraph | CSRGraph) -> CSRGraph:
+    """
+    :param graph: A transition graph
+    :return: The graph in compressed sparse row format
+    """
+    return graph if isinstance(graph, CSRGraph) else CSRGraph.from_adjacency(graph.adj)
+
+
+def node_mask(graph: DirectedGraph | CSRGraph, nodes) -> np.ndarray:
+    """
+    :param graph: A transition graph
+    :param nodes: The indices of nodes, or a boolean mask over the nodes
+    :return: A boolean mask over the nodes of the graph that is true for the given nodes
+    """
+    nodes = np.asarray(nodes)
+    if nodes.dtype == bool:
+        assert(len(nodes) == graph.size())
+        return nodes.copy()
+    mask = np.zeros(graph.size(), dtype=bool)
+    mask[nodes.astype(np.int64)] = True
+    return mask
+
+
+def reverse(graph: DirectedGraph | CSRGraph) -> CSRGraph:
+    """
+    :param graph: A transition graph
+    :return: The graph with every edge reversed, the edges keep their label
+    """
+    graph = as_csr(graph)
+    src, dst, labels = graph.edges()
+    order = np.lexsort((src, dst))
+    indptr = np.zeros(graph.size() + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dst, minlength=graph.size()), out=indptr[1:])
+    return CSRGraph(indptr, src[order], labels[order], graph.label_names)
+
+
+def successors(graph: CSRGraph, mask: np.ndarray) -> np.ndarray:
+    """
+    :param graph: A transition graph
+    :param mask: A boolean mask over the nodes
+    :return: A boolean mask of the nodes that have an edge from one of the nodes of the given mask
+    """
+    starts, ends = graph.indptr[:-1][mask], graph.indptr[1:][mask]
+    counts = ends - starts
+    # the positions of all edges of the nodes in the mask, without a python loop over the nodes
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    edges = offsets + np.arange(counts.sum())
+    result = np.zeros(graph.size(), dtype=bool)
+    result[graph.indices[edges]] = True
+    return result
+
+
+def reachable(graph: DirectedGraph | CSRGraph, nodes) -> np.ndarray:
+    """
+    Compute the nodes reachable from a set of nodes with a breadth-first search in which each layer is one vectorized step
+    :param graph: A transition graph
+    :param nodes: The indices of the start nodes, or a boolean mask over the nodes
+    :return: A boolean mask of the nodes that can be reached from the start nodes, including the start nodes
+    """
+    graph = as_csr(graph)
+    seen = node_mask(graph, nodes)
+    frontier = seen.copy()
+    while frontier.any():
+        frontier = successors(graph, frontier) & ~seen
+        seen |= frontier
+    return seen
+
+
+def backward_reachable(graph: DirectedGraph | CSRGraph, nodes) -> np.ndarray:
+    """
+    :param graph: A transition graph
+    :param nodes: The indices of the target nodes, or a boolean mask over the nodes
+    :return: A boolean mask of the nodes from which one of the target nodes can be reached, including the target nodes
+    """
+    return reachable(reverse(graph), nodes)
+
+
+def strongly_connected_components(graph: DirectedGraph | CSRGraph) -> np.ndarray:
+    """
+    Decompose the graph into strongly connected components with an iterative version of Tarjan's algorithm
+    :param graph: A transition graph
+    :return: For each node the index of its component. The components are numbered in topological order: every edge
+             between two different components goes to the component with the larger index.
+    """
+    graph = as_csr(graph)
+    bounds, indices = graph.indptr.tolist(), graph.indices.tolist()
+    size = graph.size()
+    index = [-1] * size         # the order in which the nodes are visited
+    low = [0] * size            # the smallest index of a node on the stack that can be reached from the node
+    on_stack = [False] * size
+    stack = list[int]()
+    component = [-1] * size
+    count = 0
+    counter = 0
+
+    for root in range(size):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, bounds[root])]   # the nodes of the depth-first search and the next edge to follow from them
+        while work:
+            v, e = work[-1]
+            if e < bounds[v + 1]:
+                work[-1] = (v, e + 1)
+                w = indices[e]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, bounds[w]))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = count
+                    if w == v:
+                        break
+                count += 1
+    # Tarjan's algorithm finds the components in reverse topological order
+    return count - 1 - np.array(component, dtype=np.int64)
+
+
+def condensation(graph: DirectedGraph | CSRGraph, components: np.ndarray) -> CSRGraph:
+    """
+    :param graph: A transition graph
+    :param components: The components of the nodes as computed by strongly_connected_components
+    :return: The acyclic graph with a node for each component, and an edge between two different components if there is
+             an edge between their nodes. The edge has the label of one of these edges.
+    """
+    graph = as_csr(graph)
+    src, dst, labels = graph.edges()
+    src, dst = components[src], components[dst]
+    between = src != dst
+    return CSRGraph.from_edges(int(components.max(initial=-1)) + 1, src[between], dst[between],
+                               [graph.label_names[l] for l in labels[between].tolist()])
@@ -0,0 +1,57 @@
+# Save the data of a running state-space exploration to disk at regular times, such that a long exploration that is
+# interrupted can be resumed instead of started over.
+
+import os
+import pickle
+from time import monotonic
+from typing import Optional
+
+
+class Checkpoint:
+    """
+    A file to which an exploration periodically saves its data. The file is replaced atomically, such that it always
+    contains a complete checkpoint, also when the process is killed while saving.
+    """
+    path: str
+    interval: float
+
+    def __init__(self, path: str, interval: float):
+        """
+        :param path: The file in which the checkpoint is saved
+        :param interval: The minimal number of seconds between two checkpoints
+        """
+        self.path = path
+        self.interval = interval
+        self.last = monotonic()
+
+    def due(self) -> bool:
+        """
+        :return: True if the last checkpoint is older than the interval
+        """
+        return monotonic() - self.last >= self.interval
+
+    def save(self, data: dict) -> None:
+        """
+        Write the data to the checkpoint file, replacing the previous checkpoint
+        :param data: The data of the exploration, which needs to be picklable
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self.last = monotonic()
+
+    def load(self) -> Optional[dict]:
+        """
+        :return: The data of the latest checkpoint, or None if there is no checkpoint
+        """
+        if not os.path.isfile(self.path):
+            return None
+        with open(self.path, "rb") as file:
+            return pickle.load(file)
+
+    def remove(self) -> None:
+        """ Remove the checkpoint file, e.g. when the exploration is finished."""
+        if os.path.isfile(self.path):
+            os.remove(self.path)
@@ -4,7 +4,7 @@
 import dlplan
 import tarski.fstrips
 
-from .tarski_manipulation import sort_constants, typed_permutations
+from .parsed import ParsedInstance
 from .types import *
 
 
@@ -36,35 +36,40 @@ def dlinstance_from_tarski(domain: tarski.fstrips.Problem,
     the DLPlan library
     :param domain: A Tarski problem which was constructed by parsing a domain file
     :param instance: A Tarski problem which was constructed by parsing both a domain file and an instance of that domain
-    :return: A DLPlan instance
+    :return: A DLPlan instance. The atoms of static predicates that are true in the initial state are added as static
+             atoms, such that they hold in every dlplan state without being part of the states themselves.
     """
-    v: dlplan.core.VocabularyInfo = dlvocab_from_tarski(domain.language)
-    i = dlplan.core.InstanceInfo(v)
-    d: dict[TSort, list[TConstant]] = sort_constants(instance.language)
-    goal = instance.goal
+    return dlinstance_from_parsed(ParsedInstance.from_tarski(domain, instance))
 
-    for p in domain.language.predicates:
-        if isinstance(p.name, str):     # a tarski language contains some non-string predicates that are not used in the dlplan instances
-            if not p.sort:
-                i.add_atom(p.name, [])
-            else:
-                # TODO delete the on(b1, b1)
-                combs: list[tuple[TConstant]] = typed_permutations(p.sort, d)
-                for c in combs:
-                    i.add_atom(p.name, [obj.name for obj in c])
 
-    def add_goal(g):
-        match g:
-            case tarski.syntax.Atom():
-                i.add_static_atom(g.predicate.name + '_g', [a.name for a in g.subterms])
-            case tarski.syntax.CompoundFormula():
-                match g.connective:
-                    case tarski.syntax.Connective.And:
-                        for s in g.subformulas: add_goal(s)
-                    case _:
-                        raise NotImplementedError(g.connective)
-            case _:
-                raise NotImplementedError
+def dlvocab_from_parsed(parsed: ParsedInstance, add_goals=True) -> dlplan.core.VocabularyInfo:
+    """
+    Construct the vocabulary info of the domain of a parsed instance, as dlvocab_from_tarski
+    :param parsed: An instance read with parse_instance
+    :param add_goals: if true, for each predicate "p" an extra goal predicate "p_g" is added, see dlvocab_from_tarski
+    :return: Vocabulary Info which contains all domain predicates
+    """
+    v = dlplan.core.VocabularyInfo()
+    for name, arity in parsed.predicates:
+        v.add_predicate(name, arity, False)
+        if add_goals:
+            v.add_predicate(name + '_g', arity, True)
+    for c in parsed.constants:
+        v.add_constant(c)
+    return v
+
 
-    add_goal(goal)
+def dlinstance_from_parsed(parsed: ParsedInstance) -> dlplan.core.InstanceInfo:
+    """
+    Translate a parsed instance into an instance represented in the DLPlan library, without parsing its PDDL files
+    :param parsed: An instance read with parse_instance
+    :return: A DLPlan instance, see dlinstance_from_tarski
+    """
+    i = dlplan.core.InstanceInfo(dlvocab_from_parsed(parsed))
+    for name, args in parsed.atoms:
+        i.add_atom(name, args)
+    for name, args in parsed.static_atoms:
+        i.add_static_atom(name, args)
+    for name, args in parsed.goal:
+        i.add_static_atom(name + '_g', args)
     return i
@@ -1,7 +1,11 @@
 import dlplan
 from dlplan.core import State as DLState
-from typing import Union
+from typing import Iterable, Optional, Union
 
+import numpy as np
+
+from src.transition_system.state_store import StateStore
+from src.transition_system.symmetry import Permutation, permute_state
 from src.transition_system.transition_system import StateStr
 
 DLFeature = Union[dlplan.core.Boolean, dlplan.core.Numerical]
@@ -27,16 +31,117 @@ def eval_features(features: list[DLFeature], states: list[DLState]) -> dict[DLFe
     return {f: {s: f.evaluate(s) for s in states} for f in features}
 
 
-def dlstate_from_state(state: StateStr, instance: dlplan.core.InstanceInfo) -> DLState:
+def eval_features_cached(features: list[DLFeature], states: list[DLState],
+                         chunk: int = 10_000) -> list[list[Union[bool, int]]]:
+    """
+    Calculate the values of features in states with shared denotation caches. Features that were parsed by the same
+    factory share their sub-concepts and sub-roles, e.g. c_primitive(clear,0), so the denotations of each distinct
+    sub-element are only computed once instead of once per feature. Each feature is evaluated on a chunk of states at
+    once, and a new cache is used for each chunk, which bounds its memory.
+    :param features: Features parsed by one SyntacticElementFactory
+    :param states: States of one instance with distinct indices, as made by dlstates_from_store
+    :param chunk: The number of states that share a cache
+    :return: For each feature its value in each state
+    """
+    values = [list[Union[bool, int]]() for _ in features]
+    for start in range(0, len(states), chunk):
+        caches = dlplan.core.DenotationsCaches()
+        part = states[start:start + chunk]
+        for feature_values, f in zip(values, features):
+            feature_values += f.evaluate(part, caches)
+    return values
+
+
+def static_atom_names(instance: dlplan.core.InstanceInfo) -> frozenset[str]:
+    """
+    :param instance: DLPlan instance info
+    :return: The names of the static atoms of the instance
+    """
+    return frozenset(a.get_name() for a in instance.get_static_atoms())
+
+
+def dlstate_from_state(state: StateStr, instance: dlplan.core.InstanceInfo,
+                       static: Optional[frozenset[str]] = None) -> DLState:
     """
     Translate a state represented as a string into a DLPlan State object
-    :param state: A state represented as a set of strings in which each string is a predicate
+    :param state: A state represented as a set of strings in which each string is a predicate. Atoms of static
+                  predicates are skipped, the instance already contains them as static atoms.
     :param instance: DLPlan instance info which contains all predicates of the instance
+    :param static: The names of the static atoms of the instance as given by static_atom_names. Pass them when many
+                   states of the same instance are translated, otherwise they are looked up for each state.
     :return: The same state as a DLPlan State object
     """
-    return dlplan.core.State(instance, [instance.get_atom(atom) for atom in state])
+    if static is None:
+        static = static_atom_names(instance)
+    return dlplan.core.State(instance, [instance.get_atom(atom) for atom in state if atom not in static])
+
+
+def atom_index(atoms: list[str], instance: dlplan.core.InstanceInfo) -> list[dlplan.core.Atom]:
+    """
+    Look up the DLPlan atoms of a list of atom names once, such that states can be translated without a lookup per atom
+    :param atoms: Names of atoms, e.g. the atoms of a state store
+    :param instance: DLPlan instance info which contains all predicates of the instance
+    :return: For each name the DLPlan atom with that name
+    """
+    by_name = {a.get_name(): a for a in instance.get_atoms()}
+    return [by_name[a] for a in atoms]
+
 
+def dlstates_from_rows(rows: np.ndarray, atoms: list[dlplan.core.Atom], instance: dlplan.core.InstanceInfo,
+                       first_index: int = 0) -> list[DLState]:
+    """
+    Translate bit-packed states into DLPlan State objects
+    :param rows: A matrix of bit-packed states with one row per state, as the rows of a StateStore
+    :param atoms: For each bit of a row the DLPlan atom, as computed by atom_index
+    :param instance: DLPlan instance info which contains all predicates of the instance
+    :param first_index: The index of the state of the first row, the next rows get the next indices. DLPlan caches the
+                        denotations of a state by its index, see eval_features_cached.
+    :return: The states as DLPlan State objects, in the order of the rows
+    """
+    bits = np.unpackbits(np.asarray(rows), axis=1, count=len(atoms), bitorder='little')
+    row, column = np.nonzero(bits)      # sorted by row
+    bounds = np.searchsorted(row, np.arange(len(rows) + 1)).tolist()
+    lookup = np.empty(len(atoms), dtype=object)
+    lookup[:] = atoms
+    true_atoms = lookup[column].tolist()
+    return [dlplan.core.State(instance, true_atoms[bounds[i]:bounds[i + 1]], first_index + i) for i in range(len(rows))]
 
 
+def dlstates_from_store(states: StateStore, instance: dlplan.core.InstanceInfo, chunk: int = 10_000) -> list[DLState]:
+    """
+    Translate all states of a state store into DLPlan State objects, as dlstate_from_state but in bulk: the DLPlan
+    atom of every atom of the store is looked up once, and the rows are unpacked per chunk of states
+    :param states: A state store, its static atoms are not part of the DLPlan states since the instance contains them
+    :param instance: DLPlan instance info which contains all predicates of the instance
+    :param chunk: The number of states that are unpacked at once
+    :return: The states as DLPlan State objects, in the order of the state store. The index of each state is its index
+             in the state store.
+    """
+    atoms = atom_index(states.atoms, instance)
+    rows = states.rows
+    dlstates = list[DLState]()
+    for start in range(0, len(rows), chunk):
+        dlstates += dlstates_from_rows(rows[start:start + chunk], atoms, instance, start)
+    return dlstates
 
 
+def non_invariant_features(features: list[DLFeature], states: Iterable[StateStr], instance: dlplan.core.InstanceInfo,
+                           permutations: list[Permutation]) -> list[DLFeature]:
+    """
+    Check which features can have different values in states that are equal up to a permutation of objects. Only
+    features that are invariant can be used on a symmetry-reduced transition system, since a state of such a system
+    represents all its permutations.
+    :param features: The features to check
+    :param states: The states of a symmetry-reduced transition system
+    :param instance: DLPlan instance info which contains all predicates of the instance
+    :param permutations: Permutations of objects that generate the permutations that were used to reduce the transition
+                         system, e.g. class_transpositions of the object classes
+    :return: The features that have a different value in a permutation of one of the states
+    """
+    remaining = list(features)
+    static = static_atom_names(instance)
+    for state in states:
+        dlstate = dlstate_from_state(state, instance, static)
+        permuted = [dlstate_from_state(permute_state(state, p), instance, static) for p in permutations]
+        remaining = [f for f in remaining if all(f.evaluate(p) == f.evaluate(dlstate) for p in permuted)]
+    return [f for f in features if f not in remaining]
@@ -0,0 +1,89 @@
+# Explore the reachable state space of an instance, independent of how states and their successors are represented
+
+from typing import Callable, Iterable, Optional, TypeVar
+
+import numpy as np
+
+from .checkpoint import Checkpoint
+from .graph import CSRGraph
+from .state_store import StateStore
+
+S = TypeVar('S')    # the representation of a state used to compute its successors
+
+
+class StateSpaceTooLarge(Exception):
+    """Raised when an instance has more reachable states than the maximum number of states that may be explored"""
+    def __init__(self, max_states: int):
+        super().__init__(f"the instance has more than {max_states} reachable states")
+        self.max_states = max_states
+
+
+def explore(init: S, expand: Callable[[S], Iterable[tuple[str, S]]], encode: Callable[[S], np.ndarray],
+            states: StateStore, max_states: Optional[int] = None,
+            checkpoint: Optional[Checkpoint] = None) -> CSRGraph:
+    """
+    Construct the graph of all states reachable from an initial state with a depth-first search. Nodes are numbered in
+    the order in which their states are first generated, and states are interned by their encoding in the state store.
+    :param init: The initial state
+    :param expand: Function that returns for a state all pairs (edge label, successor state), in a fixed order
+    :param encode: Function that represents a state as a row of the state store
+    :param states: An empty state store, after the exploration it contains the state of each node in the graph
+    :param max_states: If given, a StateSpaceTooLarge exception is raised as soon as more states are reached
+    :param checkpoint: If given, the search data is saved to the checkpoint regularly, and the search resumes from the
+                       checkpoint if it already exists. This requires the states of type S to be picklable, and the
+                       state store to contain the same atoms as when the checkpoint was made. The checkpoint is removed
+                       when the search is done.
+    :return: The transition graph, in which dead-end states have a self-loop labeled "end"
+    """
+    todo: list[S] = [init]
+    checked: set[bytes] = set()
+    node_ids: dict[bytes, int] = dict()     # interning table from the packed bits of a state to its node index
+    # the edges are buffered, and the graph is built from them at once when the search is done
+    src, dst, labels = list[int](), list[int](), list[str]()
+
+    if checkpoint is not None and (saved := checkpoint.load()) is not None:
+        assert(saved["atoms"][:len(states.atoms)] == states.atoms and len(states) == 0)
+        todo, checked, node_ids = saved["todo"], saved["checked"], saved["node_ids"]
+        src, dst, labels = saved["src"], saved["dst"], saved["labels"]
+        states.add_atoms(saved["atoms"])
+        for row in saved["rows"]:
+            states.append(row)
+
+    def intern(row: np.ndarray) -> tuple[bytes, int]:
+        """Look up the node of a state, or add a new node if the state was not seen before"""
+        key = row.tobytes()
+        idx = node_ids.get(key)
+        if idx is None:
+            idx = len(node_ids)
+            if max_states is not None and idx >= max_states:
+                raise StateSpaceTooLarge(max_states)
+            node_ids[key] = idx
+            states.append(row)
+        return key, idx
+
+    while todo:
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save({"todo": todo, "checked": checked, "node_ids": node_ids, "src": src, "dst": dst,
+                             "labels": labels, "atoms": states.atoms, "rows": states.rows})
+        s = todo.pop()
+        s_key, idx_s = intern(encode(s))
+        checked.add(s_key)
+
+        has_nbr = False
+        for label, ns in expand(s):
+            has_nbr = True
+            ns_key, idx_ns = intern(encode(ns))
+            src.append(idx_s)
+            dst.append(idx_ns)
+            labels.append(label)
+            if ns_key not in checked:
+                todo.append(ns)
+        if not has_nbr:
+            # Add self-loop to all dead-end states such that there are only infinite path in the graph
+            src.append(idx_s)
+            dst.append(idx_s)
+            labels.append("end")
+
+    if checkpoint is not None:
+        checkpoint.remove()
+    return CSRGraph.from_edges(len(node_ids), src, dst, labels)
@@ -0,0 +1,161 @@
+# Write transition graphs to files that can be inspected with external tools: Graphviz (DOT), GraphML (e.g. Gephi or
+# yEd) and plain edge lists. The files are written in chunks of nodes, such that large graphs never have to be turned
+# into one string in memory.
+
+import csv
+from typing import Optional, Sequence, TextIO, BinaryIO, Union
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from .analytics import as_csr
+from .graph import CSRGraph, DirectedGraph
+
+CHUNK = 10_000      # the number of nodes that are written at once
+
+Valuations = dict[str, Sequence[Union[bool, int]]]
+
+
+def _selected(graph: CSRGraph, mask: Optional[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: The nodes in the mask, and for each edge whether both its nodes are in the mask
+    """
+    if mask is None:
+        return np.arange(graph.size()), np.ones(len(graph.indices), dtype=bool)
+    mask = np.asarray(mask, dtype=bool)
+    assert(len(mask) == graph.size())
+    src, dst, _ = graph.edges()
+    return np.flatnonzero(mask), mask[src] & mask[dst]
+
+
+def _chunks(graph: CSRGraph, nodes: np.ndarray, edges: np.ndarray):
+    """
+    Split the selected nodes in chunks
+    :return: For each chunk the nodes, and the start nodes, end nodes and label ids of the selected edges of these nodes
+    """
+    for start in range(0, len(nodes), CHUNK):
+        chunk = nodes[start:start + CHUNK]
+        counts = graph.indptr[chunk + 1] - graph.indptr[chunk]
+        positions = np.repeat(graph.indptr[chunk] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        positions = positions[edges[positions]]
+        src = np.searchsorted(graph.indptr, positions, side='right') - 1
+        yield chunk.tolist(), src.tolist(), graph.indices[positions].tolist(), graph.labels[positions].tolist()
+
+
+def _dot_string(value) -> str:
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def write_dot(graph: DirectedGraph | CSRGraph, file: TextIO, state_labels: Optional[Sequence] = None,
+              valuations: Optional[Valuations] = None, mask: Optional[np.ndarray] = None,
+              edge_labels: bool = True) -> None:
+    """
+    Write a graph in the DOT format of Graphviz
+    :param graph: A transition graph
+    :param file: A file opened for writing text
+    :param state_labels: Optional a label for each node, e.g. the states of a transition system
+    :param valuations: Optional for each feature its value in each node, the values are written as node attributes
+    :param mask: Optional a boolean mask of the nodes to write, only edges between these nodes are written
+    :param edge_labels: If true, the edges are labeled, e.g. with the actions of the transitions
+    """
+    graph = as_csr(graph)
+    nodes, edges = _selected(graph, mask)
+    valuations = valuations or dict()
+    file.write("digraph {\n")
+    for chunk, src, dst, labels in _chunks(graph, nodes, edges):
+        lines = list[str]()
+        for i in chunk:
+            attributes = [f"label={_dot_string(state_labels[i])}"] if state_labels is not None else []
+            attributes += [f"{_dot_string(f)}={_dot_string(vals[i])}" for f, vals in valuations.items()]
+            lines.append(f"  {i} [{', '.join(attributes)}];\n" if attributes else f"  {i};\n")
+        for i, j, l in zip(src, dst, labels):
+            lines.append(f"  {i} -> {j} [label={_dot_string(graph.label_names[l])}];\n" if edge_labels
+                         else f"  {i} -> {j};\n")
+        file.write("".join(lines))
+    file.write("}\n")
+
+
+def write_graphml(graph: DirectedGraph | CSRGraph, file: TextIO, state_labels: Optional[Sequence] = None,
+                  valuations: Optional[Valuations] = None, mask: Optional[np.ndarray] = None) -> None:
+    """
+    Write a graph in the GraphML format, with the labels of the edges as edge data
+    :param graph: A transition graph
+    :param file: A file opened for writing text
+    :param state_labels: Optional a label for each node, e.g. the states of a transition system
+    :param valuations: Optional for each feature its value in each node, the values are written as node data
+    :param mask: Optional a boolean mask of the nodes to write, only edges between these nodes are written
+    """
+    graph = as_csr(graph)
+    nodes, edges = _selected(graph, mask)
+    valuations = valuations or dict()
+    keys = {f: f"f{k}" for k, f in enumerate(valuations)}
+    file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+               '  <key id="label" for="all" attr.name="label" attr.type="string"/>\n')
+    for f, vals in valuations.items():
+        kind = "boolean" if len(vals) and isinstance(vals[0], (bool, np.bool_)) else "long"
+        file.write(f'  <key id="{keys[f]}" for="node" attr.name={quoteattr(f)} attr.type="{kind}"/>\n')
+    file.write('  <graph edgedefault="directed">\n')
+    for chunk, src, dst, labels in _chunks(graph, nodes, edges):
+        lines = list[str]()
+        for i in chunk:
+            data = [f'<data key="label">{escape(str(state_labels[i]))}</data>'] if state_labels is not None else []
+            data += [f'<data key="{keys[f]}">{str(vals[i]).lower()}</data>' for f, vals in valuations.items()]
+            lines.append(f'    <node id="n{i}">{"".join(data)}</node>\n')
+        for i, j, l in zip(src, dst, labels):
+            lines.append(f'    <edge source="n{i}" target="n{j}"><data key="label">'
+                         f'{escape(str(graph.label_names[l]))}</data></edge>\n')
+        file.write("".join(lines))
+    file.write('  </graph>\n</graphml>\n')
+
+
+def write_edge_list(graph: DirectedGraph | CSRGraph, file: TextIO, mask: Optional[np.ndarray] = None) -> None:
+    """
+    Write the edges of a graph as CSV with a header and the columns source, target and label
+    :param graph: A transition graph
+    :param file: A file opened for writing text, with newline=''
+    :param mask: Optional a boolean mask of the nodes, only edges between these nodes are written
+    """
+    graph = as_csr(graph)
+    nodes, edges = _selected(graph, mask)
+    writer = csv.writer(file)
+    writer.writerow(["source", "target", "label"])
+    for _, src, dst, labels in _chunks(graph, nodes, edges):
+        writer.writerows(zip(src, dst, (graph.label_names[l] for l in labels)))
+
+
+def write_node_table(file: TextIO, size: int, state_labels: Optional[Sequence] = None,
+                     valuations: Optional[Valuations] = None, mask: Optional[np.ndarray] = None) -> None:
+    """
+    Write the labels and feature valuations of the nodes of a graph as CSV, to go with an edge list
+    :param file: A file opened for writing text, with newline=''
+    :param size: The number of nodes of the graph
+    :param state_labels: Optional a label for each node, e.g. the states of a transition system
+    :param valuations: Optional for each feature its value in each node
+    :param mask: Optional a boolean mask of the nodes to write
+    """
+    valuations = valuations or dict()
+    writer = csv.writer(file)
+    writer.writerow(["node"] + (["label"] if state_labels is not None else []) + list(valuations))
+    nodes = np.arange(size) if mask is None else np.flatnonzero(mask)
+    for start in range(0, len(nodes), CHUNK):
+        writer.writerows([i] + ([str(state_labels[i])] if state_labels is not None else []) +
+                         [vals[i] for vals in valuations.values()] for i in nodes[start:start + CHUNK].tolist())
+
+
+def write_binary_edges(graph: DirectedGraph | CSRGraph, file: BinaryIO, mask: Optional[np.ndarray] = None) -> None:
+    """
+    Write the edges of a graph as a binary int64 array with one row (source, target, label id) per edge, in the .npy
+    format such that it can be read with np.load. The label ids refer to graph.label_names. The header is written for
+    the number of edges first, then the rows are written in chunks.
+    :param graph: A transition graph
+    :param file: A file opened for writing bytes
+    :param mask: Optional a boolean mask of the nodes, only edges between these nodes are written
+    """
+    graph = as_csr(graph)
+    nodes, edges = _selected(graph, mask)
+    dtype = np.dtype('<i8')
+    np.lib.format.write_array_header_1_0(file, {"descr": dtype.str, "fortran_order": False,
+                                                "shape": (int(np.count_nonzero(edges)), 3)})
+    for _, src, dst, labels in _chunks(graph, nodes, edges):
+        file.write(np.array([src, dst, labels], dtype=dtype).T.tobytes())
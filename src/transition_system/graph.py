@@ -1,7 +1,11 @@
 # A representation of a directed, edge labeled graph.
 # Made with the help of Adam Vandervorst
 
+import gc
 from bisect import bisect_right
+from typing import Iterable, Optional
+
+import numpy as np
 
 EL = any
 
@@ -41,6 +45,17 @@ class DirectedGraph:
         assert(i < len(self.adj))
         return self.adj[i][0]
 
+    def predecessors(self) -> list[list[int]]:
+        """
+        Build the reverse adjacency index of the graph
+        :return: For each node, in increasing order, the nodes that have an edge to it
+        """
+        preds = [list[int]() for _ in range(self.size())]
+        for i, (ns, _) in enumerate(self.adj):
+            for j in ns:
+                preds[j].append(i)
+        return preds
+
     def add(self, i: int, j: int, l: EL) -> bool:
         """
         Add an edge between two nodes
@@ -65,12 +80,210 @@ class DirectedGraph:
         :param statelabels: Optional a label can be added for each state
         :return: Graphviz code as a string
         """
-        trans = ""
         if not statelabels:
             statelabels = [i for i in range(self.size())]
-        for n, (ts, ls) in enumerate(self.adj):
-            for t in ts:
-                trans = trans + f"{statelabels[n]} -> {statelabels[t]}; \n"
+        # joining the lines at once instead of adding them to a string one by one keeps this linear in the size of the
+        # graph, use the export module to write large graphs to a file
+        return "".join(f"{statelabels[n]} -> {statelabels[t]}; \n" for n, (ts, ls) in enumerate(self.adj) for t in ts)
+
+
+
+class CSRGraph:
+    """
+    Represent a directed, edge labeled graph in compressed sparse row format. The neighbours of node i are
+    indices[indptr[i]:indptr[i + 1]] in increasing order, and labels holds the label of each of these edges.
+    Edge labels are interned: labels holds for each edge a small integer id, and label_names the label of each id, such
+    that a label that occurs on many edges, e.g. "end", is stored only once.
+    A CSRGraph is built at once from a list of edges and cannot be changed afterwards, but it can be used wherever a
+    DirectedGraph is read: it has the same size and nbs methods, and the same adjacency lists (adj).
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+    labels: np.ndarray
+    label_names: list[EL]
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, labels: np.ndarray, label_names: list[EL]):
+        assert(len(indices) == len(labels) == indptr[-1])
+        self.indptr = indptr
+        self.indices = indices
+        self.labels = labels
+        self.label_names = label_names
+        self._adj: Optional[list[tuple[list[int], list[EL]]]] = None
+        self._id_adj: Optional[list[tuple[list[int], list[int]]]] = None
+
+    @classmethod
+    def from_edges(cls, size: int, src: Iterable[int], dst: Iterable[int], labels: Iterable[EL],
+                   label_names: Optional[list[EL]] = None) -> 'CSRGraph':
+        """
+        Build a graph from a buffer of edges with one sort. If an edge occurs more than once, the label of its first
+        occurrence is kept, like DirectedGraph.add does.
+        :param size: The number of nodes
+        :param src: For each edge the node it starts from
+        :param dst: For each edge the node it goes to
+        :param labels: For each edge its label
+        :param label_names: The labels of a graph to which the edges will be added, new labels get the next ids
+        :return: The graph with the given edges
+        """
+        label_names = list(label_names or [])
+        label_ids = {l: i for i, l in enumerate(label_names)}
+        src = np.fromiter(src, dtype=np.int64)
+        dst = np.fromiter(dst, dtype=np.int64)
+        labels = np.fromiter((label_ids.setdefault(l, len(label_ids)) for l in labels), dtype=np.int32, count=len(src))
+        label_names.extend(list(label_ids)[len(label_names):])
+        return cls.from_edge_ids(size, src, dst, labels, label_names)
+
+    @classmethod
+    def from_edge_ids(cls, size: int, src: np.ndarray, dst: np.ndarray, labels: np.ndarray,
+                      label_names: list[EL]) -> 'CSRGraph':
+        """
+        Build a graph from arrays of edges in which the labels are already interned, as from_edges
+        :param size: The number of nodes
+        :param src: For each edge the node it starts from
+        :param dst: For each edge the node it goes to
+        :param labels: For each edge the id of its label
+        :param label_names: The label of each id
+        :return: The graph with the given edges
+        """
+        src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+        labels = np.asarray(labels, dtype=np.int32)
+        order = np.lexsort((dst, src))      # lexsort is stable, so duplicates stay in the order they were added
+        src, dst, labels = src[order], dst[order], labels[order]
+        first = np.ones(len(src), dtype=bool)
+        first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, labels = src[first], dst[first], labels[first]
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=size), out=indptr[1:])
+        return cls(indptr, dst, labels, label_names)
+
+    @classmethod
+    def from_adjacency(cls, adjacency_graph: list[list[int], list], label_names: Optional[list[EL]] = None) -> 'CSRGraph':
+        """
+        Build a graph from adjacency lists, e.g. DirectedGraph.adj or the adjacency lists of a cached transition system,
+        in which the neighbours of each node are already sorted and unique. The lists are not kept, adj is built again
+        from the arrays when it is needed.
+        :param adjacency_graph: For each node the list of its neighbours and the list of the labels of the edges to them
+        :param label_names: If given, the adjacency lists contain label ids instead of labels, as made by id_adj
+        :return: The graph with the given adjacency lists
+        """
+        indptr = np.zeros(len(adjacency_graph) + 1, dtype=np.int64)
+        np.cumsum([len(ns) for ns, _ in adjacency_graph], out=indptr[1:])
+        indices = np.fromiter((j for ns, _ in adjacency_graph for j in ns), dtype=np.int64, count=indptr[-1])
+        if label_names is None:
+            label_ids = dict()
+            labels = np.fromiter((label_ids.setdefault(l, len(label_ids)) for _, ls in adjacency_graph for l in ls),
+                                 dtype=np.int32, count=indptr[-1])
+            return cls(indptr, indices, labels, list(label_ids))
+        labels = np.fromiter((l for _, ls in adjacency_graph for l in ls), dtype=np.int32, count=indptr[-1])
+        return cls(indptr, indices, labels, list(label_names))
+
+    def edges(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: The start nodes, end nodes and label ids of all edges, sorted by start and end node
+        """
+        return np.repeat(np.arange(self.size(), dtype=np.int64), np.diff(self.indptr)), self.indices, self.labels
 
-        return trans
+    def with_edges(self, src: Iterable[int], dst: Iterable[int], labels: Iterable[EL]) -> 'CSRGraph':
+        """
+        Merge edges into the graph without sorting the existing edges again.
+        :param src: For each new edge the node it starts from
+        :param dst: For each new edge the node it goes to
+        :param labels: For each new edge its label
+        :return: A new graph with the edges of this graph and the given edges. Edges that already exist keep their label.
+        """
+        new = CSRGraph.from_edges(self.size(), src, dst, labels, self.label_names)
+        if len(self.indices) == 0:
+            return new
+        new_src, new_dst, new_labels = new.edges()
+        # the keys src * size + dst of the edges of a graph are sorted, so the position of each new edge is a search away
+        size = self.size()
+        old_keys = self.edges()[0] * size + self.indices
+        new_keys = new_src * size + new_dst
+        pos = np.searchsorted(old_keys, new_keys)
+        fresh = (pos == len(old_keys)) | (old_keys[np.minimum(pos, len(old_keys) - 1)] != new_keys)
+        pos, new_src = pos[fresh], new_src[fresh]
+        indptr = self.indptr.copy()
+        indptr[1:] += np.cumsum(np.bincount(new_src, minlength=size))
+        return CSRGraph(indptr, np.insert(self.indices, pos, new_dst[fresh]),
+                        np.insert(self.labels, pos, new_labels[fresh]), new.label_names)
 
+    def size(self) -> int:
+        """
+        :return: the number of nodes the graph has
+        """
+        return len(self.indptr) - 1
+
+    def nbs(self, i: int) -> list[int]:
+        """
+        :param i: Node index
+        :return: All neighbours of node i
+        """
+        rows = self._adj if self._adj is not None else self._id_adj
+        if rows is not None:
+            assert(i < len(rows))
+            return rows[i][0]
+        assert(i < self.size())
+        # only the slice is converted, such that memory-mapped arrays are not copied into lists, e.g. in every worker
+        # process that converts a graph of the registry with graph_to_smv
+        return self.indices[self.indptr[i]:self.indptr[i + 1]].tolist()
+
+    def edge_labels(self, i: int) -> list[EL]:
+        """
+        :param i: Node index
+        :return: The labels of the edges from node i to its neighbours, in the order of nbs(i)
+        """
+        assert(i < self.size())
+        return [self.label_names[l] for l in self.labels[self.indptr[i]:self.indptr[i + 1]].tolist()]
+
+    @property
+    def adj(self) -> list[tuple[list[int], list[EL]]]:
+        """
+        :return: For each node the list of its neighbours and the list of the labels of the edges to them, as in
+                 DirectedGraph. The lists are built the first time they are needed.
+        """
+        if self._adj is None:
+            self._adj = self._adjacency(np.array(self.label_names + [None], dtype=object)[:-1][self.labels])
+        return self._adj
+
+    def id_adj(self) -> list[tuple[list[int], list[int]]]:
+        """
+        :return: For each node the list of its neighbours and the list of the ids of the labels of the edges to them
+        """
+        if self._id_adj is None:
+            self._id_adj = self._adjacency(self.labels)
+        return self._id_adj
+
+    def _adjacency(self, labels: np.ndarray) -> list[tuple[list[int], list]]:
+        """ Split the neighbours and the given edge labels into a pair of lists per node."""
+        indices = self.indices.tolist()
+        labels = labels.tolist()
+        bounds = self.indptr.tolist()
+        # the garbage collector would otherwise run many times while the millions of lists are made, without finding
+        # anything to collect
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [(indices[s:e], labels[s:e]) for s, e in zip(bounds, bounds[1:])]
+        finally:
+            if enabled:
+                gc.enable()
+
+    def predecessors(self) -> list[list[int]]:
+        """
+        Build the reverse adjacency index of the graph
+        :return: For each node, in increasing order, the nodes that have an edge to it
+        """
+        src, dst, _ = self.edges()
+        order = np.argsort(dst, kind='stable')
+        bounds = np.zeros(self.size() + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=self.size()), out=bounds[1:])
+        preds = src[order].tolist()
+        bounds = bounds.tolist()
+        return [preds[s:e] for s, e in zip(bounds, bounds[1:])]
+
+    def show(self, statelabels=None) -> str:
+        """
+        Generate the graphviz code of the graph which can be used to make an image of the graph.
+        :param statelabels: Optional a label can be added for each state
+        :return: Graphviz code as a string
+        """
+        return DirectedGraph.show(self, statelabels)
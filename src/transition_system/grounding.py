@@ -0,0 +1,176 @@
+# Ground only the actions that can become applicable, using reachability in the delete relaxation of an instance.
+# There are no representations from other libraries than tarski used in this file.
+
+import itertools
+from typing import Iterator, Optional, Union
+
+import tarski.syntax
+from tarski.fstrips import AddEffect, DelEffect
+from tarski.syntax.transform.action_grounding import ground_schema
+
+from .tarski_manipulation import is_admissible
+from .types import *
+
+Fact = tuple[str, tuple[str, ...]]      # a ground atom as the name of its predicate and the names of its arguments
+Pattern = tuple[str, tuple[Union[int, str], ...]]   # an atom of a schema, variables are replaced by parameter positions
+Grounding = tuple[str, list[str]]       # a ground action as the name of its schema and the names of its arguments
+
+
+def atom_pattern(atom: tarski.syntax.Atom, params: list[str]) -> Optional[Pattern]:
+    """
+    :param atom: An atom of an action schema
+    :param params: The names of the parameters of the schema
+    :return: The atom as a pattern in which variables are replaced by the position of the parameter, or None if the atom
+             is a builtin (e.g. equality) or has other terms than variables and constants
+    """
+    if not isinstance(atom.predicate.name, str):
+        return None
+    terms = list()
+    for t in atom.subterms:
+        match t:
+            case tarski.syntax.Variable(): terms.append(params.index(t.symbol))
+            case tarski.syntax.Constant(): terms.append(t.name)
+            case _: return None
+    return atom.predicate.name, tuple(terms)
+
+
+def relaxed_preconditions(formula, params: list[str]) -> list[Pattern]:
+    """
+    Collect the positive atoms of a precondition that every applicable grounding needs to satisfy. All other parts of
+    the precondition are relaxed to true, which is an over-approximation.
+    :param formula: The precondition of an action schema
+    :param params: The names of the parameters of the schema
+    :return: The atoms as patterns
+    """
+    match formula:
+        case tarski.syntax.Atom():
+            pattern = atom_pattern(formula, params)
+            return [pattern] if pattern else []
+        case tarski.syntax.CompoundFormula(connective=tarski.syntax.Connective.And):
+            return [p for sub in formula.subformulas for p in relaxed_preconditions(sub, params)]
+        case _:
+            return []
+
+
+def relaxed_add_effects(schema: TAction, params: list[str]) -> Optional[list[Pattern]]:
+    """
+    :param schema: An action schema
+    :param params: The names of the parameters of the schema
+    :return: The atoms that the schema adds as patterns, effect conditions are relaxed to true. None if the schema has
+             effects that cannot be analysed, such as universal or functional effects.
+    """
+    adds = list()
+    for e in schema.effects:
+        match e:
+            case AddEffect():
+                pattern = atom_pattern(e.atom, params)
+                if pattern is None:
+                    return None
+                adds.append(pattern)
+            case DelEffect():
+                pass
+            case _:
+                return None
+    return adds
+
+
+def matches(pattern: Pattern, fact: Fact, binding: dict[int, str]) -> Optional[dict[int, str]]:
+    """
+    :return: The binding extended such that the pattern is equal to the fact, or None if that is not possible
+    """
+    name, terms = pattern
+    if name != fact[0] or len(terms) != len(fact[1]):
+        return None
+    extended = dict(binding)
+    for t, obj in zip(terms, fact[1]):
+        if isinstance(t, int):
+            if extended.setdefault(t, obj) != obj:
+                return None
+        elif t != obj:
+            return None
+    return extended
+
+
+def bindings(pre: list[Pattern], facts: dict[str, set[Fact]], binding: dict[int, str]) -> Iterator[dict[int, str]]:
+    """
+    Join the precondition patterns with the reachable facts
+    :param pre: The precondition patterns that still need to be matched
+    :param facts: The reachable facts per predicate
+    :param binding: The parameters that are bound so far
+    :return: All extensions of the binding that satisfy all patterns
+    """
+    if not pre:
+        yield binding
+        return
+    for fact in facts.get(pre[0][0], ()):
+        extended = matches(pre[0], fact, binding)
+        if extended is not None:
+            yield from bindings(pre[1:], facts, extended)
+
+
+def relevant_groundings(schemas: list[TAction], sorted_objects: dict[TSort, list[TConstant]],
+                        init: TModel) -> Optional[list[Grounding]]:
+    """
+    Compute the atoms that are reachable from the initial state when delete effects are ignored, and the ground actions
+    whose preconditions can be satisfied by those atoms. Every ground action that is applicable in a reachable state is
+    among them. As in get_ground_actions, combinations of objects that are not admissible are not used.
+    :param schemas: A list of action schemas
+    :param sorted_objects: A dictionary with types as keys and a list of objects of the key type as values
+    :param init: The initial state of the instance
+    :return: The ground actions in the same order as get_ground_actions, or None if the effects of a schema cannot be
+             analysed
+    """
+    analysed = list()
+    for schema in schemas:
+        params = [v.symbol for v in schema.parameters]
+        adds = relaxed_add_effects(schema, params)
+        if adds is None:
+            return None
+        objects = [[c.name for c in sorted_objects[v.sort]] for v in schema.parameters]
+        analysed.append((schema, relaxed_preconditions(schema.precondition, params), adds, objects))
+
+    facts: dict[str, set[Fact]] = dict()
+    for a in init.as_atoms():
+        facts.setdefault(a.predicate.name, set()).add((a.predicate.name, tuple(t.name for t in a.subterms)))
+    found: list[set[tuple[str, ...]]] = [set() for _ in schemas]
+
+    changed = True
+    while changed:
+        changed = False
+        new_facts = list[Fact]()
+        for k, (schema, pre, adds, objects) in enumerate(analysed):
+            if not objects:     # like typed_permutations, schemas without parameters are not grounded
+                continue
+            allowed = [set(objs) for objs in objects]
+            for binding in list(bindings(pre, facts, dict())):
+                if any(binding[i] not in allowed[i] for i in binding):
+                    continue
+                free = [i for i in range(len(objects)) if i not in binding]
+                for rest in itertools.product(*[objects[i] for i in free]):
+                    binding.update(zip(free, rest))
+                    args = tuple(binding[i] for i in range(len(objects)))
+                    if args in found[k] or not is_admissible(list(args)):
+                        continue
+                    found[k].add(args)
+                    for name, terms in adds:
+                        new_facts.append((name, tuple(binding[t] if isinstance(t, int) else t for t in terms)))
+        for fact in new_facts:
+            if fact not in facts.setdefault(fact[0], set()):
+                facts[fact[0]].add(fact)
+                changed = True
+
+    groundings = list[Grounding]()
+    for (schema, _, _, objects), args in zip(analysed, found):
+        position = [{o: i for i, o in enumerate(objs)} for objs in objects]
+        for a in sorted(args, key=lambda a: [position[i][o] for i, o in enumerate(a)]):
+            groundings.append((schema.name, list(a)))
+    return groundings
+
+
+def ground_actions_from(schemas: dict[str, TAction], groundings: list[Grounding]) -> list[TAction]:
+    """
+    :param schemas: The action schemas of an instance by name
+    :param groundings: Ground actions as schema names and arguments
+    :return: The ground actions as tarski actions
+    """
+    return [ground_schema(schemas[name], args) for name, args in groundings]
@@ -0,0 +1,120 @@
+# Explore the state space of an instance that does not fit in memory.
+# The closed set, the edges and the stack of states to expand are kept in an SQLite database on disk, of which only a
+# bounded number of pages is cached in memory. The graph and the states are only loaded into memory at the end, in
+# chunks straight into numpy arrays. Edge labels are interned, the edges table only holds integers.
+
+import os
+import sqlite3
+import tempfile
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from .exploration import StateSpaceTooLarge
+from .graph import CSRGraph
+from .state_store import StateStore
+
+BATCH = 10_000      # the number of edges that are written to or read from the database at once
+
+
+def explore_on_disk(init: np.ndarray, successors: Callable[[np.ndarray], Iterable[tuple[str, np.ndarray]]],
+                    states: StateStore, memory_budget: int, max_states: Optional[int] = None,
+                    directory: Optional[str] = None) -> CSRGraph:
+    """
+    Construct the graph of all states reachable from an initial state with the same depth-first search as explore, but
+    with the search data on disk. The result, including the numbering of the nodes, is the same as the result of explore.
+    :param init: The initial state encoded as a row of the state store
+    :param successors: Function that returns for an encoded state all pairs (edge label, encoded successor state), in a
+                       fixed order
+    :param states: An empty state store, after the exploration it contains the state of each node in the graph
+    :param memory_budget: The number of bytes SQLite may use to cache the database in memory
+    :param max_states: If given, a StateSpaceTooLarge exception is raised as soon as more states are reached
+    :param directory: The directory in which the database is made, by default a temporary directory. The database is
+                      removed afterwards.
+    :return: The transition graph, in which dead-end states have a self-loop labeled "end"
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "exploration.sqlite"))
+        try:
+            db.execute(f"PRAGMA cache_size = {-max(memory_budget // 1024, 1)}")    # negative values are in KiB
+            db.execute("PRAGMA journal_mode = OFF")
+            db.execute("PRAGMA synchronous = OFF")
+            db.execute("CREATE TABLE nodes (id INTEGER PRIMARY KEY, key BLOB UNIQUE NOT NULL, checked INTEGER NOT NULL)")
+            db.execute("CREATE TABLE edges (src INTEGER NOT NULL, dst INTEGER NOT NULL, label INTEGER NOT NULL)")
+            db.execute("CREATE TABLE todo (pos INTEGER PRIMARY KEY, key BLOB NOT NULL)")
+
+            size = 0
+            edges = list[tuple[int, int, int]]()
+            edge_count = 0
+            label_ids = dict[str, int]()
+
+            def intern(key: bytes) -> tuple[int, bool]:
+                """Look up the node of a state and whether it was expanded, or add a new node for an unseen state"""
+                nonlocal size
+                found = db.execute("SELECT id, checked FROM nodes WHERE key = ?", (key,)).fetchone()
+                if found is not None:
+                    return found[0], bool(found[1])
+                if max_states is not None and size >= max_states:
+                    raise StateSpaceTooLarge(max_states)
+                db.execute("INSERT INTO nodes VALUES (?, ?, 0)", (size, key))
+                size += 1
+                return size - 1, False
+
+            def push(key: bytes) -> None:
+                db.execute("INSERT INTO todo (key) VALUES (?)", (key,))
+
+            def pop() -> Optional[bytes]:
+                top = db.execute("SELECT pos, key FROM todo ORDER BY pos DESC LIMIT 1").fetchone()
+                if top is None:
+                    return None
+                db.execute("DELETE FROM todo WHERE pos = ?", (top[0],))
+                return top[1]
+
+            push(init.tobytes())
+            while (s_key := pop()) is not None:
+                idx_s, _ = intern(s_key)
+                db.execute("UPDATE nodes SET checked = 1 WHERE id = ?", (idx_s,))
+
+                has_nbr = False
+                for label, ns in successors(np.frombuffer(s_key, dtype=np.uint8)):
+                    has_nbr = True
+                    ns_key = ns.tobytes()
+                    idx_ns, checked = intern(ns_key)
+                    edges.append((idx_s, idx_ns, label_ids.setdefault(label, len(label_ids))))
+                    if not checked:
+                        push(ns_key)
+                if not has_nbr:
+                    # Add self-loop to all dead-end states such that there are only infinite path in the graph
+                    edges.append((idx_s, idx_s, label_ids.setdefault("end", len(label_ids))))
+                if len(edges) >= BATCH:
+                    db.executemany("INSERT INTO edges VALUES (?, ?, ?)", edges)
+                    edge_count += len(edges)
+                    edges.clear()
+            db.executemany("INSERT INTO edges VALUES (?, ?, ?)", edges)
+            edge_count += len(edges)
+            del edges
+
+            rows = np.empty((size, states.width()), dtype=np.uint8)
+            cursor = db.execute("SELECT key FROM nodes ORDER BY id")
+            start = 0
+            while chunk := cursor.fetchmany(BATCH):
+                rows[start:start + len(chunk)] = np.frombuffer(b"".join(key for key, in chunk),
+                                                               dtype=np.uint8).reshape(len(chunk), -1)
+                start += len(chunk)
+            states.extend(rows)
+            del rows
+
+            # building the graph from the edges in the order in which they were found keeps the first label of
+            # duplicate edges, as in explore
+            src, dst = np.empty(edge_count, dtype=np.int32), np.empty(edge_count, dtype=np.int32)
+            labels = np.empty(edge_count, dtype=np.int32)
+            cursor = db.execute("SELECT src, dst, label FROM edges ORDER BY rowid")
+            start = 0
+            while chunk := cursor.fetchmany(BATCH):
+                block = np.array(chunk, dtype=np.int32)
+                src[start:start + len(chunk)], dst[start:start + len(chunk)] = block[:, 0], block[:, 1]
+                labels[start:start + len(chunk)] = block[:, 2]
+                start += len(chunk)
+            return CSRGraph.from_edge_ids(size, src, dst, labels, list(label_ids))
+        finally:
+            db.close()
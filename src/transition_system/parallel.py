@@ -0,0 +1,259 @@
+# Explore the state space of an instance with several processes.
+# Each state is owned by one worker process, chosen by a hash of its packed bits. A worker keeps the interning table of
+# the states it owns and the edges that start in them. The search runs level by level: each worker expands its part of
+# the frontier and sends every successor to its owner, which adds the states it has not seen yet to the next frontier
+# and answers with their local numbers. The main process only synchronizes the levels. When the search is done, the
+# partitions are merged and the nodes are numbered in the order in which the depth-first search of explore generates
+# them, such that the graph and the states are the same as with a single process, e.g. in the caches.
+
+import zlib
+from multiprocessing import Pipe, Process, Queue, Value
+from multiprocessing.connection import Connection, wait
+from multiprocessing.sharedctypes import Synchronized
+from typing import Optional
+
+import numpy as np
+
+from .exploration import StateSpaceTooLarge
+from .graph import CSRGraph
+from .state_store import StateStore
+from .successors import CompiledActions
+
+
+def owner(key: bytes, processes: int) -> int:
+    """
+    :param key: The packed bits of a state
+    :param processes: The number of processes
+    :return: The process that owns the state. This does not depend on Python's randomized hash.
+    """
+    return zlib.crc32(key) % processes
+
+
+class Partition:
+    """
+    The states owned by one worker process and the edges that start in them
+    """
+    keys: list[bytes]           # the packed bits of each state, by local number
+    index: dict[bytes, int]     # interning table from the packed bits of a state to its local number
+    edges: list[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]  # per level: local start node, action, owner
+                                                                         # and local number of the end node
+    dead_ends: list[int]        # the states without successors
+
+    def __init__(self):
+        self.keys = list()
+        self.index = dict()
+        self.edges = list()
+        self.dead_ends = list()
+
+    def intern(self, key: bytes) -> tuple[int, bool]:
+        """
+        :return: The local number of a state, and whether the state is new
+        """
+        idx = self.index.get(key)
+        if idx is not None:
+            return idx, False
+        idx = len(self.keys)
+        self.index[key] = idx
+        self.keys.append(key)
+        return idx, True
+
+    def expand(self, frontier: list[int], actions: CompiledActions, processes: int) -> tuple[list[list[bytes]], tuple]:
+        """
+        Expand states of the partition
+        :param frontier: The local numbers of the states
+        :param actions: The compiled actions of the instance
+        :param processes: The number of worker processes
+        :return: For each worker the distinct successors it owns, and the edges as arrays of local start nodes, action
+                 indices, owners of the end nodes and positions of the end nodes in the successors of their owner
+        """
+        sent = [dict[bytes, int]() for _ in range(processes)]
+        src, acts, owners, positions = list[int](), list[int](), list[int](), list[int]()
+        for i in frontier:
+            applicable, next_rows = actions.apply(np.frombuffer(self.keys[i], dtype=np.uint8))
+            if len(applicable) == 0:
+                self.dead_ends.append(i)
+            for a, row in zip(applicable.tolist(), next_rows):
+                key = row.tobytes()
+                o = owner(key, processes)
+                src.append(i)
+                acts.append(a)
+                owners.append(o)
+                positions.append(sent[o].setdefault(key, len(sent[o])))
+        return [list(s) for s in sent], (np.array(src, dtype=np.int64), np.array(acts, dtype=np.int32),
+                                         np.array(owners, dtype=np.int32), np.array(positions, dtype=np.int64))
+
+
+def _worker(w: int, processes: int, actions: CompiledActions, init: bytes, inboxes: list[Queue], replies: list[Queue],
+            conn: Connection, size: Synchronized, max_states: Optional[int]) -> None:
+    """
+    Explore the states owned by worker w, one level each time the main process sends "expand". Errors are sent to the
+    main process.
+    :param size: The number of states of all partitions, which the workers increase when they add states
+    :param max_states: If given, a StateSpaceTooLarge exception is raised as soon as more states are added
+    """
+    try:
+        partition = Partition()
+        width = len(init)
+        frontier = [partition.intern(init)[0]] if owner(init, processes) == w else []
+        while conn.recv() == "expand":
+            sent, (src, acts, owners, positions) = partition.expand(frontier, actions, processes)
+            for o in range(processes):
+                inboxes[o].put((w, b"".join(sent[o])))
+            # intern the successors this worker owns and tell the senders their local numbers
+            frontier = list[int]()
+            for _ in range(processes):
+                sender, blob = inboxes[w].get()
+                numbers = np.zeros(len(blob) // width, dtype=np.int64)
+                # the states the other workers added while this blob is interned are only counted afterwards
+                known, added = size.value, 0
+                for k in range(len(numbers)):
+                    numbers[k], new = partition.intern(blob[k * width:(k + 1) * width])
+                    if new:
+                        frontier.append(int(numbers[k]))
+                        added += 1
+                        if max_states is not None and known + added > max_states:
+                            raise StateSpaceTooLarge(max_states)
+                with size.get_lock():
+                    size.value += added
+                    if max_states is not None and size.value > max_states:
+                        raise StateSpaceTooLarge(max_states)
+                replies[sender].put((w, numbers))
+            dst = np.zeros(len(src), dtype=np.int64)
+            for _ in range(processes):
+                o, numbers = replies[w].get()
+                mask = owners == o
+                dst[mask] = numbers[positions[mask]]
+            partition.edges.append((src, acts, owners, dst))
+            conn.send((len(frontier), len(partition.keys)))
+        conn.send((b"".join(partition.keys), partition.edges, np.array(partition.dead_ends, dtype=np.int64)))
+    except Exception as e:
+        conn.send(e)
+
+
+def depth_first_numbers(size: int, root: int, src: np.ndarray, dst: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Number the nodes of a graph in the order in which the depth-first search of explore generates them
+    :param size: The number of nodes
+    :param root: The node at which the search starts
+    :param src: For each edge the node it starts from, sorted, such that the edges of a node are in the order in which
+                they are generated
+    :param dst: For each edge the node it goes to
+    :return: The number of each node, and for each node the number of nodes that were expanded before it
+    """
+    bounds = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=size), out=bounds[1:])
+    bounds, successors = bounds.tolist(), dst.tolist()
+    numbers, expanded = [-1] * size, [-1] * size
+    numbers[root] = 0
+    generated, popped = 1, 0
+    # explore pushes every successor that is not expanded yet, also when it is already on the stack
+    todo = [root]
+    while todo:
+        s = todo.pop()
+        if expanded[s] < 0:
+            expanded[s] = popped
+            popped += 1
+        for t in successors[bounds[s]:bounds[s + 1]]:
+            if numbers[t] < 0:
+                numbers[t] = generated
+                generated += 1
+            if expanded[t] < 0:
+                todo.append(t)
+    assert(generated == size)
+    return np.array(numbers, dtype=np.int64), np.array(expanded, dtype=np.int64)
+
+
+def merge_partitions(parts: list[tuple], init: bytes, actions: CompiledActions, states: StateStore) -> CSRGraph:
+    """
+    Number the states of all partitions as explore numbers them, and build the graph of their edges
+    :param parts: For each worker the packed states, the edges and the dead ends of its partition
+    :param init: The packed bits of the initial state
+    :param actions: The compiled actions of the instance
+    :param states: An empty state store, the states are added in the order of their numbers
+    :return: The transition graph, in which dead-end states have a self-loop labeled "end", the same as the graph of
+             explore with the compiled actions
+    """
+    rows = np.concatenate([np.frombuffer(keys, dtype=np.uint8).reshape(-1, len(init)) for keys, *_ in parts])
+    offsets = np.cumsum([0] + [len(keys) // len(init) for keys, *_ in parts])
+    end = len(actions.names)    # the action index of the self-loops of dead ends
+
+    src, dst, acts = list[np.ndarray](), list[np.ndarray](), list[np.ndarray]()
+    for w, (_, edges, dead_ends) in enumerate(parts):
+        for local_src, level_acts, owners, local_dst in edges:
+            src.append(offsets[w] + local_src)
+            dst.append(offsets[owners] + local_dst)
+            acts.append(level_acts)
+        # add self-loop to all dead-end states such that there are only infinite path in the graph
+        src.append(offsets[w] + dead_ends)
+        dst.append(offsets[w] + dead_ends)
+        acts.append(np.full(len(dead_ends), end, dtype=np.int32))
+    src, dst, acts = np.concatenate(src), np.concatenate(dst), np.concatenate(acts)
+    # explore generates the successors of a state in the order of the actions
+    order = np.lexsort((acts, src))
+    src, dst, acts = src[order], dst[order], acts[order]
+    numbers, expanded = depth_first_numbers(len(rows), int(offsets[owner(init, len(parts))]), src, dst)
+
+    moved = np.empty_like(rows)
+    moved[numbers] = rows
+    states.extend(moved)
+    # explore interns the labels in the order in which the edges are generated
+    first = np.full(end + 1, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, acts, expanded[src] * (end + 1) + acts)
+    used = np.flatnonzero(first < np.iinfo(np.int64).max)
+    used = used[np.argsort(first[used])]
+    label_ids = np.zeros(end + 1, dtype=np.int32)
+    label_ids[used] = np.arange(len(used), dtype=np.int32)
+    label_names = [actions.names[a] if a < end else "end" for a in used.tolist()]
+    return CSRGraph.from_edge_ids(len(rows), numbers[src], numbers[dst], label_ids[acts], label_names)
+
+
+def parallel_explore(init: np.ndarray, actions: CompiledActions, states: StateStore, processes: int,
+                     max_states: Optional[int] = None) -> CSRGraph:
+    """
+    Construct the graph of all states reachable from an initial state using multiple processes, see the top of this
+    file. The graph and the states are the same as the ones of explore with the compiled actions, including the
+    numbering of the nodes.
+    :param init: The initial state encoded as a row of the state store
+    :param actions: The compiled actions of the instance
+    :param states: An empty state store, after the exploration it contains the state of each node in the graph
+    :param processes: The number of worker processes
+    :param max_states: If given, a StateSpaceTooLarge exception is raised as soon as more states are reached
+    :return: The transition graph, in which dead-end states have a self-loop labeled "end"
+    """
+    inboxes, replies = [Queue() for _ in range(processes)], [Queue() for _ in range(processes)]
+    size = Value('q', 1)     # the initial state
+    conns, workers = list[Connection](), list[Process]()
+    for w in range(processes):
+        conn, worker_conn = Pipe()
+        worker = Process(target=_worker, args=(w, processes, actions, init.tobytes(), inboxes, replies, worker_conn,
+                                                     size, max_states),
+                         daemon=True)
+        worker.start()
+        conns.append(conn)
+        workers.append(worker)
+
+    def receive() -> list:
+        """ Receive a message of each worker. An error is raised as soon as it is received, since the other workers may
+        wait for the worker that failed."""
+        results = dict[Connection, object]()
+        while len(results) < len(conns):
+            for conn in wait([c for c in conns if c not in results]):
+                results[conn] = conn.recv()
+                if isinstance(results[conn], Exception):
+                    raise results[conn]
+        return [results[conn] for conn in conns]
+
+    try:
+        while True:
+            for conn in conns:
+                conn.send("expand")
+            if sum(new for new, _ in receive()) == 0:
+                break
+        for conn in conns:
+            conn.send("merge")
+        parts = receive()
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+    return merge_partitions(parts, init.tobytes(), actions, states)
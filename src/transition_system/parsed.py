@@ -0,0 +1,128 @@
+# The parts of a parsed PDDL instance that are needed once its transition system is cached, such that runs over the same
+# PDDL files do not parse them again. The parsed instances are cached by the content of the domain and instance file.
+
+from typing import Optional
+
+import tarski.syntax
+
+import src.file_manager as fm
+from .tarski import load_domain, load_instance
+from .tarski_manipulation import sort_constants, ground_atoms, static_predicates
+from .types import *
+
+Atom = tuple[str, list[str]]     # the name of the predicate and the names of the arguments of a ground atom
+
+
+def goal_atoms(goal) -> list[Atom]:
+    """
+    :param goal: An Atom or CompoundFormula from the tarski library with only "and" connectives
+    :return: The atoms of the goal, in the order in which they appear in the formula
+    """
+    match goal:
+        case tarski.syntax.Atom():
+            return [(goal.predicate.name, [a.name for a in goal.subterms])]
+        case tarski.syntax.CompoundFormula():
+            match goal.connective:
+                case tarski.syntax.Connective.And:
+                    return [a for s in goal.subformulas for a in goal_atoms(s)]
+                case _:
+                    raise NotImplementedError(goal.connective)
+        case _:
+            raise NotImplementedError
+
+
+class ParsedInstance:
+    """
+    A planning instance as read from its PDDL files, without the tarski objects. It has the domain_name and name of a
+    tarski problem, such that it can be passed to tarski_to_transition_system. The PDDL files are only parsed again
+    (see problem) when the transition system of the instance is not cached.
+    """
+    domain_name: str
+    name: str
+    predicates: list[tuple[str, int]]   # the predicates of the domain with their arity
+    constants: list[str]                # the constants of the domain
+    objects: dict[str, list[str]]       # the objects of the instance per sort, as sort_constants
+    static: list[str]                   # the static predicates of the domain
+    atoms: list[Atom]                   # the ground atoms of the non-static predicates
+    init: list[Atom]                    # sorted, since tarski does not keep the order of the atoms in the PDDL file
+    goal: list[Atom]
+    files: tuple[str, str]              # the domain file and the instance file, which are not cached
+
+    def __init__(self, domain_name: str, name: str, predicates: list[tuple[str, int]], constants: list[str],
+                 objects: dict[str, list[str]], static: list[str], atoms: list[Atom], init: list[Atom],
+                 goal: list[Atom]):
+        self.domain_name = domain_name
+        self.name = name
+        self.predicates = predicates
+        self.constants = constants
+        self.objects = objects
+        self.static = static
+        self.atoms = atoms
+        self.init = init
+        self.goal = goal
+        self.files = ("", "")
+        self._problem: Optional[TProblem] = None
+
+    @classmethod
+    def from_tarski(cls, domain: TProblem, instance: TProblem) -> 'Self':
+        """
+        :param domain: A Tarski problem which was constructed by parsing a domain file
+        :param instance: A Tarski problem which was constructed by parsing both a domain file and an instance of that
+                         domain
+        :return: The ParsedInstance of the instance
+        """
+        static = static_predicates(domain.language.predicates, list(domain.actions.values()))
+        d = sort_constants(instance.language)
+        parsed = cls(instance.domain_name, instance.name,
+                     [(p.name, p.arity) for p in domain.language.predicates if isinstance(p.name, str)],
+                     [c.name for c in domain.language.constants()],
+                     {s.name: [c.name for c in cs] for s, cs in d.items()},
+                     sorted(static),
+                     ground_atoms([p for p in domain.language.predicates if p.name not in static], d),
+                     sorted((a.predicate.name, [t.name for t in a.subterms]) for a in instance.init.as_atoms()),
+                     goal_atoms(instance.goal))
+        parsed._problem = instance
+        return parsed
+
+    @property
+    def static_atoms(self) -> list[Atom]:
+        """ The atoms of static predicates that are true in the initial state, and thus in every state."""
+        return [(p, args) for p, args in self.init if p in self.static]
+
+    @property
+    def problem(self) -> TProblem:
+        """ The tarski problem of the instance, the PDDL files are parsed the first time it is used."""
+        if self._problem is None:
+            self._problem = load_instance(*self.files)
+        self._problem.name = self.name
+        return self._problem
+
+    def serialize(self) -> dict:
+        return {"domain_name": self.domain_name, "name": self.name, "predicates": self.predicates,
+                "constants": self.constants, "objects": self.objects, "static": self.static, "atoms": self.atoms,
+                "init": self.init, "goal": self.goal}
+
+    @classmethod
+    def deserialize(cls, data: dict) -> 'Self':
+        return cls(data["domain_name"], data["name"], [tuple(p) for p in data["predicates"]], data["constants"],
+                   data["objects"], data["static"], [tuple(a) for a in data["atoms"]],
+                   [tuple(a) for a in data["init"]], [tuple(a) for a in data["goal"]])
+
+
+@fm.cashing.cache_to_archive("../../cache/", ParsedInstance.serialize, ParsedInstance.deserialize,
+                             fm.names.parsed_instance)
+def _parse_instance(domain_file: str, instance_file: str) -> ParsedInstance:
+    return ParsedInstance.from_tarski(load_domain(domain_file), load_instance(domain_file, instance_file))
+
+
+def parse_instance(domain_file: str, instance_file: str) -> ParsedInstance:
+    """
+    Read a planning instance from its PDDL files. The result is cached by the content of the files, such that the files
+    are only parsed by tarski the first time, also when they were moved or copied.
+    :param domain_file: the file path of a PDDL file that contains the PDDL description of a planning domain
+    :param instance_file: the file path of a PDDL file that contains the PDDL description of an instance of the domain
+    :return: The parsed instance
+    """
+    parsed = _parse_instance(domain_file, instance_file)
+    parsed.files = (domain_file, instance_file)
+    return parsed
@@ -0,0 +1,38 @@
+# Properties of the states of a transition system that only depend on the graph and the goal states, and not on the
+# features or sketches that are checked on it. They are computed once per transition system.
+
+from collections import deque
+
+from .graph import CSRGraph, DirectedGraph
+
+
+def goal_distances(graph: DirectedGraph | CSRGraph, goals: list[int]) -> list[int]:
+    """
+    Compute for each node the length of a shortest path to a goal node, with a breadth-first search from the goal nodes
+    over the reverse adjacency index of the graph
+    :param graph: A transition graph
+    :param goals: The indices of the goal nodes
+    :return: For each node the number of transitions needed to reach a goal node, or -1 if no goal node can be reached
+    """
+    preds = graph.predecessors()
+    dist = [-1] * graph.size()
+    queue = deque()
+    for g in goals:
+        if dist[g] == -1:
+            dist[g] = 0
+            queue.append(g)
+    while queue:
+        j = queue.popleft()
+        for i in preds[j]:
+            if dist[i] == -1:
+                dist[i] = dist[j] + 1
+                queue.append(i)
+    return dist
+
+
+def alive_states(distances: list[int]) -> list[int]:
+    """
+    :param distances: The goal distances of the nodes of a graph as computed by goal_distances
+    :return: The indices of the alive nodes, i.e. the nodes from which a goal node can be reached, in increasing order
+    """
+    return [i for i, d in enumerate(distances) if d >= 0]
@@ -0,0 +1,202 @@
+# Compact representation of the states of a transition system.
+# Each state is a row in a bit matrix in which bit i is set if the i-th ground atom of the instance is true.
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+StateStr = set[str]     # represent a state as a set of propositions (strings)
+
+
+class StateStore:
+    """
+    Store a list of states as fixed-width rows of a bit-packed numpy uint8 matrix over the ground atoms of an instance.
+    Bit i of a row (in little bit order) tells whether the atom atoms[i] is true in the state. When the atoms are the
+    ones of ground_atom_names, the position of an atom is also its index in the dlplan instance built by
+    dlinstance_from_tarski.
+    A StateStore can be used as a read-only list of StateStr: indexing and iterating decode the rows on the fly.
+    Atoms of static predicates, i.e. predicates that no action changes, are not stored per state. The static atoms that
+    are true are the same in every state and are kept once in static_atoms.
+    """
+    atoms: list[str]
+    atom_index: dict[str, int]
+    static_predicates: frozenset[str]
+    static_atoms: frozenset[str]
+
+    def __init__(self, atoms: list[str], rows: Optional[np.ndarray] = None,
+                 static_predicates: Iterable[str] = (), static_atoms: Iterable[str] = ()):
+        self.static_predicates = frozenset(static_predicates)
+        self.static_atoms = frozenset(static_atoms)
+        self.atoms = [a for a in atoms if not self.is_static(a)]
+        self.atom_index = {a: i for i, a in enumerate(self.atoms)}
+        if rows is None:
+            rows = np.zeros((0, self.width()), dtype=np.uint8)
+        assert(rows.ndim == 2 and rows.shape[1] == self.width())
+        self._rows = rows
+        self._size = len(rows)
+
+    @classmethod
+    def from_states(cls, states: Iterable[StateStr], atoms: Optional[list[str]] = None,
+                    static_predicates: Iterable[str] = (), static_atoms: Iterable[str] = ()) -> 'StateStore':
+        """
+        Build a store from states represented as sets of strings
+        :param states: the states to store, in order
+        :param atoms: the ground atoms of the instance, if not provided the sorted atoms occurring in the states are used
+        :param static_predicates: the names of the predicates that are not changed by any action
+        :param static_atoms: the atoms of static predicates that are true in every state
+        :return: A StateStore containing the given states
+        """
+        states = [set(s) for s in states]
+        if atoms is None:
+            atoms = sorted(set().union(*states))
+        store = cls(atoms, static_predicates=static_predicates, static_atoms=static_atoms)
+        for s in states:
+            store.append(store.encode(s))
+        return store
+
+    def width(self) -> int:
+        """
+        :return: the number of bytes used to store one state
+        """
+        return (len(self.atoms) + 7) // 8
+
+    @property
+    def rows(self) -> np.ndarray:
+        """
+        :return: The bit matrix with one row per stored state
+        """
+        return self._rows[:self._size]
+
+    def is_static(self, atom: str) -> bool:
+        """
+        :param atom: An atom represented as a string, e.g. "on(b1,b2)"
+        :return: True if the predicate of the atom is static
+        """
+        return atom.partition('(')[0] in self.static_predicates
+
+    def add_atoms(self, atoms: Iterable[str]) -> None:
+        """
+        Add all atoms that are not known yet to the atoms of the store, rows that were already stored are widened if
+        necessary. Note that rows that were encoded before, but not yet appended, keep their old width. Static atoms are
+        not added.
+        :param atoms: Atoms represented as strings
+        """
+        for atom in atoms:
+            if atom not in self.atom_index and not self.is_static(atom):
+                self._add_atom(atom)
+
+    def encode(self, state: StateStr) -> np.ndarray:
+        """
+        Represent a state as a bit-packed row. Atoms that are not known yet are added to the atoms of the store, static
+        atoms are left out.
+        :param state: A state represented as a set of strings
+        :return: A row of bytes in which the bits of the atoms that are true in the state are set
+        """
+        self.add_atoms(state)
+        bits = np.zeros(len(self.atoms), dtype=bool)
+        bits[[self.atom_index[atom] for atom in state if not self.is_static(atom)]] = True
+        return np.packbits(bits, bitorder='little')
+
+    def mask(self, atoms: Iterable[str]) -> Optional[np.ndarray]:
+        """
+        Represent a set of atoms as a bit-packed row without changing the store. Static atoms that are true are left out.
+        :param atoms: Atoms represented as strings
+        :return: A row in which the bits of the given atoms are set, None if one of the atoms can not be true in any
+                 state of the store
+        """
+        bits = np.zeros(len(self.atoms), dtype=bool)
+        for atom in atoms:
+            if self.is_static(atom):
+                if atom not in self.static_atoms:
+                    return None
+            elif atom not in self.atom_index:
+                return None
+            else:
+                bits[self.atom_index[atom]] = True
+        return np.packbits(bits, bitorder='little')
+
+    def append(self, row: np.ndarray) -> int:
+        """
+        Add an encoded state to the end of the store
+        :param row: A state encoded with the encode method
+        :return: The index of the added state
+        """
+        if self._size == len(self._rows):
+            grown = np.zeros((max(2 * len(self._rows), 16), self.width()), dtype=np.uint8)
+            grown[:self._size] = self._rows[:self._size]
+            self._rows = grown
+        self._rows[self._size] = row
+        self._size += 1
+        return self._size - 1
+
+    def extend(self, rows: np.ndarray) -> None:
+        """
+        Add encoded states to the end of the store at once. An empty store takes over the matrix without copying it.
+        :param rows: A matrix with a state encoded with the encode method in each row
+        """
+        if self._size == 0 and rows.dtype == np.uint8 and rows.ndim == 2 and rows.shape[1] == self.width():
+            self._rows = rows
+            self._size = len(rows)
+            return
+        if self._size + len(rows) > len(self._rows):
+            grown = np.zeros((max(2 * len(self._rows), self._size + len(rows), 16), self.width()), dtype=np.uint8)
+            grown[:self._size] = self._rows[:self._size]
+            self._rows = grown
+        self._rows[self._size:self._size + len(rows)] = rows
+        self._size += len(rows)
+
+    def atom_idxs(self, i: int) -> list[int]:
+        """
+        :param i: index of a state
+        :return: The indices of all atoms that are true in state i
+        """
+        return np.flatnonzero(np.unpackbits(self._rows[i], count=len(self.atoms), bitorder='little')).tolist()
+
+    def decode(self, i: int) -> StateStr:
+        """
+        :param i: index of a state
+        :return: State i represented as a set of strings, without the static atoms
+        """
+        return {self.atoms[a] for a in self.atom_idxs(i)}
+
+    def satisfying(self, mask: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Find all states in which all atoms of a mask are true, using one vectorized test over the whole matrix
+        :param mask: A row as returned by the mask method
+        :return: The indices of the states that contain all atoms of the mask, in increasing order
+        """
+        if mask is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(np.all((self.rows & mask) == mask, axis=1))
+
+    def index(self, state: StateStr) -> int:
+        """
+        :param state: A state represented as a set of strings, static atoms are ignored
+        :return: The index of the state in the store, a ValueError is raised if the state is not stored
+        """
+        mask = self.mask(state)
+        if mask is not None:
+            found = np.flatnonzero(np.all(self.rows == mask, axis=1))
+            if len(found):
+                return int(found[0])
+        raise ValueError(f"{state} is not in the state store")
+
+    def _add_atom(self, atom: str) -> None:
+        """ Add an atom to the store, widening the rows if the new atom does not fit in the current number of bytes."""
+        self.atom_index[atom] = len(self.atoms)
+        self.atoms.append(atom)
+        if self.width() > self._rows.shape[1]:
+            self._rows = np.pad(self._rows, ((0, 0), (0, self.width() - self._rows.shape[1])))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> StateStr:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return self.decode(i)
+
+    def __iter__(self) -> Iterator[StateStr]:
+        return (self.decode(i) for i in range(self._size))
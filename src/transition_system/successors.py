@@ -0,0 +1,130 @@
+# Compile ground STRIPS actions into bit masks over the atoms of a StateStore, such that the applicable actions and the
+# successors of a state can be computed with a few numpy operations instead of with tarski Model objects.
+
+from typing import Optional
+
+import numpy as np
+import tarski.syntax
+from tarski.fstrips import AddEffect, DelEffect
+
+from .state_store import StateStore
+from .types import *
+
+
+class CompiledActions:
+    """
+    Ground actions compiled into bit-packed rows, with one row per action.
+    An action is applicable in a state if all bits of its precondition (pre) are set in the state and none of the bits
+    of its negative precondition (neg). Applying the action first removes the bits of its delete effects (delete) and
+    then sets the bits of its add effects (add), which is the add-after-delete semantics of tarski's progress.
+    """
+    names: list[str]
+    pre: np.ndarray
+    neg: np.ndarray
+    add: np.ndarray
+    delete: np.ndarray
+
+    def __init__(self, names: list[str], pre: np.ndarray, neg: np.ndarray, add: np.ndarray, delete: np.ndarray):
+        assert(len(names) == len(pre) == len(neg) == len(add) == len(delete))
+        self.names = names
+        self.pre = pre
+        self.neg = neg
+        self.add = add
+        self.delete = delete
+
+    def applicable(self, row: np.ndarray) -> np.ndarray:
+        """
+        Check for all actions at once whether they are applicable in a state
+        :param row: A state encoded as a row of a StateStore
+        :return: The indices of the applicable actions, in increasing order
+        """
+        violated = (self.pre & ~row) | (self.neg & row)
+        return np.flatnonzero(~violated.any(axis=1))
+
+    def apply(self, row: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Apply all applicable actions to a state at once
+        :param row: A state encoded as a row of a StateStore
+        :return: The indices of the applicable actions in increasing order, and a matrix with the resulting states
+        """
+        acts = self.applicable(row)
+        return acts, (row & ~self.delete[acts]) | self.add[acts]
+
+    def successors(self, row: np.ndarray) -> list[tuple[int, np.ndarray]]:
+        """
+        Apply all applicable actions to a state
+        :param row: A state encoded as a row of a StateStore
+        :return: For each applicable action, in order, the index of the action and the resulting state as a row
+        """
+        acts, next_rows = self.apply(row)
+        return list(zip(acts.tolist(), next_rows))
+
+
+def strips_atoms(formula) -> Optional[tuple[list[str], list[str]]]:
+    """
+    Split a precondition into its positive and negative atoms, if it is a conjunction of (negated) atoms
+    :param formula: The precondition of a ground action
+    :return: The positive and the negative atoms as strings, or None if the formula is not a conjunction of literals
+    """
+    match formula:
+        case tarski.syntax.Tautology():
+            return [], []
+        case tarski.syntax.Atom() if isinstance(formula.predicate.name, str):
+            return [str(formula)], []
+        case tarski.syntax.CompoundFormula(connective=tarski.syntax.Connective.Not, subformulas=(sub,)):
+            if isinstance(sub, tarski.syntax.Atom) and isinstance(sub.predicate.name, str):
+                return [], [str(sub)]
+            return None
+        case tarski.syntax.CompoundFormula(connective=tarski.syntax.Connective.And):
+            pos, neg = list[str](), list[str]()
+            for sub in formula.subformulas:
+                literals = strips_atoms(sub)
+                if literals is None:
+                    return None
+                pos.extend(literals[0])
+                neg.extend(literals[1])
+            return pos, neg
+        case _:
+            return None
+
+
+def compile_actions(actions: list[TAction], states: StateStore) -> Optional[CompiledActions]:
+    """
+    Compile ground actions into bit masks over the atoms of a state store. This is only possible for STRIPS actions,
+    i.e. actions with a conjunction of (negated) atoms as precondition and unconditional add and delete effects.
+    Atoms of the actions that the store does not know yet are added to it.
+    Preconditions on static atoms are evaluated here, once: actions of which they do not hold are left out, and the static
+    atoms are not part of the masks.
+    :param actions: Ground actions
+    :param states: The store in which the states the actions are applied to are kept
+    :return: The compiled actions, or None if one of the actions is not a STRIPS action, in which case one has to fall
+             back to the tarski operations
+    """
+    names = list[str]()
+    compiled = list[tuple[list[str], list[str], list[str], list[str]]]()
+    for a in actions:
+        literals = strips_atoms(a.precondition)
+        if literals is None:
+            return None
+        pos, neg = literals
+        if any(states.is_static(p) and p not in states.static_atoms for p in pos) or \
+                any(n in states.static_atoms for n in neg):
+            continue
+        adds, dels = list[str](), list[str]()
+        for e in a.effects:
+            if not isinstance(e.condition, tarski.syntax.Tautology):
+                return None
+            match e:
+                case AddEffect(): adds.append(str(e.atom))
+                case DelEffect(): dels.append(str(e.atom))
+                case _: return None
+        names.append(a.name)
+        compiled.append((pos, neg, adds, dels))
+
+    # register all atoms first, such that all rows have the same width
+    states.add_atoms(atom for c in compiled for atoms in c for atom in atoms)
+
+    def masks(k: int) -> np.ndarray:
+        return np.array([states.encode(set(c[k])) for c in compiled], dtype=np.uint8).reshape(len(compiled), states.width())
+
+    return CompiledActions(names, masks(0), masks(1), masks(2), masks(3))
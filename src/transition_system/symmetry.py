@@ -0,0 +1,263 @@
+# Reduce the state space of an instance by exploiting interchangeable objects.
+# Two objects are interchangeable if swapping them does not change the goal, the static atoms of the instance or the
+# action schemas. Permuting interchangeable objects maps reachable states to reachable states with the same transitions
+# and goal membership, so it suffices to explore one representative, the canonical form, of each set of permuted states.
+# There are no representations from other libraries than tarski used in this file.
+
+from typing import Optional
+
+import numpy as np
+import tarski.syntax
+from tarski.fstrips import AddEffect, DelEffect, FunctionalEffect, UniversalEffect
+from tarski.syntax.ops import collect_unique_nodes
+
+from .state_store import StateStore, StateStr
+from .types import *
+
+ObjectClass = list[str]         # names of objects that can be permuted among each other
+Permutation = dict[str, str]    # maps the names of objects to the names of the objects they are replaced with
+
+
+def schema_constants(schema: TAction) -> set[str]:
+    """
+    :param schema: An action schema
+    :return: The names of the constants that are used in the precondition or effects of the schema
+    """
+    def constants(expression) -> set[str]:
+        return {c.name for c in collect_unique_nodes(expression, lambda x: isinstance(x, tarski.syntax.Constant))}
+
+    def effect_constants(effects) -> set[str]:
+        names = set()
+        for e in effects:
+            names |= constants(e.condition)
+            match e:
+                case AddEffect() | DelEffect(): names |= constants(e.atom)
+                case FunctionalEffect(): names |= constants(e.lhs) | constants(e.rhs)
+                case UniversalEffect(): names |= effect_constants(e.effects)
+        return names
+
+    return constants(schema.precondition) | effect_constants(schema.effects)
+
+
+def split_atom(atom: str) -> tuple[str, list[str]]:
+    """
+    :param atom: An atom represented as a string, e.g. "on(b1,b2)"
+    :return: The name of the predicate and the names of the arguments, e.g. ("on", ["b1", "b2"])
+    """
+    name, _, args = atom.partition('(')
+    args = args.removesuffix(')')
+    return name, args.split(',') if args else []
+
+
+def permute_atom(atom: str, perm: Permutation) -> str:
+    """
+    :param atom: An atom represented as a string
+    :param perm: A permutation of objects
+    :return: The atom in which every object is replaced according to the permutation
+    """
+    name, args = split_atom(atom)
+    return f"{name}({','.join(perm.get(a, a) for a in args)})"
+
+
+def permute_state(state: StateStr, perm: Permutation) -> StateStr:
+    """
+    :param state: A state represented as a set of strings
+    :param perm: A permutation of objects
+    :return: The state in which every object is replaced according to the permutation
+    """
+    return {permute_atom(a, perm) for a in state}
+
+
+def object_classes(sorted_objects: dict[TSort, list[TConstant]], fixed: set[str],
+                   invariant_atoms: set[str]) -> list[ObjectClass]:
+    """
+    Partition objects into classes of interchangeable objects. Two objects of the same type are interchangeable if
+    swapping them maps the invariant atoms to themselves. Since this relation is transitive, every permutation within a
+    class maps the invariant atoms to themselves.
+    :param sorted_objects: A dictionary with types as keys and a list of objects of the key type as values
+    :param fixed: The names of objects that cannot be permuted, e.g. because an action schema refers to them
+    :param invariant_atoms: The atoms that permutations have to keep, e.g. the goal atoms and static atoms
+    :return: The classes with at least two objects, in the order in which the objects are found
+    """
+    objects = dict[str, TSort]()
+    for objs in sorted_objects.values():
+        for o in objs:
+            objects.setdefault(o.name, o.sort)
+
+    classes = list[ObjectClass]()
+    for o, sort in objects.items():
+        if o in fixed:
+            continue
+        for c in classes:
+            swap = {o: c[0], c[0]: o}
+            if objects[c[0]] == sort and permute_state(invariant_atoms, swap) == invariant_atoms:
+                c.append(o)
+                break
+        else:
+            classes.append([o])
+    return [c for c in classes if len(c) > 1]
+
+
+def class_transpositions(classes: list[ObjectClass]) -> list[Permutation]:
+    """
+    :param classes: Classes of interchangeable objects
+    :return: The transpositions of the first object of each class with each other object of its class. These generate
+             all permutations that only permute objects within their class, of which there are too many to enumerate.
+    """
+    return [{c[0]: o, o: c[0]} for c in classes for o in c[1:]]
+
+
+def close_groundings(groundings: list[tuple[str, list[str]]],
+                     classes: list[ObjectClass]) -> list[tuple[str, list[str]]]:
+    """
+    Add the permutations of ground actions, such that every permutation of a state has the permuted ground actions
+    :param groundings: Ground actions as schema names and arguments
+    :param classes: Classes of interchangeable objects
+    :return: The ground actions, each followed by its permutations that were not in the list yet
+    """
+    transpositions = class_transpositions(classes)
+    seen = set()
+    closed = list()
+    for name, args in groundings:
+        # the permutations of a ground action are found by applying transpositions until nothing new is found
+        queue = [(name, tuple(args))]
+        while queue:
+            grounding = queue.pop()
+            if grounding in seen:
+                continue
+            seen.add(grounding)
+            closed.append((name, list(grounding[1])))
+            queue += [(name, tuple(t.get(a, a) for a in grounding[1])) for t in transpositions]
+    return closed
+
+
+class Symmetries:
+    """
+    The permutations of interchangeable objects, applied to the rows of a state store.
+    The canonical form of a state is found without enumerating the permutations: the objects of each class are sorted
+    by their role in the state, and the i-th object in this order is replaced with the i-th object of the class. The
+    role of an object is computed by color refinement: each object starts with the color of its class, and is then
+    colored by its previous color and the atoms of the state it occurs in, in which the other objects are replaced by
+    their colors, until the colors do not change anymore. As long as objects that occur together with other permuted
+    objects have the same color, the first of them gets a color of its own and the colors are refined again.
+    States that are permutations of each other then have the same canonical form, unless color refinement cannot tell
+    objects apart that have different roles. Such states keep different canonical forms, which makes the reduced graph
+    larger but not wrong, since a canonical form is always a permutation of the state.
+    """
+    classes: list[ObjectClass]
+    states: StateStore
+    objects: dict[str, int]         # the number of each object, see __init__
+    class_of: list[int]             # the class of each object that can be permuted
+    predicates: dict[str, int]      # the number of each predicate
+    atoms: Optional[list[tuple[int, tuple[int, ...]]]]  # for each atom of the store its predicate and arguments
+    atom_index: dict[tuple[int, tuple[int, ...]], int]  # the index of an atom in the store by predicate and arguments
+    known: dict[bytes, np.ndarray]  # the canonical form of the rows that were seen, many successors are seen often
+
+    def __init__(self, classes: list[ObjectClass], states: StateStore):
+        self.classes = classes
+        self.states = states
+        # objects of the classes are numbered from 0, other objects, which are never permuted, from -2 downwards
+        self.objects = {o: i for i, o in enumerate(o for c in classes for o in c)}
+        self.class_of = [k for k, c in enumerate(classes) for _ in c]
+        self.predicates = dict[str, int]()
+        self.atoms = None
+        self.atom_index = dict()
+        self.known = dict()
+
+    def update(self) -> None:
+        """
+        Make sure that the permutations of all atoms of the state store are known to it, and index the atoms by their
+        predicate and arguments
+        """
+        states = self.states
+        transpositions = class_transpositions(self.classes)
+        new = list(states.atoms)
+        while new:
+            permuted = {permute_atom(a, t) for a in new for t in transpositions}
+            new = [a for a in permuted if a not in states.atom_index and not states.is_static(a)]
+            states.add_atoms(new)
+        self.atoms = list()
+        for atom in states.atoms:
+            name, args = split_atom(atom)
+            self.atoms.append((self.predicates.setdefault(name, len(self.predicates)),
+                               tuple(self.objects.setdefault(a, -2 - len(self.objects)) for a in args)))
+        self.atom_index = {a: i for i, a in enumerate(self.atoms)}
+        self.known = dict()
+
+    @staticmethod
+    def refine(colors: list[int], occurrences: list[list[tuple[int, tuple[int, ...]]]]) -> list[int]:
+        """
+        :param colors: A color of each object of the classes
+        :param occurrences: The true atoms that each object of the classes occurs in
+        :return: The colors after color refinement, see the class docstring
+        """
+        while True:
+            # the object itself is -1 in its signature, objects that are never permuted keep their own number
+            signatures = [(colors[o], tuple(sorted((p, tuple(-1 if a == o else colors[a] if a >= 0 else a
+                                                             for a in args))
+                                                   for p, args in occurrences[o])))
+                          for o in range(len(colors))]
+            ranks = {s: r for r, s in enumerate(sorted(set(signatures)))}
+            if len(ranks) == len(set(colors)):
+                return colors
+            colors = [ranks[s] for s in signatures]
+
+    def canonical_permutation(self, atoms: list[tuple[int, tuple[int, ...]]]) -> list[int]:
+        """
+        :param atoms: The true atoms of a state, as predicates and arguments
+        :return: The permutation that maps the state to its canonical form, as the number of the object that replaces
+                 each object of the classes
+        """
+        occurrences = [list[tuple[int, tuple[int, ...]]]() for _ in self.class_of]
+        for p, args in atoms:
+            for a in set(args):
+                if a >= 0:
+                    occurrences[a].append((p, args))
+        # objects that only occur together with objects that are never permuted can be swapped if they have the same
+        # color, other objects with the same color are told apart by giving one of them a color of its own
+        alone = [all(a < 0 or a == o for _, args in occurrences[o] for a in args) for o in range(len(self.class_of))]
+        colors = self.class_of
+        while True:
+            colors = self.refine(colors, occurrences)
+            cells = dict[int, list[int]]()
+            for o, c in enumerate(colors):
+                cells.setdefault(c, []).append(o)
+            tied = [c for c in sorted(cells) if len(cells[c]) > 1 and not all(alone[o] for o in cells[c])]
+            if not tied:
+                break
+            first = cells[tied[0]][0]
+            colors = [2 * c + (o != first) for o, c in enumerate(colors)]
+        perm = list(range(len(colors)))
+        for c in self.classes:
+            numbers = [self.objects[o] for o in c]
+            for o, target in zip(sorted(numbers, key=lambda o: (colors[o], o)), numbers):
+                perm[o] = target
+        return perm
+
+    def canonical(self, row: np.ndarray) -> np.ndarray:
+        """
+        :param row: A state encoded as a row of the state store
+        :return: The canonical form of the state, as a row of the state store
+        """
+        if self.atoms is None or len(self.atoms) != len(self.states.atoms):
+            self.update()
+        if len(row) != self.states.width():     # the row was encoded before atoms were added to the store
+            row = np.pad(row, (0, self.states.width() - len(row)))
+        key = row.tobytes()
+        if key not in self.known:
+            bits = np.unpackbits(row, count=len(self.states.atoms), bitorder='little')
+            atoms = [self.atoms[i] for i in np.flatnonzero(bits).tolist()]
+            perm = self.canonical_permutation(atoms)
+            permuted = np.zeros(len(self.states.atoms), dtype=np.uint8)
+            permuted[[self.atom_index[(p, tuple(perm[a] if a >= 0 else a for a in args))] for p, args in atoms]] = 1
+            self.known[key] = np.packbits(permuted, bitorder='little')
+        return self.known[key]
+
+    def canonical_state(self, state: StateStr) -> StateStr:
+        """
+        :param state: A state represented as a set of strings
+        :return: The canonical form of the state, without static atoms
+        """
+        row = self.canonical(self.states.encode(state))
+        bits = np.unpackbits(row, count=len(self.states.atoms), bitorder='little')
+        return {self.states.atoms[i] for i in np.flatnonzero(bits)}
@@ -1,13 +1,24 @@
 # Load domains and instances from PDDL files into taski objects
 # Build transition systems from instances
 
+import hashlib
+from typing import Optional
+
+import numpy as np
 import tarski.search.operations
 from tarski.io import PDDLReader
 
 import src.file_manager as fm
-from src.transition_system.graph import DirectedGraph
 from src.utils.timer import timer
-from .tarski_manipulation import sort_constants, get_ground_actions
+from .checkpoint import Checkpoint
+from .exploration import StateSpaceTooLarge, explore
+from .grounding import Grounding, relevant_groundings, ground_actions_from
+from .out_of_core import explore_on_disk
+from .parallel import parallel_explore
+from .state_store import StateStore
+from .successors import CompiledActions, compile_actions
+from .symmetry import Symmetries, close_groundings, object_classes, schema_constants
+from .tarski_manipulation import sort_constants, get_ground_actions, ground_atom_names, static_predicates
 from .transition_system import TransitionSystem, StateStr, GraphSystem
 from .types import *
 
@@ -71,64 +82,131 @@ def calc_goal_states(states: list[TModel], goal) -> list[int]:
     return gs
 
 
-def calc_goal_states_from_str(states: list[StateStr], goal) -> list[int]:
+def calc_goal_states_from_str(states: StateStore | list[StateStr], goal) -> list[int]:
     """
     Find all states in which a goal is true
-    :param states: A list of states in which each state is represented as a set of strings
+    :param states: A state store, or a list of states in which each state is represented as a set of strings
     :param goal: An Atom or CompoundFormula from the tarski library with only "and" connectives
     :return: The indexes of the states in which the goal holds
     """
-    gs = list[int]()
-    goal_list = calc_goal_list(goal)
-    for i, s in enumerate(states):
-        if all(str(g) in s for g in goal_list):
-            gs.append(i)
-    return gs
+    if not isinstance(states, StateStore):
+        states = StateStore.from_states(states)
+    goal_mask = states.mask(str(g) for g in calc_goal_list(goal))
+    return states.satisfying(goal_mask).tolist()
 
 
-def construct_graph(instance: TProblem) -> GraphSystem:
+def construct_graph(instance: TProblem, processes: int = 1, max_states: Optional[int] = None,
+                    memory_budget: Optional[int] = None, symmetry: bool = False,
+                    checkpoint_interval: Optional[float] = None, share: bool = False,
+                    cache_groundings: bool = False) -> GraphSystem:
     """
-    Given a domain instance, construct its transition system graph
+    Given a domain instance, construct its transition system graph.
+    If all ground actions are STRIPS actions, successors are computed with bit operations on compiled actions, otherwise
+    the tarski operations are used on tarski Model objects. The states in the result do not contain the atoms of static
+    predicates, these are kept once in the state store.
     :param instance: a Tarski problem class containing a problem instance
+    :param processes: the number of processes used to explore the state space. Only STRIPS instances are explored in
+                      parallel. The graph and the numbering of its nodes do not depend on the number of processes (see
+                      parallel_explore), such that the caches of the graph, the transition system and the features are
+                      the same whichever mode made them.
+    :param max_states: if given, a StateSpaceTooLarge exception is raised when the instance has more reachable states
+    :param memory_budget: if given, the search data of STRIPS instances is kept on disk, using at most about this many
+                          bytes of memory for it (see explore_on_disk). Such instances are explored by a single process.
+    :param symmetry: if true, states that are equal up to a permutation of interchangeable objects are represented by
+                     one node, labeled with their canonical form (see Symmetries). Such instances are explored by a
+                     single process.
+    :param checkpoint_interval: if given, the exploration saves a checkpoint every this many seconds in the cache
+                                directory, and resumes from the checkpoint of an earlier, interrupted call with the same
+                                arguments. Only sequential explorations of STRIPS instances in memory are checkpointed,
+                                since tarski states cannot be saved.
+    :param share: if true, the graph is cached in the cache directory under the digest of the dynamics of the instance
+                  (see dynamics_digest), such that instances that only differ in their goal or the name of their domain
+                  explore their state space once. Only STRIPS instances without symmetry reduction are shared.
+    :param cache_groundings: if true, the relevant ground actions of the instance are cached in the cache directory, see
+                             cached_ground_instance
     :return: An object containing the transition system graph and the states that label the nodes in the graph
     """
     d = sort_constants(instance.language)
-    acts: list[TAction] = get_ground_actions(list(instance.actions.values()), d)
-
-    todo: list[TModel] = [instance.init]
-    checked: list[StateStr] = list()
-    graph: DirectedGraph = DirectedGraph()
-    states: list[StateStr] = list()
-
-    while todo:
-        s = todo.pop()
-        s_str = tmodel_to_state(s)
-        checked.append(s_str)
-        if s_str in states:
-            idx_s = states.index(s_str)
-        else:
-            idx_s = graph.grow()
-            states.append(s_str)
-
-        has_nbr = False
-        for a in acts:
-            if tarski.search.operations.is_applicable(s, a):
-                has_nbr = True
-                ns = tarski.search.operations.progress(s, a)
-                ns_str = tmodel_to_state(ns)
-                if ns_str in states:
-                    idx_ns = states.index(ns_str)
-                else:
-                    idx_ns = graph.grow()
-                    states.append(ns_str)
-                graph.add(idx_s, idx_ns, a.name)
-                if ns_str not in checked:
-                    todo.append(ns)
-        if not has_nbr:
-            # Add self-loop to all dead-end states such that there are only infinite path in the graph
-            graph.add(idx_s, idx_s, "end")
-
-    return GraphSystem([s for s in states], graph)
+    # atoms of static predicates are the same in all states, so they are only stored once
+    static = static_predicates(instance.language.predicates, list(instance.actions.values()))
+    init_state = tmodel_to_state(instance.init)
+    states = StateStore(ground_atom_names([p for p in instance.language.predicates if p.name not in static], d),
+                        static_predicates=static, static_atoms={a for a in init_state if a.partition('(')[0] in static})
+    states.add_atoms(init_state)
+
+    checkpoint = None
+    if checkpoint_interval is not None:
+        checkpoint = Checkpoint("../../cache/" + fm.names.checkpoint(instance, symmetry), checkpoint_interval)
+
+    symmetries = None
+    canonical = lambda row: row
+    if symmetry:
+        fixed = set().union(*[schema_constants(a) for a in instance.actions.values()])
+        goal_atoms = {str(g) for g in calc_goal_list(instance.goal)}
+        symmetries = Symmetries(object_classes(d, fixed, goal_atoms | states.static_atoms), states)
+        canonical = symmetries.canonical
+
+    groundings = cached_ground_instance(instance) if cache_groundings else ground_instance(instance)
+    if groundings is None:
+        acts: list[TAction] = get_ground_actions(list(instance.actions.values()), d)
+    else:
+        if symmetries is not None:
+            # the relevant ground actions of permuted states are the permuted relevant ground actions
+            groundings = close_groundings(groundings, symmetries.classes)
+        acts: list[TAction] = ground_actions_from(instance.actions, groundings)
+
+    compiled = compile_actions(acts, states)
+    if symmetries is not None:
+        width = states.width()
+        symmetries.update()
+        if compiled is not None and states.width() != width:
+            compiled = compile_actions(acts, states)
+
+    shared = None
+    if share and compiled is not None and symmetries is None:
+        shared = "../../cache/" + fm.names.shared_graph(dynamics_digest(states, compiled, states.encode(init_state)))
+        if fm.cashing.directory_cached(shared):
+            cached = GraphSystem.load(shared)
+            if max_states is not None and cached.graph.size() > max_states:
+                raise StateSpaceTooLarge(max_states)
+            return cached
+
+    if compiled is not None and memory_budget is not None:
+        graph = explore_on_disk(canonical(states.encode(init_state)),
+                                lambda row: [(compiled.names[a], canonical(ns)) for a, ns in compiled.successors(row)],
+                                states, memory_budget, max_states)
+    elif compiled is not None and processes > 1 and symmetries is None:
+        graph = parallel_explore(states.encode(init_state), compiled, states, processes, max_states)
+    elif compiled is not None:
+        graph = explore(canonical(states.encode(init_state)),
+                        lambda row: [(compiled.names[a], canonical(ns)) for a, ns in compiled.successors(row)],
+                        lambda row: row, states, max_states, checkpoint)
+    else:
+        graph = explore(instance.init,
+                        lambda s: [(a.name, tarski.search.operations.progress(s, a)) for a in acts
+                                   if tarski.search.operations.is_applicable(s, a)],
+                        lambda s: canonical(states.encode(tmodel_to_state(s))), states, max_states)
+
+    if shared is not None:
+        fm.cashing.save_to_directory(shared, GraphSystem.save, GraphSystem(states, graph))
+    return GraphSystem(states, graph, symmetries)
+
+
+def dynamics_digest(states: StateStore, compiled: CompiledActions, init: np.ndarray) -> str:
+    """
+    Hash everything the reachable graph of a STRIPS instance depends on: the atoms of the state store, the compiled ground
+    actions and the initial state, but not the goal or the name of the domain
+    :param states: The state store of the instance
+    :param compiled: The compiled ground actions of the instance
+    :param init: The initial state encoded as a row of the state store
+    :return: A hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    for strings in (states.atoms, sorted(states.static_predicates), sorted(states.static_atoms), compiled.names):
+        digest.update("\n".join(strings).encode() + b"\0")
+    for array in (compiled.pre, compiled.neg, compiled.add, compiled.delete, init):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
 
 
 def tmodel_to_state(tmodel: TModel) -> StateStr:
@@ -146,23 +224,56 @@ def compare_states(s1: StateStr, s2: StateStr):
 """
 
 
-@fm.cashing.cache_to_file("../../cache/", lambda x: x.serialize(), TransitionSystem.deserialize,
-                          fm.names.transition_system)
-@timer("../../cache/", fm.names.transition_system_timer)
-def tarski_to_transition_system(instance_problem: TProblem) -> TransitionSystem:
+def ground_instance(instance_problem: TProblem) -> Optional[list[Grounding]]:
+    """
+    Ground the actions of an instance that can become applicable according to the delete relaxation of the instance.
+    :param instance_problem: a domain instance as a Problem object
+    :return: The relevant ground actions as schema names and arguments, in the order of get_ground_actions, or None if
+             the action schemas of the instance cannot be analysed
+    """
+    return relevant_groundings(list(instance_problem.actions.values()), sort_constants(instance_problem.language),
+                               instance_problem.init)
+
+
+# ground_instance with its result cached per instance, such that the reachability analysis only runs once
+cached_ground_instance = fm.cashing.cache_to_archive("../../cache/", lambda x: x, lambda x: x,
+                                                     fm.names.grounding)(ground_instance)
+
+
+@fm.cashing.cache_to_directory("../../cache/", TransitionSystem.save, TransitionSystem.load,
+                               fm.names.transition_system_arrays,
+                               fallback=(fm.names.transition_system, TransitionSystem.deserialize))
+@timer("../../cache/", fm.names.transition_system_timer, archive=True)
+def tarski_to_transition_system(instance_problem: TProblem, processes: int = 1, max_states: Optional[int] = None,
+                                memory_budget: Optional[int] = None, symmetry: bool = False,
+                                checkpoint_interval: Optional[float] = None) -> TransitionSystem:
     """
     From a domain instance as a Problem object from the tarski library, extract the initial state, goal state,
     transition graph and reachable states.
-    :param instance_problem: a domain instance as a Problem object
+    :param instance_problem: a domain instance as a Problem object, or as a ParsedInstance (see parse_instance) whose
+                             PDDL files are only parsed if the transition system is not cached yet
+    :param processes: the number of processes used to explore the state space, see construct_graph
+    :param max_states: the maximum number of states, see construct_graph. Nothing is cached for larger instances.
+    :param memory_budget: the memory budget for exploring the state space on disk, see construct_graph
+    :param symmetry: if true, the symmetry-reduced transition system is built, see construct_graph. It is cached
+                     separately, and contains the classes of interchangeable objects.
+    :param checkpoint_interval: the number of seconds between checkpoints of the exploration, see construct_graph
     :return: a TransitionSystem object containing states, transition graph and initial and goal states
     """
-    graph_sys = construct_graph(instance_problem)
+    if not isinstance(instance_problem, TProblem):
+        instance_problem = instance_problem.problem
+    graph_sys = construct_graph(instance_problem, processes, max_states, memory_budget, symmetry, checkpoint_interval,
+                                share=True, cache_groundings=True)
     states = graph_sys.states
     graph = graph_sys.graph
 
     goal_states: list[int] = calc_goal_states_from_str(states, instance_problem.goal)
-    # add self-loops in goals such that for infinite LTL, we can stay forever in a goal state
-    for s in goal_states:
-        graph.add(s, s, "goal")
+    # add self-loops in goals such that for infinite LTL, we can stay forever in a goal state. The goal is not part of
+    # the (possibly shared) graph of construct_graph, so the loops are added per instance
+    graph = graph.with_edges(goal_states, goal_states, ["goal"] * len(goal_states))
 
-    return TransitionSystem(states, graph, states.index(tmodel_to_state(instance_problem.init)), goal_states)
+    init_state = tmodel_to_state(instance_problem.init)
+    if graph_sys.symmetries is None:
+        return TransitionSystem(states, graph, states.index(init_state), goal_states)
+    return TransitionSystem(states, graph, states.index(graph_sys.symmetries.canonical_state(init_state)), goal_states,
+                            object_classes=graph_sys.symmetries.classes)
@@ -7,6 +7,7 @@ import itertools
 
 from typing import List
 from .types import *
+from tarski.fstrips import AddEffect, DelEffect, UniversalEffect
 from tarski.syntax.transform.action_grounding import ground_schema
 
 
@@ -72,13 +73,76 @@ def typed_permutations(types: tuple[TSort], object_per_type: dict[TSort, list[TC
     filtered_perms = list()  # filter all options where two times the same object is used
     for i, p in enumerate(perms):
         names = list(map(lambda x: x.name, p))  # use name representation of tarski Constants because equality is ill defined
-        for n in names:
-            if names.count(n) == 1:
-                filtered_perms.append(p)  # we cannot delete elements from perms, since the equality between tarski Constants is ill defined
-            break
+        if is_admissible(names):
+            filtered_perms.append(p)  # we cannot delete elements from perms, since the equality between tarski Constants is ill defined
     return filtered_perms
 
 
+def is_admissible(names: list[str]) -> bool:
+    """
+    The filter that typed_permutations applies on combinations of objects: a combination is dropped if its first object
+    is used more than once.
+    :param names: The names of the objects in a combination, at least one
+    :return: True if typed_permutations keeps the combination
+    """
+    return names.count(names[0]) == 1
+
+
+def ground_atoms(predicates, sorted_objects: dict[TSort, list[TConstant]]) -> list[tuple[str, list[str]]]:
+    """
+    Construct all ground atoms that can be made with the provided predicates and objects
+    :param predicates: The predicates of a first order language
+    :param sorted_objects: A dictionary with types as keys and a list of objects of the key type as values
+    :return: A list of ground atoms, each represented as the name of the predicate and the names of its arguments
+    """
+    atoms = list()
+    for p in predicates:
+        if isinstance(p.name, str):     # a tarski language contains some non-string predicates that are not used as atoms
+            if not p.sort:
+                atoms.append((p.name, []))
+            else:
+                # TODO delete the on(b1, b1)
+                for c in typed_permutations(p.sort, sorted_objects):
+                    atoms.append((p.name, [obj.name for obj in c]))
+    return atoms
+
+
+def ground_atom_names(predicates, sorted_objects: dict[TSort, list[TConstant]]) -> list[str]:
+    """
+    Construct all ground atoms that can be made with the provided predicates and objects as strings, in the same order
+    as ground_atoms. The strings have the same format as the propositions of a StateStr, e.g. "on(b1,b2)"
+    :param predicates: The predicates of a first order language
+    :param sorted_objects: A dictionary with types as keys and a list of objects of the key type as values
+    :return: A list of ground atoms represented as strings
+    """
+    return [f"{name}({','.join(args)})" for name, args in ground_atoms(predicates, sorted_objects)]
+
+
+def changed_predicates(effects) -> set[str]:
+    """
+    :param effects: The effects of an action (schema)
+    :return: The names of the predicates of the atoms that the effects add or delete
+    """
+    names = set()
+    for e in effects:
+        match e:
+            case AddEffect() | DelEffect(): names.add(e.atom.predicate.name)
+            case UniversalEffect(): names |= changed_predicates(e.effects)
+    return names
+
+
+def static_predicates(predicates, schemas: list[TAction]) -> set[str]:
+    """
+    Find the static predicates of a domain: the predicates that are not changed by any action. The atoms of a static
+    predicate that are true in the initial state of an instance are true in all of its states.
+    :param predicates: The predicates of a first order language
+    :param schemas: The action schemas of the domain
+    :return: The names of the static predicates
+    """
+    changed = set().union(*[changed_predicates(s.effects) for s in schemas])
+    return {p.name for p in predicates if isinstance(p.name, str) and p.name not in changed}
+
+
 def sort_constants(language: tarski.fol.FirstOrderLanguage) -> dict[TSort, list[TConstant]]:
     """
     Create a dictionary that sorts objects/constants per type/sort
@@ -1,26 +1,136 @@
 # This file defines the TransitionSystem and GraphSystem classes
 
-from src.transition_system.graph import DirectedGraph
+import io
+import json
+import os
+from typing import Callable, Optional
 
-StateStr = set[str]     # represent a state as a set of propositions (strings)
+import numpy as np
+
+from src.file_manager.archive import open_archive
+from src.transition_system.graph import CSRGraph
+from src.transition_system.reachability import goal_distances, alive_states
+from src.transition_system.state_store import StateStore, StateStr
+from src.transition_system.symmetry import ObjectClass, Symmetries
+
+ARRAYS_VERSION = 1      # the version of the binary format written by TransitionSystem.save and GraphSystem.save
+
+
+def save_arrays(directory: str, arrays: dict[str, np.ndarray], meta: dict) -> None:
+    """
+    Write arrays to a directory as .npy files, together with a json file meta.json with other data
+    :param directory: The directory, which is made if it does not exist
+    :param arrays: The arrays by name
+    :param meta: The other data, which needs to be json writable
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+    with open(os.path.join(directory, "meta.json"), "w") as file:
+        json.dump({"version": ARRAYS_VERSION} | meta, file)
+
+
+def load_arrays(directory: str, names: list[str], mmap: bool) -> tuple[dict[str, np.ndarray], dict]:
+    """
+    Read arrays and other data written with save_arrays, from the directory or from the pack of its parent directory
+    (see migrate.pack_array_directories)
+    :param directory: The directory
+    :param names: The names of the arrays to read
+    :param mmap: If true, the arrays are memory-mapped instead of read
+    :return: The arrays by name, and the other data
+    """
+    directory = directory.rstrip("/")
+    if os.path.isdir(directory):
+        with open(os.path.join(directory, "meta.json"), "r") as file:
+            meta = json.load(file)
+    else:
+        meta = json.loads(open_archive(os.path.dirname(directory)).get(f"{os.path.basename(directory)}/meta.json"))
+    assert(meta["version"] == ARRAYS_VERSION)
+    return {name: load_array(directory, name, mmap) for name in names}, meta
+
+
+def load_array(directory: str, name: str, mmap: bool) -> np.ndarray:
+    """
+    Read one array written with save_arrays, see load_arrays
+    :param directory: The directory
+    :param name: The name of the array
+    :param mmap: If true, the array is memory-mapped instead of read. Arrays in a pack are mapped from the pack file,
+                 which is possible because they are packed without compression.
+    :return: The array
+    """
+    directory = directory.rstrip("/")
+    if os.path.isdir(directory):
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None)
+    pack = open_archive(os.path.dirname(directory))
+    key = f"{os.path.basename(directory)}/{name}.npy"
+    if not mmap:
+        return np.load(io.BytesIO(pack.get(key)))
+    offset, _ = pack.locate(key)
+    with open(pack.pack_file, "rb") as file:
+        file.seek(offset)
+        version = np.lib.format.read_magic(file)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(file)
+        start = file.tell()
+    if 0 in shape:
+        return np.zeros(shape, dtype=dtype)     # an empty file region cannot be mapped
+    return np.memmap(pack.pack_file, dtype=dtype, mode='r', offset=start, shape=shape,
+                     order='F' if fortran_order else 'C')
 
 
 class TransitionSystem:
     """
     Representation of a transition system containing the graph of the system, the states that label the nodes of the
     graph, an initial state which is represented as the index of state in the states list, and the goal states which are
-    also represented as indices.
+    also represented as indices. For each state, the length of a shortest path to a goal state is precomputed, it is -1
+    for dead-end states from which no goal state can be reached.
+    If the transition system is symmetry-reduced, each state represents all states that are equal to it up to a
+    permutation of the objects within each of the object classes.
+    The states are only needed to compute the features of a transition system, not to verify sketches on it. A
+    TransitionSystem that is read from a binary cache (see load) loads its states the first time they are used, and can
+    release them again afterwards.
     """
-    states: list[StateStr]
-    graph: DirectedGraph
+    graph: CSRGraph
     init: int
     goals: list[int]
+    goal_distances: list[int]
+    object_classes: list[ObjectClass]
 
-    def __init__(self, states: list[StateStr], graph: DirectedGraph, init: int, goals: list[int]):
-        self.states = states
+    def __init__(self, states: StateStore | Callable[[], StateStore], graph: CSRGraph, init: int, goals: list[int],
+                 distances: Optional[list[int]] = None, object_classes: Optional[list[ObjectClass]] = None):
+        """
+        :param states: The states, or a function that loads them when they are needed
+        """
+        self._states = states if isinstance(states, StateStore) else None
+        self._load_states = None if isinstance(states, StateStore) else states
         self.graph = graph
         self.init = init
         self.goals = goals
+        self.goal_distances = distances if distances is not None else goal_distances(graph, goals)
+        self.object_classes = object_classes if object_classes is not None else []
+
+    def alive_states(self) -> list[int]:
+        """
+        :return: The indices of the states from which a goal state can be reached
+        """
+        return alive_states(self.goal_distances)
+
+    @property
+    def states(self) -> StateStore:
+        """
+        :return: The states that label the nodes of the graph, loaded if they are not in memory
+        """
+        if self._states is None:
+            self._states = self._load_states()
+        return self._states
+
+    def release_states(self) -> None:
+        """
+        Free the memory used by the states if they can be loaded again when they are needed, i.e. if the
+        TransitionSystem was read with load. The states of other TransitionSystems are kept.
+        """
+        if self._load_states is not None:
+            self._states = None
 
     @classmethod
     def deserialize(cls, data: dict) -> 'Self':
@@ -29,35 +139,102 @@ class TransitionSystem:
         assert("graph" in data.keys())
         assert("init" in data.keys())
         assert("goals" in data.keys())
-        graph = DirectedGraph(data["graph"])
-        return cls([set(s) for s in data["states"]], graph, data["init"], data["goals"])
+        graph = CSRGraph.from_adjacency(data["graph"], data.get("labels"))
+        # the states are packed at once, such that the json lists of strings are not kept
+        states = StateStore.from_states(data["states"], data.get("atoms"), data.get("static_predicates", ()),
+                                        data.get("static_atoms", ()))
+        return cls(states, graph, data["init"], data["goals"], data.get("goal_distances"), data.get("object_classes"))
 
     def serialize(self) -> dict:
         """ Convert information from TransitionSystem object into a json readable object. Necessary for cashing."""
-        return {"init": self.init, "goals": self.goals, "graph": self.graph.adj, "states": [list(s) for s in self.states]}
+        return {"init": self.init, "goals": self.goals, "goal_distances": self.goal_distances,
+                "object_classes": self.object_classes,
+                "graph": self.graph.id_adj(), "labels": self.graph.label_names, "atoms": self.states.atoms,
+                "static_predicates": sorted(self.states.static_predicates),
+                "static_atoms": sorted(self.states.static_atoms), "states": [list(s) for s in self.states]}
+
+    def save(self, directory: str) -> None:
+        """
+        Write the TransitionSystem in a binary format to a directory, with one .npy file for each array and a json file
+        with the other data, such that it can be loaded again with load.
+        :param directory: The directory, which is made if it does not exist
+        """
+        save_arrays(directory, {"indptr": self.graph.indptr, "indices": self.graph.indices, "labels": self.graph.labels,
+                                "rows": self.states.rows, "goals": np.array(self.goals, dtype=np.int64),
+                                "goal_distances": np.array(self.goal_distances, dtype=np.int64)},
+                    {"init": self.init, "label_names": self.graph.label_names, "object_classes": self.object_classes,
+                     "atoms": self.states.atoms, "static_predicates": sorted(self.states.static_predicates),
+                     "static_atoms": sorted(self.states.static_atoms)})
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'Self':
+        """
+        Read a TransitionSystem that was written with save
+        :param directory: The directory to which the TransitionSystem was written
+        :param mmap: If true, the graph and the states are memory-mapped instead of read, such that they are only loaded
+                     from disk when they are used
+        :return: The TransitionSystem
+        """
+        arrays, meta = load_arrays(directory, ["indptr", "indices", "labels", "goals", "goal_distances"], mmap)
+        graph = CSRGraph(arrays["indptr"], arrays["indices"], arrays["labels"], meta["label_names"])
+
+        def load_states() -> StateStore:
+            rows = load_array(directory, "rows", mmap)
+            return StateStore(meta["atoms"], rows, meta["static_predicates"], meta["static_atoms"])
+        return cls(load_states, graph, meta["init"], arrays["goals"].tolist(), arrays["goal_distances"].tolist(),
+                   meta["object_classes"])
 
 
 class GraphSystem:
     """
     A GraphSystem contains graph of a transition system, together with the ordered states that label the nodes of the
-    graph.
+    graph, and the symmetries that were used to reduce the graph, if any.
     """
-    states: list[StateStr]
-    graph: DirectedGraph
+    states: StateStore
+    graph: CSRGraph
+    symmetries: Optional[Symmetries]
 
-    def __init__(self, states: list[StateStr], graph: DirectedGraph):
+    def __init__(self, states: StateStore, graph: CSRGraph, symmetries: Optional[Symmetries] = None):
         self.states = states
         self.graph = graph
+        self.symmetries = symmetries
 
     @classmethod
     def deserialize(cls, data: dict):
         """ Create GraphSystem object from json readable object. Necessary for cashing."""
         assert("states" in data.keys())
         assert("graph" in data.keys())
-        graph = DirectedGraph(data["graph"])
-        return cls([set(s) for s in data["states"]], graph)
+        graph = CSRGraph.from_adjacency(data["graph"], data.get("labels"))
+        return cls(StateStore.from_states(data["states"], data.get("atoms"), data.get("static_predicates", ()),
+                                          data.get("static_atoms", ())), graph)
 
     def serialize(self) -> dict:
         """ Convert information from Graphsystem object into a json readable object. Necessary for cashing."""
-        return {"graph": self.graph.adj, "states": [list(s) for s in self.states]}
+        return {"graph": self.graph.id_adj(), "labels": self.graph.label_names, "atoms": self.states.atoms,
+                "static_predicates": sorted(self.states.static_predicates),
+                "static_atoms": sorted(self.states.static_atoms), "states": [list(s) for s in self.states]}
+
+    def save(self, directory: str) -> None:
+        """
+        Write the GraphSystem in the binary format of TransitionSystem.save to a directory. Symmetries are not saved.
+        :param directory: The directory, which is made if it does not exist
+        """
+        assert(self.symmetries is None)
+        save_arrays(directory, {"indptr": self.graph.indptr, "indices": self.graph.indices, "labels": self.graph.labels,
+                                "rows": self.states.rows},
+                    {"label_names": self.graph.label_names, "atoms": self.states.atoms,
+                     "static_predicates": sorted(self.states.static_predicates),
+                     "static_atoms": sorted(self.states.static_atoms)})
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'Self':
+        """
+        Read a GraphSystem that was written with save
+        :param directory: The directory to which the GraphSystem was written
+        :param mmap: If true, the graph and the states are memory-mapped instead of read
+        :return: The GraphSystem
+        """
+        arrays, meta = load_arrays(directory, ["indptr", "indices", "labels", "rows"], mmap)
+        return cls(StateStore(meta["atoms"], arrays["rows"], meta["static_predicates"], meta["static_atoms"]),
+                   CSRGraph(arrays["indptr"], arrays["indices"], arrays["labels"], meta["label_names"]))
 
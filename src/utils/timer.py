@@ -3,13 +3,17 @@
 from os import path, makedirs
 from time import monotonic_ns
 
+from src.file_manager.archive import open_archive
 
-def timer(filepath, namer):
+
+def timer(filepath, namer, archive=False):
     """
     Times how long it takes to execute a function F, and saves that to a file
     :param filepath: The directory in which to save the timing file
     :param namer: Injective function that takes as input the arguments of F and outputs a unique filename that will be
                   used to save the timing.
+    :param archive: If true, the timing is saved as an entry of the pack of the directory of the file instead, see
+                    file_manager.cashing.cache_to_archive
     :return: ???
     """
     def wrapper(f):
@@ -18,6 +22,9 @@ def timer(filepath, namer):
             res = f(*args, **kwargs)
             duration = monotonic_ns() - t0
             filename = namer(*args, **kwargs)
+            if archive:
+                open_archive(path.dirname(filepath + filename)).put(path.basename(filename), str(duration).encode())
+                return res
             if not path.exists(path.dirname(filepath + filename)):
                 print(filepath + filename)
                 makedirs(path.dirname(filepath + filename))
@@ -1 +1,2 @@
+from .archive_test import ArchiveTest
 from .serialize_test import SketchSavingTest
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from src.file_manager.archive import PackArchive
+from src.file_manager.cashing import cache_to_archive
+
+
+class ArchiveTest(unittest.TestCase):
+    def test_pack(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = PackArchive(os.path.join(tmp, "features"))
+            self.assertNotIn("a.json", pack)
+            pack.put("a.json", b"[1, 2]")
+            pack.put("b.json", b"[3]" * 100, "lzma")
+            pack.put("a.json", b"[4]")
+            self.assertEqual(b"[4]", pack.get("a.json"))
+            self.assertEqual(b"[3]" * 100, pack.get("b.json"))
+
+            # a pack is read from its index, or from the records themselves if the index is lost
+            self.assertEqual(["a.json", "b.json"], sorted(PackArchive(os.path.join(tmp, "features")).keys()))
+            os.remove(os.path.join(tmp, "features.index"))
+            self.assertEqual(b"[4]", PackArchive(os.path.join(tmp, "features")).get("a.json"))
+
+            # writing to a pack without index rebuilds the index first, such that the old entries are not lost
+            PackArchive(os.path.join(tmp, "features")).put("c.json", b"[5]")
+            pack = PackArchive(os.path.join(tmp, "features"))
+            self.assertEqual(["a.json", "b.json", "c.json"], sorted(pack.keys()))
+            self.assertEqual(b"[4]", pack.get("a.json"))
+            self.assertEqual(b"[5]", pack.get("c.json"))
+
+    def test_cache_to_archive(self):
+        calls = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            @cache_to_archive(tmp + "/", lambda x: x, lambda x: x, lambda n: f"domain/values/{n}.json")
+            def values(n: int) -> list[int]:
+                calls.append(n)
+                return list(range(n))
+
+            self.assertEqual([0, 1], values(2))
+            self.assertEqual([0, 1], values(2))
+            self.assertEqual([2], calls)
+            self.assertTrue(os.path.isfile(os.path.join(tmp, "domain", "values.pack")))
+
+
+if __name__ == '__main__':
+    unittest.main()
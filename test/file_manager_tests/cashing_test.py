@@ -1,5 +1,16 @@
+import json
+import os
+import tempfile
 import unittest
+
+import numpy as np
+
 import src.transition_system as ts
+from src.file_manager.cashing import cache_to_directory, directory_cached, save_to_directory
+from src.file_manager.migrate import migrate_transition_systems, pack_cache
+from src.transition_system.graph import CSRGraph
+from src.transition_system.state_store import StateStore
+from src.transition_system.transition_system import TransitionSystem
 
 
 class Cashing(unittest.TestCase):
@@ -7,6 +18,72 @@ class Cashing(unittest.TestCase):
         instance = ts.tarski.load_instance("../../domains/miconic/domain.pddl", "../../domains/miconic/p-2-2-2.pddl")
         ts.tarski.tarski_to_transition_system(instance)
 
+    def test_binary_transition_system(self):
+        states = StateStore.from_states([{"at(a)"}, {"at(b)"}, set()], ["at(a)", "at(b)"])
+        graph = CSRGraph.from_edges(3, [0, 0, 1, 2], [1, 2, 1, 2], ["move(a,b)", "drop(a)", "goal", "end"])
+        system = TransitionSystem(states, graph, 0, [1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            system.save(os.path.join(tmp, "system"))
+            loaded = TransitionSystem.load(os.path.join(tmp, "system"))
+            self.assertEqual(system.serialize(), loaded.serialize())
+            # the states are loaded again after they are released
+            loaded.release_states()
+            self.assertEqual([{"at(a)"}, {"at(b)"}, set()], list(loaded.states))
+
+            # a json cache is converted to a binary cache with the same transition system
+            os.makedirs(os.path.join(tmp, "domain", "transition_systems"))
+            with open(os.path.join(tmp, "domain", "transition_systems", "p.json"), "w") as file:
+                json.dump(system.serialize(), file)
+            self.assertEqual(1, len(migrate_transition_systems(tmp)))
+            self.assertEqual(0, len(migrate_transition_systems(tmp)))
+            loaded = TransitionSystem.load(os.path.join(tmp, "domain", "transition_systems", "p"))
+            self.assertEqual(system.serialize(), loaded.serialize())
+
+            # the arrays of a packed binary cache are memory-mapped from the pack
+            self.assertEqual(1, pack_cache(tmp, remove=True))
+            self.assertFalse(os.path.isdir(os.path.join(tmp, "domain", "transition_systems", "p")))
+            self.assertTrue(directory_cached(os.path.join(tmp, "domain", "transition_systems", "p/")))
+            self.assertEqual(0, len(migrate_transition_systems(tmp)))
+            loaded = TransitionSystem.load(os.path.join(tmp, "domain", "transition_systems", "p/"))
+            self.assertIsInstance(loaded.graph.indices, np.memmap)
+            self.assertEqual(system.serialize(), loaded.serialize())
+
+    def test_cache_to_directory(self):
+        states = StateStore.from_states([{"at(a)"}, {"at(b)"}], ["at(a)", "at(b)"])
+        system = TransitionSystem(states, CSRGraph.from_edges(2, [0, 1], [1, 1], ["move(a,b)", "goal"]), 0, [1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "p.json"), "w") as file:
+                json.dump(system.serialize(), file)
+
+            @cache_to_directory(tmp + "/", TransitionSystem.save, TransitionSystem.load, lambda name: name,
+                                fallback=(lambda name: name + ".json", TransitionSystem.deserialize))
+            def build(name: str) -> TransitionSystem:
+                return system
+
+            # a json cache is saved as a binary cache, from which the states can be loaded again after they are
+            # released
+            loaded = build("p")
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "p")))
+            loaded.release_states()
+            self.assertEqual([{"at(a)"}, {"at(b)"}], list(loaded.states))
+
+            # also a new output is read back from its cache directory
+            built = build("q")
+            self.assertIsNot(system, built)
+            self.assertEqual(system.serialize(), built.serialize())
+            built.release_states()
+            self.assertIsNone(built._states)
+
+    def test_save_to_directory_twice(self):
+        # e.g. two processes that save the same output, the first one is kept
+        with tempfile.TemporaryDirectory() as tmp:
+            save_to_directory(tmp + "/out/", lambda res, d: open(os.path.join(d, "res"), "w").write(res), "first")
+            save_to_directory(tmp + "/out/", lambda res, d: open(os.path.join(d, "res"), "w").write(res), "second")
+            with open(os.path.join(tmp, "out", "res")) as file:
+                self.assertEqual("first", file.read())
+            self.assertEqual(["out"], os.listdir(tmp))
 
 
 if __name__ == '__main__':
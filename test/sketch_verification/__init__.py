@@ -1,2 +1,4 @@
 from .verify_examples import VerifyExamples
-from .verify import SketchVerificationTest
\ No newline at end of file
+from .verify import SketchVerificationTest
+from .feature_matrix_test import FeatureMatrixTest
+from .registry_test import RegistryTest
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.sketch_verification.feature_instance import FeatureInstance
+from src.sketch_verification.feature_matrix import FeatureMatrix, equivalence_classes
+from src.transition_system.graph import DirectedGraph
+
+
+class FeatureMatrixTest(unittest.TestCase):
+    valuations = {"n_x": [2, 1, 0], "b_y": [False, True, False], "n_z": [5, 5, 7]}
+
+    def test_from_valuations(self):
+        matrix = FeatureMatrix.from_valuations(self.valuations)
+        self.assertEqual(3, matrix.size())
+        self.assertEqual(np.int32, matrix.column("n_x").dtype)
+        self.assertEqual(bool, matrix.column("b_y").dtype)
+        self.assertEqual(self.valuations, matrix.to_dict())
+        self.assertEqual([False, True, False], matrix["b_y"])
+        self.assertEqual({"n_x": (0, 2), "n_z": (5, 7)}, matrix.bounds())
+
+    def test_save_load(self):
+        matrix = FeatureMatrix.from_valuations(self.valuations)
+        with tempfile.TemporaryDirectory() as directory:
+            matrix.save(directory)
+            loaded = FeatureMatrix.load(directory)
+            self.assertEqual(set(self.valuations), set(loaded))
+            self.assertEqual(self.valuations, dict(loaded))
+            self.assertTrue(loaded.column("n_z").flags.c_contiguous)
+
+    def test_feature_instance(self):
+        graph = DirectedGraph([[[1], ["1"]], [[2], ["2"]], [[2], [""]]])
+        instance = FeatureInstance(graph, 0, [2], FeatureMatrix.from_valuations(self.valuations))
+        self.assertEqual(FeatureInstance(graph, 0, [2], self.valuations).get_bounds(), instance.get_bounds())
+
+    def test_equivalence_classes(self):
+        matrices = [FeatureMatrix.from_valuations({"n_a": [1, 0], "n_b": [1, 0], "b_c": [True, False], "n_d": [1, 0]}),
+                    FeatureMatrix.from_valuations({"n_a": [2], "n_b": [2], "b_c": [True], "n_d": [1]})]
+        complexity = {"n_a": 3, "n_b": 2, "b_c": 1, "n_d": 1}
+        self.assertEqual({"n_b": ["n_a", "n_b"], "b_c": ["b_c"], "n_d": ["n_d"]},
+                         equivalence_classes(matrices, ["n_a", "n_b", "b_c", "n_d"], complexity.get))
+        self.assertEqual(["n_b", "b_c", "n_d"], list(equivalence_classes(matrices, ["n_a", "n_b", "b_c", "n_d"],
+                                                                          complexity.get)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import unittest
+
+import numpy as np
+
+from src.sketch_verification.feature_instance import FeatureInstance
+from src.sketch_verification.registry import InstanceRegistry, attach
+from src.transition_system.graph import DirectedGraph
+
+
+class RegistryTest(unittest.TestCase):
+    def test_publish_attach(self):
+        graph = DirectedGraph([[[1], ["1"]], [[2], ["2"]], [[2], [""]]])
+        instance = FeatureInstance(graph, 0, [2], {"b_y": [False, True, False], "n_x": [2, 1, 0]})
+        with InstanceRegistry() as registry:
+            registry.publish(3, instance)
+            self.assertIn(3, registry)
+            attached = attach(registry.directory, 3)
+            self.assertEqual([1], attached.graph.nbs(0))
+            self.assertEqual([2], attached.graph.nbs(2))
+            self.assertEqual(instance.feature_valuations, attached.feature_valuations.to_dict())
+            self.assertEqual([2], attached.goal_states.tolist())
+            self.assertEqual([0, 1, 2], attached.alive_states.tolist())
+            # the values of a feature are not copied
+            self.assertIsInstance(attached.feature_valuations["n_x"], np.memmap)
+            self.assertEqual({"n_x": (0, 2)}, attached.get_bounds())
+            directory = registry.directory
+        self.assertFalse(os.path.exists(directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
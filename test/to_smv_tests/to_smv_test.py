@@ -40,6 +40,7 @@ DEFINE
 		state = s1: 1; 
 	esac;
 	goal := state in {s0, s1};
+	alive := state in {s0, s1};
 	c0 := !b0; 
  	e0 := n0<0 & b0;
 """
@@ -62,6 +63,7 @@ DEFINE
 		state = s1: TRUE; 
 	esac;
 	goal := state in {s0, s1};
+	alive := state in {s0, s1};
 	c0 := !b0; 
  	e0 := n0<0 & b0;
 """
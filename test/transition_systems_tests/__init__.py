@@ -1,5 +1,16 @@
+from .analytics_test import GraphAnalyticsTest
+from .checkpoint_test import CheckpointTest
+from .export_test import ExportTest
 from .conversions_tests import ConversionTest
 from .dl_transition_model_test import TransitionSystemTest
 from .graph_test import GraphTest
+from .grounding_test import GroundingTest
+from .out_of_core_test import OutOfCoreExplorationTest
+from .parallel_test import ParallelExplorationTest
+from .parsed_test import ParsedInstanceTest
+from .state_store_test import StateStoreTest
+from .shared_graph_test import SharedGraphTest
+from .successors_test import CompiledActionsTest
+from .symmetry_test import SymmetryTest
 from .tarski_action_tests import TarskiActionTest
 from .tarski_transition_model import TarskiSystemTest
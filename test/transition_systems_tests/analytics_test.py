@@ -0,0 +1,39 @@
+import unittest
+
+from src.transition_system import analytics
+from src.transition_system.graph import CSRGraph, DirectedGraph
+
+
+class GraphAnalyticsTest(unittest.TestCase):
+    # 0 -> 1 <-> 2 -> 3 (dead end with a self-loop), and 4 -> 0
+    graph = CSRGraph.from_edges(5, [0, 1, 2, 2, 3, 4], [1, 2, 1, 3, 3, 0], ['a', 'b', 'c', 'd', 'end', 'e'])
+
+    def test_reverse(self):
+        self.assertEqual([([4], ['e']), ([0, 2], ['a', 'c']), ([1], ['b']), ([2, 3], ['d', 'end']), ([], [])],
+                         analytics.reverse(self.graph).adj)
+
+    def test_reachable(self):
+        self.assertEqual([False, True, True, True, False], analytics.reachable(self.graph, [1]).tolist())
+        self.assertEqual([True, True, True, False, True], analytics.backward_reachable(self.graph, [2]).tolist())
+        # masks and a DirectedGraph can be given as well
+        mask = analytics.node_mask(self.graph, [4])
+        self.assertEqual([True, True, True, True, True], analytics.reachable(self.graph, mask).tolist())
+        self.assertEqual(analytics.reachable(self.graph, [0]).tolist(),
+                         analytics.reachable(DirectedGraph(self.graph.adj), [0]).tolist())
+
+    def test_components(self):
+        components = analytics.strongly_connected_components(self.graph)
+        self.assertEqual(components[1], components[2])
+        self.assertEqual(4, len(set(components.tolist())))
+        self.assertLess(components[4], components[0])
+        self.assertLess(components[2], components[3])
+
+        dag = analytics.condensation(self.graph, components)
+        self.assertEqual(4, dag.size())
+        src, dst, _ = dag.edges()
+        self.assertEqual(3, len(src))
+        self.assertTrue((src < dst).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.transition_system.checkpoint import Checkpoint
+from src.transition_system.exploration import explore
+from src.transition_system.state_store import StateStore
+
+
+class CheckpointTest(unittest.TestCase):
+    atoms = [f"bit({i})" for i in range(8)]
+
+    @staticmethod
+    def expand(n: int) -> list[tuple[str, int]]:
+        return [("inc", (n + 1) % 7), ("dbl", (2 * n) % 7)]
+
+    @staticmethod
+    def encode(n: int) -> np.ndarray:
+        return np.array([n], dtype=np.uint8)
+
+    def test_resume(self):
+        expected = explore(1, self.expand, self.encode, StateStore(self.atoms))
+
+        calls = 0
+
+        def interrupted(n: int) -> list[tuple[str, int]]:
+            nonlocal calls
+            calls += 1
+            if calls == 4:
+                raise KeyboardInterrupt
+            return self.expand(n)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "checkpoint.pickle")
+            with self.assertRaises(KeyboardInterrupt):
+                explore(1, interrupted, self.encode, StateStore(self.atoms), checkpoint=Checkpoint(path, 0))
+            self.assertTrue(os.path.isfile(path))
+
+            states = StateStore(self.atoms)
+            graph = explore(1, self.expand, self.encode, states, checkpoint=Checkpoint(path, 0))
+            self.assertFalse(os.path.isfile(path))
+        self.assertEqual(expected.adj, graph.adj)
+        self.assertEqual([{'bit(0)'}, {'bit(1)'}], [states[i] for i in range(2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,8 @@ import dlplan
 import tarski
 
 import src.transition_system as ts
-from src.transition_system.dlplan import dlstate_from_state
+from src.transition_system.dlplan import dlstate_from_state, dlstates_from_store, eval_features_cached, \
+    static_atom_names
 from src.transition_system.transition_system import StateStr, TransitionSystem
 
 
@@ -61,6 +62,24 @@ class ConversionTest(unittest.TestCase):
 
         self.assertEqual(tstate_atoms_as_strs, dlstate_atoms_as_strs)
 
+    def test_states_from_store(self):
+        states = ts.tarski.construct_graph(self.i_problem).states
+        dlstates = dlstates_from_store(states, self.i, chunk=5)
+        self.assertEqual(len(states), len(dlstates))
+        static = static_atom_names(self.i)
+        for state, dlstate in zip(states, dlstates):
+            self.assertEqual(sorted(dlstate_from_state(state, self.i, static).get_atom_indices()),
+                             sorted(dlstate.get_atom_indices()))
+
+    def test_eval_features_cached(self):
+        dlstates = dlstates_from_store(ts.tarski.construct_graph(self.i_problem).states, self.i)
+        factory = dlplan.core.SyntacticElementFactory(self.i.get_vocabulary_info())
+        features = [factory.parse_numerical("n_count(c_primitive(clear,0))"),
+                    factory.parse_numerical("n_count(c_and(c_primitive(clear,0),c_primitive(on-table,0)))"),
+                    factory.parse_boolean("b_empty(c_and(c_primitive(clear,0),c_primitive(on-table,0)))")]
+        self.assertEqual([[f.evaluate(s) for s in dlstates] for f in features],
+                         eval_features_cached(features, dlstates, chunk=5))
+
 
     def test_instance(self):
         i_blocks = ts.conversions.dlinstance_from_tarski(self.d_problem, self.i_problem)
@@ -69,7 +88,7 @@ class ConversionTest(unittest.TestCase):
 
         # TODO predicates and objects are not matched correctly
         i_gripper = ts.conversions.dlinstance_from_tarski(self.domain_pr_2, self.instance_pr_2)
-        self.assertEqual({'room(rooma)', 'room(roomb)', 'room(left)', 'room(right)', 'room(ball1)', 'room(ball2)', 'room(ball3)', 'ball(rooma)', 'ball(roomb)', 'ball(left)', 'ball(right)', 'ball(ball1)', 'ball(ball2)', 'ball(ball3)', 'gripper(rooma)', 'gripper(roomb)', 'gripper(left)', 'gripper(right)', 'gripper(ball1)', 'gripper(ball2)', 'gripper(ball3)', 'at-robby(rooma)', 'at-robby(roomb)', 'at-robby(left)', 'at-robby(right)', 'at-robby(ball1)', 'at-robby(ball2)', 'at-robby(ball3)', 'at(rooma,roomb)', 'at(rooma,left)', 'at(rooma,right)', 'at(rooma,ball1)', 'at(rooma,ball2)', 'at(rooma,ball3)', 'at(roomb,rooma)', 'at(roomb,left)', 'at(roomb,right)', 'at(roomb,ball1)', 'at(roomb,ball2)', 'at(roomb,ball3)', 'at(left,rooma)', 'at(left,roomb)', 'at(left,right)', 'at(left,ball1)', 'at(left,ball2)', 'at(left,ball3)', 'at(right,rooma)', 'at(right,roomb)', 'at(right,left)', 'at(right,ball1)', 'at(right,ball2)', 'at(right,ball3)', 'at(ball1,rooma)', 'at(ball1,roomb)', 'at(ball1,left)', 'at(ball1,right)', 'at(ball1,ball2)', 'at(ball1,ball3)', 'at(ball2,rooma)', 'at(ball2,roomb)', 'at(ball2,left)', 'at(ball2,right)', 'at(ball2,ball1)', 'at(ball2,ball3)', 'at(ball3,rooma)', 'at(ball3,roomb)', 'at(ball3,left)', 'at(ball3,right)', 'at(ball3,ball1)', 'at(ball3,ball2)', 'free(rooma)', 'free(roomb)', 'free(left)', 'free(right)', 'free(ball1)', 'free(ball2)', 'free(ball3)', 'carry(rooma,roomb)', 'carry(rooma,left)', 'carry(rooma,right)', 'carry(rooma,ball1)', 'carry(rooma,ball2)', 'carry(rooma,ball3)', 'carry(roomb,rooma)', 'carry(roomb,left)', 'carry(roomb,right)', 'carry(roomb,ball1)', 'carry(roomb,ball2)', 'carry(roomb,ball3)', 'carry(left,rooma)', 'carry(left,roomb)', 'carry(left,right)', 'carry(left,ball1)', 'carry(left,ball2)', 'carry(left,ball3)', 'carry(right,rooma)', 'carry(right,roomb)', 'carry(right,left)', 'carry(right,ball1)', 'carry(right,ball2)', 'carry(right,ball3)', 'carry(ball1,rooma)', 'carry(ball1,roomb)', 'carry(ball1,left)', 'carry(ball1,right)', 'carry(ball1,ball2)', 'carry(ball1,ball3)', 'carry(ball2,rooma)', 'carry(ball2,roomb)', 'carry(ball2,left)', 'carry(ball2,right)', 'carry(ball2,ball1)', 'carry(ball2,ball3)', 'carry(ball3,rooma)', 'carry(ball3,roomb)', 'carry(ball3,left)', 'carry(ball3,right)', 'carry(ball3,ball1)', 'carry(ball3,ball2)'},
+        self.assertEqual({'at-robby(rooma)', 'at-robby(roomb)', 'at-robby(left)', 'at-robby(right)', 'at-robby(ball1)', 'at-robby(ball2)', 'at-robby(ball3)', 'at(rooma,roomb)', 'at(rooma,left)', 'at(rooma,right)', 'at(rooma,ball1)', 'at(rooma,ball2)', 'at(rooma,ball3)', 'at(roomb,rooma)', 'at(roomb,left)', 'at(roomb,right)', 'at(roomb,ball1)', 'at(roomb,ball2)', 'at(roomb,ball3)', 'at(left,rooma)', 'at(left,roomb)', 'at(left,right)', 'at(left,ball1)', 'at(left,ball2)', 'at(left,ball3)', 'at(right,rooma)', 'at(right,roomb)', 'at(right,left)', 'at(right,ball1)', 'at(right,ball2)', 'at(right,ball3)', 'at(ball1,rooma)', 'at(ball1,roomb)', 'at(ball1,left)', 'at(ball1,right)', 'at(ball1,ball2)', 'at(ball1,ball3)', 'at(ball2,rooma)', 'at(ball2,roomb)', 'at(ball2,left)', 'at(ball2,right)', 'at(ball2,ball1)', 'at(ball2,ball3)', 'at(ball3,rooma)', 'at(ball3,roomb)', 'at(ball3,left)', 'at(ball3,right)', 'at(ball3,ball1)', 'at(ball3,ball2)', 'free(rooma)', 'free(roomb)', 'free(left)', 'free(right)', 'free(ball1)', 'free(ball2)', 'free(ball3)', 'carry(rooma,roomb)', 'carry(rooma,left)', 'carry(rooma,right)', 'carry(rooma,ball1)', 'carry(rooma,ball2)', 'carry(rooma,ball3)', 'carry(roomb,rooma)', 'carry(roomb,left)', 'carry(roomb,right)', 'carry(roomb,ball1)', 'carry(roomb,ball2)', 'carry(roomb,ball3)', 'carry(left,rooma)', 'carry(left,roomb)', 'carry(left,right)', 'carry(left,ball1)', 'carry(left,ball2)', 'carry(left,ball3)', 'carry(right,rooma)', 'carry(right,roomb)', 'carry(right,left)', 'carry(right,ball1)', 'carry(right,ball2)', 'carry(right,ball3)', 'carry(ball1,rooma)', 'carry(ball1,roomb)', 'carry(ball1,left)', 'carry(ball1,right)', 'carry(ball1,ball2)', 'carry(ball1,ball3)', 'carry(ball2,rooma)', 'carry(ball2,roomb)', 'carry(ball2,left)', 'carry(ball2,right)', 'carry(ball2,ball1)', 'carry(ball2,ball3)', 'carry(ball3,rooma)', 'carry(ball3,roomb)', 'carry(ball3,left)', 'carry(ball3,right)', 'carry(ball3,ball1)', 'carry(ball3,ball2)'},
                          {a.get_name() for a in i_gripper.get_atoms()})
 
 
@@ -78,7 +97,8 @@ class ConversionTest(unittest.TestCase):
         self.assertEqual(['clear_g(b1)'], [a.get_name() for a in i_blocks.get_static_atoms()])
 
         i_gripper = ts.conversions.dlinstance_from_tarski(self.domain_pr_2, self.instance_pr_2)
-        self.assertEqual({'at_g(ball1,roomb)', 'at_g(ball2,roomb)', 'at_g(ball3,roomb)'}, {a.get_name() for a in i_gripper.get_static_atoms()})
+        self.assertEqual({'room(rooma)', 'room(roomb)', 'gripper(left)', 'gripper(right)', 'ball(ball1)', 'ball(ball2)', 'ball(ball3)',
+                          'at_g(ball1,roomb)', 'at_g(ball2,roomb)', 'at_g(ball3,roomb)'}, {a.get_name() for a in i_gripper.get_static_atoms()})
 
     def test_system_conv(self):
         trans_system: TransitionSystem = ts.tarski.tarski_to_transition_system(self.i_problem)
@@ -0,0 +1,46 @@
+import io
+import unittest
+
+import numpy as np
+
+from src.transition_system import export
+from src.transition_system.graph import CSRGraph
+
+
+class ExportTest(unittest.TestCase):
+    graph = CSRGraph.from_edges(3, [0, 0, 1, 2], [1, 2, 2, 2], ['a', 'b', 'c', 'end'])
+
+    def test_dot(self):
+        file = io.StringIO()
+        export.write_dot(self.graph, file, state_labels=[{'p'}, {'q'}, set()], valuations={'n_x': [2, 1, 0]},
+                         mask=np.array([True, False, True]))
+        self.assertEqual('digraph {\n'
+                         '  0 [label="{\'p\'}", "n_x"="2"];\n'
+                         '  2 [label="set()", "n_x"="0"];\n'
+                         '  0 -> 2 [label="b"];\n'
+                         '  2 -> 2 [label="end"];\n'
+                         '}\n', file.getvalue())
+
+    def test_graphml(self):
+        file = io.StringIO()
+        export.write_graphml(self.graph, file, valuations={'b_y': [True, False, False]})
+        self.assertIn('<key id="f0" for="node" attr.name="b_y" attr.type="boolean"/>', file.getvalue())
+        self.assertIn('<node id="n0"><data key="f0">true</data></node>', file.getvalue())
+        self.assertIn('<edge source="n1" target="n2"><data key="label">c</data></edge>', file.getvalue())
+
+    def test_edge_list(self):
+        file = io.StringIO(newline='')
+        export.write_edge_list(self.graph, file)
+        self.assertEqual("source,target,label\r\n0,1,a\r\n0,2,b\r\n1,2,c\r\n2,2,end\r\n", file.getvalue())
+
+        binary = io.BytesIO()
+        export.write_binary_edges(self.graph, binary, mask=np.array([False, True, True]))
+        binary.seek(0)
+        self.assertEqual([[1, 2, 2], [2, 2, 3]], np.load(binary).tolist())
+
+    def test_show(self):
+        self.assertEqual("0 -> 1; \n0 -> 2; \n1 -> 2; \n2 -> 2; \n", self.graph.show())
+
+
+if __name__ == '__main__':
+    unittest.main()
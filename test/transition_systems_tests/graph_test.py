@@ -1,5 +1,6 @@
 import unittest
-from src.transition_system.graph import DirectedGraph
+from src.transition_system.graph import DirectedGraph, CSRGraph
+from src.transition_system.reachability import goal_distances, alive_states
 
 
 class GraphTest(unittest.TestCase):
@@ -32,6 +33,40 @@ class GraphTest(unittest.TestCase):
         # out of range
         # self.assertRaises(AssertionError, g.add(4, 0, 'l'))
 
+    def test_goal_distances(self):
+        g = DirectedGraph()
+        for _ in range(4):
+            g.grow()
+        g.add(0, 1, 'a')
+        g.add(1, 2, 'b')
+        g.add(0, 3, 'c')
+        g.add(3, 3, 'end')
+        self.assertEqual([[], [0], [1], [0, 3]], g.predecessors())
+        self.assertEqual([2, 1, 0, -1], goal_distances(g, [2]))
+        self.assertEqual([0, 1, 2], alive_states(goal_distances(g, [2])))
+
+    def test_csr_graph(self):
+        # the edge (2, 1) is added twice, the label of the first occurrence is kept
+        g = CSRGraph.from_edges(3, [2, 0, 2, 2], [1, 1, 0, 1], ['21', 'l', '20', 'test'])
+        self.assertEqual(3, g.size())
+        self.assertEqual([([1], ['l']), ([], []), ([0, 1], ['20', '21'])], g.adj)
+        self.assertEqual([0, 1], g.nbs(2))
+        self.assertEqual([[2], [0, 2], []], g.predecessors())
+
+        g = g.with_edges([1, 2, 0], [1, 1, 1], ['goal', 'goal', 'goal'])
+        self.assertEqual([([1], ['l']), ([1], ['goal']), ([0, 1], ['20', '21'])], g.adj)
+        self.assertEqual(g.adj, CSRGraph.from_adjacency(g.adj).adj)
+
+    def test_label_ids(self):
+        g = CSRGraph.from_edges(2, [0, 1, 1], [1, 0, 1], ['end', 'a', 'end'])
+        self.assertEqual(['end', 'a'], g.label_names)
+        self.assertEqual([([1], [0]), ([0, 1], [1, 0])], g.id_adj())
+        self.assertEqual(['a', 'end'], g.edge_labels(1))
+
+        g = g.with_edges([0], [0], ['goal'])
+        self.assertEqual(['end', 'a', 'goal'], g.label_names)
+        self.assertEqual(g.adj, CSRGraph.from_adjacency(g.id_adj(), g.label_names).adj)
+
 
 
 
@@ -0,0 +1,29 @@
+import unittest
+
+from tarski.io import PDDLReader
+
+from src.transition_system.grounding import relevant_groundings, ground_actions_from
+from src.transition_system.tarski_manipulation import get_ground_actions, sort_constants
+
+
+class GroundingTest(unittest.TestCase):
+    path = "domains/"
+
+    reader = PDDLReader(raise_on_error=True)
+    reader.parse_domain(path + 'gripper/domain.pddl')
+    problem = reader.parse_instance(path + 'gripper/p-2-0.pddl')
+
+    def test_subsequence_of_all_ground_actions(self):
+        d = sort_constants(self.problem.language)
+        all_names = [a.name for a in get_ground_actions(list(self.problem.actions.values()), d)]
+        groundings = relevant_groundings(list(self.problem.actions.values()), d, self.problem.init)
+        names = [a.name for a in ground_actions_from(self.problem.actions, groundings)]
+
+        self.assertLess(len(names), len(all_names))
+        self.assertEqual(names, [n for n in all_names if n in set(names)])  # same order as get_ground_actions
+        self.assertIn("pick(ball1, rooma, left)", names)
+        self.assertNotIn("pick(rooma, ball1, left)", names)     # room(ball1) can never become true
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from tarski.io import PDDLReader
+
+from src.transition_system.exploration import StateSpaceTooLarge
+from src.transition_system.tarski import construct_graph
+
+
+class OutOfCoreExplorationTest(unittest.TestCase):
+    path = "domains/"
+
+    reader = PDDLReader(raise_on_error=True)
+    reader.parse_domain(path + 'gripper/domain.pddl')
+    problem = reader.parse_instance(path + 'gripper/p-2-0.pddl')
+
+    def test_same_as_in_memory(self):
+        in_memory = construct_graph(self.problem)
+        on_disk = construct_graph(self.problem, memory_budget=1 << 20)
+        self.assertEqual(in_memory.graph.adj, on_disk.graph.adj)
+        self.assertEqual(list(in_memory.states), list(on_disk.states))
+
+    def test_max_states(self):
+        self.assertEqual(28, construct_graph(self.problem, max_states=28).graph.size())
+        self.assertRaises(StateSpaceTooLarge, construct_graph, self.problem, max_states=27)
+        self.assertRaises(StateSpaceTooLarge, construct_graph, self.problem, max_states=27, memory_budget=1 << 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
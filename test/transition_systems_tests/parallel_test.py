@@ -0,0 +1,52 @@
+import unittest
+
+from tarski.io import PDDLReader
+
+from src.transition_system.exploration import StateSpaceTooLarge
+from src.transition_system.tarski import construct_graph
+
+
+def labeled_edges(graph_sys) -> set[tuple[frozenset, str, frozenset]]:
+    states = [frozenset(s) for s in graph_sys.states]
+    return {(states[i], l, states[j]) for i, (ns, ls) in enumerate(graph_sys.graph.adj) for j, l in zip(ns, ls)}
+
+
+class ParallelExplorationTest(unittest.TestCase):
+    path = "domains/"
+
+    @staticmethod
+    def parse(domain: str, instance: str):
+        reader = PDDLReader(raise_on_error=True)
+        reader.parse_domain(domain)
+        return reader.parse_instance(instance)
+
+    def test_same_as_sequential(self):
+        # spanner has dead ends, which get a self-loop
+        for domain, instance in [("gripper", "p-2-0.pddl"), ("spanner", "p-3-3-3-0.pddl")]:
+            problem = self.parse(self.path + domain + "/domain.pddl", self.path + domain + "/" + instance)
+            sequential = construct_graph(problem)
+            parallel = construct_graph(problem, processes=3)
+            self.assertEqual(labeled_edges(sequential), labeled_edges(parallel))
+            # the states are numbered the same, such that caches do not depend on the number of processes
+            self.assertEqual(list(sequential.states), list(parallel.states))
+            self.assertEqual(sequential.graph.indptr.tolist(), parallel.graph.indptr.tolist())
+            self.assertEqual(sequential.graph.indices.tolist(), parallel.graph.indices.tolist())
+            self.assertEqual(sequential.graph.labels.tolist(), parallel.graph.labels.tolist())
+            self.assertEqual(sequential.graph.label_names, parallel.graph.label_names)
+
+    def test_independent_of_processes(self):
+        problem = self.parse(self.path + "gripper/domain.pddl", self.path + "gripper/p-2-0.pddl")
+        two = construct_graph(problem, processes=2)
+        four = construct_graph(problem, processes=4)
+        self.assertEqual(two.graph.adj, four.graph.adj)
+        self.assertEqual(list(two.states), list(four.states))
+
+    def test_max_states(self):
+        problem = self.parse(self.path + "gripper/domain.pddl", self.path + "gripper/p-2-0.pddl")
+        self.assertEqual(28, construct_graph(problem, processes=2, max_states=28).graph.size())
+        with self.assertRaises(StateSpaceTooLarge):
+            construct_graph(problem, processes=2, max_states=27)
+
+
+if __name__ == '__main__':
+    unittest.main()
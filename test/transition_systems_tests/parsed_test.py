@@ -0,0 +1,40 @@
+import unittest
+
+import src.transition_system as ts
+from src.transition_system.parsed import ParsedInstance
+
+
+class ParsedInstanceTest(unittest.TestCase):
+    path = "domains/"
+    domain_file = path + "gripper/domain.pddl"
+    instance_file = path + "gripper/p-2-0.pddl"
+
+    domain = ts.tarski.load_domain(domain_file)
+    instance = ts.tarski.load_instance(domain_file, instance_file)
+
+    def test_from_tarski(self):
+        parsed = ParsedInstance.from_tarski(self.domain, self.instance)
+        self.assertEqual(self.instance.domain_name, parsed.domain_name)
+        self.assertEqual(sorted(str(a) for a in self.instance.init.as_atoms()),
+                         sorted(f"{p}({','.join(args)})" for p, args in parsed.init))
+        self.assertEqual([("at", ["ball1", "roomb"]), ("at", ["ball2", "roomb"])], sorted(parsed.goal))
+        self.assertTrue(parsed.static_atoms)
+        self.assertTrue(all(p in parsed.static for p, _ in parsed.static_atoms))
+        self.assertTrue(all(p not in parsed.static for p, _ in parsed.atoms))
+
+    def test_serialize(self):
+        parsed = ParsedInstance.from_tarski(self.domain, self.instance)
+        loaded = ParsedInstance.deserialize(parsed.serialize())
+        self.assertEqual(parsed.serialize(), loaded.serialize())
+
+    def test_problem(self):
+        # a deserialized instance parses its files when the tarski problem is needed
+        loaded = ParsedInstance.deserialize(ParsedInstance.from_tarski(self.domain, self.instance).serialize())
+        loaded.files = (self.domain_file, self.instance_file)
+        loaded.name = "p-2-0"
+        self.assertEqual("p-2-0", loaded.problem.name)
+        self.assertEqual(sorted(map(str, self.instance.init.as_atoms())), sorted(map(str, loaded.problem.init.as_atoms())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from tarski.io import PDDLReader
+
+from src.transition_system.tarski import construct_graph, tarski_to_transition_system
+from src.transition_system.transition_system import GraphSystem
+
+
+class SharedGraphTest(unittest.TestCase):
+    path = "domains/"
+
+    @staticmethod
+    def parse(domain: str, instance: str):
+        reader = PDDLReader(raise_on_error=True)
+        reader.parse_domain(domain)
+        return reader.parse_instance(instance)
+
+    def test_shared_graph(self):
+        # the same initial state with another goal and another domain name
+        clear = self.parse(self.path + "blocks_4_clear/domain.pddl", self.path + "blocks_4_clear/p-3-0.pddl")
+        on = self.parse(self.path + "blocks_4_on/domain.pddl", self.path + "blocks_4_on/p-3-105.pddl")
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            # the cache directory is ../../cache/
+            os.makedirs(os.path.join(tmp, "a", "b"))
+            os.chdir(os.path.join(tmp, "a", "b"))
+            try:
+                clear_system = tarski_to_transition_system(clear)
+                on_system = tarski_to_transition_system(on)
+                self.assertEqual(1, len(os.listdir(os.path.join(tmp, "cache", "graphs"))))
+                self.assertEqual(list(clear_system.states), list(on_system.states))
+                self.assertNotEqual(list(clear_system.goals), list(on_system.goals))
+                graph = [list(zip(ns, ls)) for ns, ls in construct_graph(clear).graph.adj]
+                for system in (clear_system, on_system):
+                    loops = [i for i, (ns, ls) in enumerate(system.graph.adj) for l in ls if l == "goal"]
+                    self.assertEqual(sorted(system.goals), loops)
+                    # without the goal loops the graphs are the same
+                    self.assertEqual(graph, [[(n, l) for n, l in zip(ns, ls) if l != "goal"]
+                                             for ns, ls in system.graph.adj])
+            finally:
+                os.chdir(cwd)
+
+    def test_save_load(self):
+        problem = self.parse(self.path + "gripper/domain.pddl", self.path + "gripper/p-2-0.pddl")
+        graph_sys = construct_graph(problem)
+        with tempfile.TemporaryDirectory() as directory:
+            graph_sys.save(directory)
+            loaded = GraphSystem.load(directory)
+            self.assertEqual(graph_sys.graph.adj, loaded.graph.adj)
+            self.assertEqual(list(graph_sys.states), list(loaded.states))
+
+
+if __name__ == '__main__':
+    unittest.main()
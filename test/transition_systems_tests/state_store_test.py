@@ -0,0 +1,47 @@
+import unittest
+
+from src.transition_system.state_store import StateStore
+
+
+class StateStoreTest(unittest.TestCase):
+    atoms = ['clear(b1)', 'clear(b2)', 'on(b1,b2)', 'on(b2,b1)', 'on-table(b1)', 'on-table(b2)', 'arm-empty()',
+             'holding(b1)', 'holding(b2)']
+    s0 = {'clear(b1)', 'on(b1,b2)', 'on-table(b2)', 'arm-empty()'}
+    s1 = {'clear(b1)', 'clear(b2)', 'on-table(b1)', 'on-table(b2)', 'arm-empty()'}
+    s2 = {'clear(b2)', 'holding(b1)', 'on-table(b2)'}
+
+    def test_round_trip(self):
+        store = StateStore.from_states([self.s0, self.s1, self.s2], self.atoms)
+        self.assertEqual(3, len(store))
+        self.assertEqual((3, 2), store.rows.shape)
+        self.assertEqual([self.s0, self.s1, self.s2], list(store))
+        self.assertEqual(self.s2, store[-1])
+        self.assertEqual([0, 2, 5, 6], store.atom_idxs(0))
+        self.assertEqual(1, store.index(self.s1))
+
+    def test_satisfying(self):
+        store = StateStore.from_states([self.s0, self.s1, self.s2], self.atoms)
+        self.assertEqual([0, 1], store.satisfying(store.mask({'clear(b1)', 'arm-empty()'})).tolist())
+        self.assertEqual([], store.satisfying(store.mask({'on(b1,b1)'})).tolist())
+
+    def test_unknown_atom(self):
+        store = StateStore(self.atoms[:7])
+        store.append(store.encode(self.s0))
+        idx = store.append(store.encode({'holding(b1)', 'holding(b2)'}))   # two new atoms do not fit in one byte
+        self.assertEqual(9, len(store.atoms))
+        self.assertEqual(2, store.width())
+        self.assertEqual(self.s0, store[0])
+        self.assertEqual({'holding(b1)', 'holding(b2)'}, store[idx])
+
+    def test_static_atoms(self):
+        store = StateStore.from_states([{'at(b1,r1)', 'room(r1)'}, {'at(b1,r2)', 'room(r1)'}],
+                                       ['at(b1,r1)', 'at(b1,r2)', 'room(r1)', 'room(r2)'], {'room'}, {'room(r1)'})
+        self.assertEqual(['at(b1,r1)', 'at(b1,r2)'], store.atoms)
+        self.assertEqual({'at(b1,r2)'}, store[1])
+        self.assertEqual([0, 1], store.satisfying(store.mask({'room(r1)'})).tolist())
+        self.assertIsNone(store.mask({'room(r2)'}))
+        self.assertEqual(1, store.index({'at(b1,r2)', 'room(r1)'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
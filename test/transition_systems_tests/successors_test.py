@@ -0,0 +1,38 @@
+import unittest
+
+import tarski.search.operations
+from tarski.io import PDDLReader
+
+from src.transition_system.state_store import StateStore
+from src.transition_system.successors import compile_actions
+from src.transition_system.tarski import tmodel_to_state
+from src.transition_system.tarski_manipulation import get_ground_actions, sort_constants, ground_atom_names
+
+
+class CompiledActionsTest(unittest.TestCase):
+    path = "domains/"
+
+    reader = PDDLReader(raise_on_error=True)
+    reader.parse_domain(path + 'blocks_4_clear/domain.pddl')
+    problem = reader.parse_instance(path + 'blocks_4_clear/p-3-0.pddl')
+
+    def test_same_successors_as_tarski(self):
+        d = sort_constants(self.problem.language)
+        acts = get_ground_actions(list(self.problem.actions.values()), d)
+        states = StateStore(ground_atom_names(self.problem.language.predicates, d))
+        compiled = compile_actions(acts, states)
+        self.assertIsNotNone(compiled)
+
+        todo = [self.problem.init]
+        for _ in range(10):     # follow the first applicable action a couple of times
+            s = todo.pop()
+            expected = [(a.name, tmodel_to_state(tarski.search.operations.progress(s, a))) for a in acts
+                        if tarski.search.operations.is_applicable(s, a)]
+            row = states.encode(tmodel_to_state(s))
+            got = [(compiled.names[a], states.decode(states.append(ns))) for a, ns in compiled.successors(row)]
+            self.assertEqual(expected, got)
+            todo.append(tarski.search.operations.progress(s, [a for a in acts if tarski.search.operations.is_applicable(s, a)][0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
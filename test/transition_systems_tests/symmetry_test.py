@@ -0,0 +1,46 @@
+import unittest
+
+from tarski.io import PDDLReader
+
+from src.transition_system.state_store import StateStore
+from src.transition_system.symmetry import Symmetries, close_groundings, permute_state
+from src.transition_system.tarski import construct_graph, calc_goal_states_from_str
+
+
+class SymmetryTest(unittest.TestCase):
+    path = "domains/"
+
+    reader = PDDLReader(raise_on_error=True)
+    reader.parse_domain(path + 'gripper/domain.pddl')
+    problem = reader.parse_instance(path + 'gripper/p-2-0.pddl')
+
+    def test_permute_state(self):
+        self.assertEqual({'at(ball2,rooma)', 'free(left)'},
+                         permute_state({'at(ball1,rooma)', 'free(left)'}, {'ball1': 'ball2', 'ball2': 'ball1'}))
+
+    def test_reduced_graph(self):
+        full = construct_graph(self.problem)
+        reduced = construct_graph(self.problem, symmetry=True)
+        self.assertEqual([['left', 'right'], ['ball1', 'ball2']], reduced.symmetries.classes)
+        self.assertEqual(28, full.graph.size())
+        self.assertEqual(12, reduced.graph.size())
+        canonical = {frozenset(reduced.symmetries.canonical_state(s)) for s in full.states}
+        self.assertEqual(canonical, {frozenset(s) for s in reduced.states})
+        self.assertTrue(calc_goal_states_from_str(reduced.states, self.problem.goal))
+
+    def test_large_class(self):
+        # the 12! permutations of the objects are not enumerated
+        objects = [f"o{i}" for i in range(12)]
+        states = StateStore([f"at({o},{r})" for o in objects for r in ("a", "b")] +
+                            [f"on({o},{p})" for o in objects for p in objects if o != p])
+        symmetries = Symmetries([objects], states)
+        state = {"at(o3,a)", "at(o7,b)", "on(o3,o7)", "on(o7,o1)"}
+        permuted = permute_state(state, {"o3": "o10", "o10": "o3", "o7": "o2", "o2": "o7"})
+        canonical = symmetries.canonical_state(state)
+        self.assertEqual(canonical, symmetries.canonical_state(permuted))
+        self.assertEqual(canonical, symmetries.canonical_state(canonical))
+        self.assertEqual(len(state), len(canonical))
+        self.assertEqual(12 * 11, len(close_groundings([("stack", ["o3", "o7"])], [objects])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,14 @@ class TarskiSystemTest(unittest.TestCase):
 
         # print(construct_graph(self.problem)[1].show())
 
+    def test_unique_states(self):
+        graph_sys = construct_graph(self.problem)
+        # states are interned by the bytes of their row in the state store, every state is stored exactly once
+        keys = [row.tobytes() for row in graph_sys.states.rows]
+        self.assertEqual(len(graph_sys.states), len(set(keys)))
+        self.assertEqual(len(keys), len({frozenset(s) for s in graph_sys.states}))
+        self.assertEqual(tmodel_to_state(self.problem.init), graph_sys.states[0])
+
     def test_gripper(self):
 
         domain = Gripper()